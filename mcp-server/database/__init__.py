@@ -1,29 +1,121 @@
 """
 数据库模块
+根据 MEMO_STORAGE_BACKEND 选择 PostgreSQL (queries.py) 或 SQLite (sqlite_queries.py) 实现
+MEMO_CACHE_ENABLED 时写操作与待办查询经过进程内待办缓存 (cache.py)
+MEMO_SLOW_QUERY_MS 以上的语句记录慢查询日志，并可抽样保存执行计划 (slow_queries.py)
+安装了 numpy 时写操作同时增量更新本地语义索引 (semantic.py)
 """
 
-from .connection import get_pool, get_connection, close_pool
+from .config import STORAGE_BACKEND, CACHE_ENABLED, SLOW_QUERY_MS
+from .connection import get_pool, get_connection, close_pool, subscribe, unsubscribe
+from .pools import pool_manager
 from .models import Memo
-from .queries import (
-    create_memo,
-    search_memos,
-    fuzzy_search_memos,
-    complete_memo,
-    get_pending_memos,
-    get_daily_memos,
-    batch_complete
-)
+from .statements import statement_stats, reset_statement_stats, observe, unobserve
+from .slow_queries import slow_query_log, slow_query_stats
+from .unit_of_work import UnitOfWork, lease_stats, reset_lease_stats
+from .cursor import InvalidCursor, cursor_kind
+from . import cache
+from .cache import pending_cache
+from . import semantic
+from .semantic import semantic_index, semantic_search_memos, SEMANTIC_AVAILABLE
+
+if SLOW_QUERY_MS > 0:
+    observe(slow_query_log.on_statement)
+
+if STORAGE_BACKEND == "sqlite":
+    from . import sqlite_queries as _backend
+else:
+    from . import queries as _backend
+
+create_memo = _backend.create_memo
+create_memos_bulk = _backend.create_memos_bulk
+get_memo_details = _backend.get_memo_details
+search_memos = _backend.search_memos
+fuzzy_search_memos = _backend.fuzzy_search_memos
+complete_memo = _backend.complete_memo
+resolve_complete_memo = _backend.resolve_complete_memo
+get_pending_memos = _backend.get_pending_memos
+get_overdue_memos = _backend.get_overdue_memos
+get_people = _backend.get_people
+get_memo_texts = _backend.get_memo_texts
+get_memos_by_ids = _backend.get_memos_by_ids
+get_completed_memos = _backend.get_completed_memos
+get_daily_memos = _backend.get_daily_memos
+batch_complete = _backend.batch_complete
+preview_clear = _backend.preview_clear
+clear_memos = _backend.clear_memos
+pending_cursor = _backend.pending_cursor
+search_cursor = _backend.search_cursor
+fuzzy_cursor = _backend.fuzzy_cursor
+
+if SEMANTIC_AVAILABLE:
+    semantic_index.bind(_backend)
+    semantic_index.restore()
+    subscribe(semantic_index.apply_change)
+
+    create_memo = semantic.write_through_create(create_memo)
+    create_memos_bulk = semantic.write_through_create_bulk(create_memos_bulk)
+    complete_memo = semantic.write_through_complete(complete_memo)
+    resolve_complete_memo = semantic.write_through_resolve_complete(resolve_complete_memo)
+    batch_complete = semantic.write_through_batch_complete(batch_complete)
+    clear_memos = semantic.write_through_clear(clear_memos)
+
+if CACHE_ENABLED:
+    pending_cache.bind(_backend)
+    pending_cache.restore()
+    subscribe(pending_cache.apply_change)
+
+    create_memo = cache.write_through_create(create_memo)
+    create_memos_bulk = cache.write_through_create_bulk(create_memos_bulk)
+    complete_memo = cache.write_through_complete(complete_memo)
+    resolve_complete_memo = cache.write_through_resolve_complete(resolve_complete_memo)
+    batch_complete = cache.write_through_batch_complete(batch_complete)
+    clear_memos = cache.write_through_clear(clear_memos)
+    get_pending_memos = cache.read_through_pending(get_pending_memos)
+    fuzzy_search_memos = cache.read_through_fuzzy(fuzzy_search_memos)
 
 __all__ = [
+    'STORAGE_BACKEND',
     'get_pool',
+    'pool_manager',
     'get_connection',
     'close_pool',
+    'subscribe',
+    'unsubscribe',
+    'pending_cache',
+    'semantic_index',
+    'SEMANTIC_AVAILABLE',
+    'statement_stats',
+    'reset_statement_stats',
+    'observe',
+    'unobserve',
+    'slow_query_log',
+    'slow_query_stats',
+    'UnitOfWork',
+    'lease_stats',
+    'reset_lease_stats',
+    'InvalidCursor',
+    'cursor_kind',
     'Memo',
     'create_memo',
+    'create_memos_bulk',
+    'get_memo_details',
     'search_memos',
     'fuzzy_search_memos',
+    'semantic_search_memos',
     'complete_memo',
+    'resolve_complete_memo',
     'get_pending_memos',
+    'get_overdue_memos',
+    'get_people',
+    'get_memo_texts',
+    'get_memos_by_ids',
+    'get_completed_memos',
     'get_daily_memos',
-    'batch_complete'
+    'batch_complete',
+    'preview_clear',
+    'clear_memos',
+    'pending_cursor',
+    'search_cursor',
+    'fuzzy_cursor'
 ]
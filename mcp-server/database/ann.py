@@ -0,0 +1,178 @@
+"""
+近似最近邻索引 (IVF)
+球面 k-means 把向量划分为 nlist 个簇，每个簇维护一个倒排表 (矩阵行号)；
+查询只扫描与查询向量最相近的 nprobe 个簇，代价约为精确搜索的 nprobe / nlist
+
+倒排表只存行号，向量仍在 SemanticIndex 的矩阵中。
+行被删除或向量改变所属簇时不立即从旧倒排表中移除 (墓碑)，
+查询时按 assign 校验过滤，墓碑过多时整体压缩
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+# k-means 训练参数
+TRAIN_SAMPLE = 50000
+TRAIN_ITERATIONS = 10
+ASSIGN_BATCH = 65536
+
+# 墓碑占比超过该值时压缩倒排表
+COMPACT_RATIO = 0.25
+
+
+def default_nlist(rows: int) -> int:
+    """簇数取 4·√N (至少 16)"""
+    return max(16, int(4 * math.sqrt(rows)))
+
+
+class IVFIndex:
+    """
+    倒排文件索引
+
+    Attributes:
+        centroids: (nlist, dim) 归一化簇中心
+        assign: (容量,) int32，行号 -> 所属簇，-1 表示不在索引中
+    """
+
+    def __init__(self, centroids: np.ndarray, capacity: int = 0):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.nlist = self.centroids.shape[0]
+        self.assign = np.full(capacity, -1, dtype=np.int32)
+        self.trained_rows = 0                    # 训练时的行数 (增长过多时应重新训练)
+        self._lists = [np.empty(16, dtype=np.int32) for _ in range(self.nlist)]
+        self._sizes = np.zeros(self.nlist, dtype=np.int64)
+        self._tombstones = 0
+        self._entries = 0
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, nlist: Optional[int] = None, seed: int = 0) -> 'IVFIndex':
+        """在 matrix (已归一化的行向量) 上训练簇中心并加入全部行"""
+        rows = matrix.shape[0]
+        nlist = min(nlist or default_nlist(rows), rows)
+        rng = np.random.default_rng(seed)
+
+        sample = matrix[rng.choice(rows, min(rows, max(TRAIN_SAMPLE, nlist * 8)), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(TRAIN_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # 空簇保留原中心
+            empty = norms[:, 0] == 0
+            centroids = np.where(empty[:, None], centroids, sums / np.where(norms == 0, 1, norms))
+
+        index = cls(centroids, capacity=rows)
+        index.add_batch(np.arange(rows, dtype=np.int32), matrix)
+        index.trained_rows = rows
+        return index
+
+    @property
+    def tombstone_ratio(self) -> float:
+        return self._tombstones / self._entries if self._entries else 0.0
+
+    def _reserve_rows(self, rows: int):
+        if rows > self.assign.shape[0]:
+            assign = np.full(max(rows, self.assign.shape[0] * 2, 1024), -1, dtype=np.int32)
+            assign[:self.assign.shape[0]] = self.assign
+            self.assign = assign
+
+    def _append(self, list_id: int, rows: np.ndarray):
+        size = self._sizes[list_id]
+        needed = size + rows.shape[0]
+        current = self._lists[list_id]
+        if needed > current.shape[0]:
+            grown = np.empty(max(needed, current.shape[0] * 2), dtype=np.int32)
+            grown[:size] = current[:size]
+            self._lists[list_id] = current = grown
+        current[size:needed] = rows
+        self._sizes[list_id] = needed
+        self._entries += rows.shape[0]
+
+    def _nearest(self, vectors: np.ndarray) -> np.ndarray:
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], ASSIGN_BATCH):
+            batch = vectors[start:start + ASSIGN_BATCH]
+            labels[start:start + batch.shape[0]] = np.argmax(batch @ self.centroids.T, axis=1)
+        return labels
+
+    def add_batch(self, rows: np.ndarray, vectors: np.ndarray):
+        """批量加入 (rows 与 vectors 一一对应)"""
+        if rows.shape[0] == 0:
+            return
+        self._reserve_rows(int(rows.max()) + 1)
+        labels = self._nearest(vectors)
+        order = np.argsort(labels, kind='stable')
+        labels, rows = labels[order], rows[order]
+        bounds = np.flatnonzero(np.diff(labels)) + 1
+        for chunk_rows, chunk_labels in zip(np.split(rows, bounds), np.split(labels, bounds)):
+            self._append(int(chunk_labels[0]), chunk_rows)
+        self._tombstones += int(np.count_nonzero(self.assign[rows] >= 0))
+        self.assign[rows] = labels
+
+    def add(self, row: int, vector: np.ndarray):
+        """加入或更新一行 (簇改变时旧倒排表中留下墓碑)"""
+        self._reserve_rows(row + 1)
+        label = int(np.argmax(self.centroids @ vector))
+        previous = self.assign[row]
+        if previous == label:
+            return
+        if previous >= 0:
+            self._tombstones += 1
+        self._append(label, np.array([row], dtype=np.int32))
+        self.assign[row] = label
+
+    def remove(self, row: int):
+        """删除一行 (墓碑)"""
+        if row < self.assign.shape[0] and self.assign[row] >= 0:
+            self.assign[row] = -1
+            self._tombstones += 1
+
+    def compact(self):
+        """清除倒排表中的墓碑"""
+        for list_id in range(self.nlist):
+            entries = self._lists[list_id][:self._sizes[list_id]]
+            live = entries[self.assign[entries] == list_id]
+            self._lists[list_id] = live.copy() if live.shape[0] else np.empty(16, dtype=np.int32)
+            self._sizes[list_id] = live.shape[0]
+        self._entries = int(self._sizes.sum())
+        self._tombstones = 0
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """与 query 最相近的 nprobe 个簇中的有效行号"""
+        if self.tombstone_ratio > COMPACT_RATIO:
+            self.compact()
+        nprobe = min(nprobe, self.nlist)
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        chunks = []
+        for list_id in probes:
+            entries = self._lists[list_id][:self._sizes[list_id]]
+            chunks.append(entries[self.assign[entries] == list_id])
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+
+    def state(self) -> dict:
+        """用于快照的数组 (先压缩，倒排表拼接为一个数组)"""
+        self.compact()
+        return {
+            'centroids': self.centroids,
+            'assign': self.assign,
+            'list_sizes': self._sizes,
+            'list_rows': np.concatenate([self._lists[i][:self._sizes[i]] for i in range(self.nlist)]),
+            'trained_rows': np.array([self.trained_rows]),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'IVFIndex':
+        index = cls(state['centroids'])
+        index.assign = np.array(state['assign'], dtype=np.int32)
+        index.trained_rows = int(state['trained_rows'][0])
+        offsets = np.concatenate([[0], np.cumsum(state['list_sizes'])])
+        for list_id in range(index.nlist):
+            rows = np.array(state['list_rows'][offsets[list_id]:offsets[list_id + 1]], dtype=np.int32)
+            index._lists[list_id] = rows if rows.shape[0] else np.empty(16, dtype=np.int32)
+            index._sizes[list_id] = rows.shape[0]
+        index._entries = int(index._sizes.sum())
+        return index
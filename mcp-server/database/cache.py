@@ -0,0 +1,375 @@
+"""
+进程内待办缓存
+单个用户的待办集合很小，且只会通过本服务的工具修改，
+因此把整个待办集合常驻内存，list_pending 和待办模糊搜索无需访问数据库
+
+- 写穿透: create_memo / create_memos_bulk / complete_memo / batch_complete / clear_memos 提交后同步更新缓存
+  (在 UnitOfWork 事务中时推迟到提交之后，回滚则不更新，见 unit_of_work.after_commit)
+- 内存上限: 超过 MEMO_CACHE_MAX_BYTES 时整体放弃缓存，读请求回落到数据库；
+  之后每隔 OVERFLOW_RETRY_SECONDS 按待办数量估算一次，重新放得下时再加载
+- 可选持久化: 设置 MEMO_CACHE_PATH 后关闭连接池时写入快照，重启后校验指纹即可热启动
+- 多实例一致性: 订阅 memo_changes 变更事件 (apply_change)，其他实例的写入会使缓存失效
+"""
+
+import functools
+import os
+import pickle
+import sys
+import time
+from typing import List, Optional
+
+from .config import CACHE_MAX_BYTES, CACHE_PATH
+from .cursor import decode_cursor
+from .models import Memo
+from .queries import PRIORITY_RANK
+from .unit_of_work import after_commit
+
+# 超过内存上限后，至少间隔这么久才再估算一次待办集合的大小 (放得下时重新加载)
+OVERFLOW_RETRY_SECONDS = 30
+
+
+def _estimate_size(memo: dict) -> int:
+    """粗略估算一条备忘录占用的内存字节数"""
+    return sys.getsizeof(memo) + sum(sys.getsizeof(value) for value in memo.values())
+
+
+def _due_position(due, memo_id) -> tuple:
+    """同一优先级内的排序位置: when_due ASC (NULL 排最后), id"""
+    return (due is None, due.timestamp() if due else 0, str(memo_id))
+
+
+def _priority_rank(memo: dict) -> int:
+    """与 priority_rank 生成列一致 (旧快照中的备忘录没有该列，按 priority 计算)"""
+    return PRIORITY_RANK.get(memo.get('priority'), 0)
+
+
+def _pending_sort_key(memo: dict):
+    """与 get_pending_memos 的 ORDER BY priority_rank DESC, when_due ASC (NULLS LAST), id 一致"""
+    return (-_priority_rank(memo),) + _due_position(memo.get('when_due'), memo['id'])
+
+
+def _after_pending(memo: dict, key: list) -> bool:
+    """memo 是否排在游标 (priority_rank, when_due, id) 之后"""
+    rank, due, memo_id = key
+    return _pending_sort_key(memo) > (-rank,) + _due_position(due, memo_id)
+
+
+def _created_position(memo: dict) -> tuple:
+    """fuzzy_search_memos 默认模式的排序位置: created_at DESC, id DESC"""
+    return (memo['created_at'], str(memo['id']))
+
+
+class PendingMemoCache:
+    """待办集合缓存 (id -> memo dict)"""
+
+    def __init__(self, max_bytes: int, path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.backend = None
+        self.complete = False      # 是否持有完整的待办集合
+        self.overflowed = False    # 待办集合超过内存上限，放弃整体缓存
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._sizes = {}
+        self._bytes = 0
+        self._memo_bytes = 0.0     # 溢出时每条备忘录的平均估算大小
+        self._retry_at = 0.0       # 溢出后下次估算的时刻 (time.monotonic)
+        self._snapshot_fingerprint = None  # 从磁盘恢复的快照指纹，首次使用前校验
+
+    def bind(self, backend):
+        """绑定存储后端模块 (queries / sqlite_queries)，用于加载快照"""
+        self.backend = backend
+
+    @property
+    def ready(self) -> bool:
+        """缓存是否可以直接回答待办查询"""
+        return self.complete and self._snapshot_fingerprint is None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+        self.complete = False
+        self._snapshot_fingerprint = None
+
+    def invalidate(self):
+        """丢弃全部缓存，下次读取时重新从数据库加载 (已溢出时仍按估算决定是否加载)"""
+        self.clear()
+
+    def load(self, memos: List[dict]):
+        """用完整的待办集合替换缓存内容 (超过内存上限时整体放弃)"""
+        self.clear()
+        for memo in memos:
+            self._insert(memo)
+            if self._bytes > self.max_bytes:
+                self._overflow()
+                return
+        self.overflowed = False
+        self.complete = True
+
+    def _overflow(self):
+        """超过内存上限: 记下平均大小供之后估算，清空缓存"""
+        self._memo_bytes = self._bytes / max(len(self._entries), 1)
+        self.clear()
+        self.overflowed = True
+        self._retry_at = time.monotonic() + OVERFLOW_RETRY_SECONDS
+
+    def put(self, memo: dict):
+        """写穿透: 新建/更新的备忘录 (非待办状态则移出缓存)"""
+        if memo.get('status', 'pending') != 'pending':
+            self.discard(memo['id'])
+            return
+        if not self.complete:
+            # 不完整的缓存不回答查询，下次加载时会读到这一条
+            return
+        self._insert(memo)
+        if self._bytes > self.max_bytes:
+            self._overflow()
+
+    def discard(self, memo_id):
+        key = str(memo_id)
+        if key in self._entries:
+            del self._entries[key]
+            self._bytes -= self._sizes.pop(key)
+
+    def _insert(self, memo: dict):
+        # 缓存只保存摘要列的普通 dict (Memo 包装的行不可 pickle，大字段不进缓存)
+        memo = {k: memo[k] for k in memo.keys() if k not in Memo.HEAVY_FIELDS}
+        key = str(memo['id'])
+        self.discard(key)
+
+        size = _estimate_size(memo)
+        self._entries[key] = memo
+        self._sizes[key] = size
+        self._bytes += size
+
+    def apply_change(self, event: dict):
+        """
+        处理 memo_changes 变更事件 (见 connection.subscribe)
+
+        本实例的写入已经写穿透到缓存，版本号不会比缓存中的新，直接忽略；
+        其他实例新增或修改待办时载荷不含完整内容，整体失效后下次读取重新加载
+        """
+        op = event.get('op')
+        if op == 'RESET':
+            self.invalidate()
+            self.overflowed = False
+            return
+
+        memo_id = str(event.get('id'))
+        if op == 'DELETE' or event.get('status') != 'pending':
+            self.discard(memo_id)
+            return
+
+        cached = self._entries.get(memo_id)
+        if cached is not None and cached.get('version', 0) >= event.get('version', 0):
+            return
+        self.invalidate()
+
+    def list_pending(
+        self,
+        limit: int = 20,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> List[dict]:
+        """按 get_pending_memos 的顺序返回待办 (调用前需确认 ready)"""
+        memos = [m for m in self._entries.values() if not category or m.get('category') == category]
+        if cursor:
+            key = decode_cursor(cursor, 'pending')
+            memos = [m for m in memos if _after_pending(m, key)]
+        memos.sort(key=_pending_sort_key)
+        return [dict(m) for m in memos[:limit]]
+
+    def fuzzy(self, keywords: List[str], limit: int = 20, cursor: Optional[str] = None) -> List[dict]:
+        """与 fuzzy_search_memos 默认模式一致: 每个关键词都出现在 what 或 who 中"""
+        keywords = [k.lower() for k in keywords if k]
+        if not keywords:
+            return []
+        created_at, memo_id = decode_cursor(cursor, 'fuzzy') if cursor else (None, None)
+
+        matched = []
+        for memo in self._entries.values():
+            text = f"{memo['what']} {memo.get('who') or ''}".lower()
+            if all(k in text for k in keywords):
+                if cursor and _created_position(memo) >= (created_at, str(memo_id)):
+                    continue
+                matched.append(memo)
+        matched.sort(key=_created_position, reverse=True)
+        return [dict(m) for m in matched[:limit]]
+
+    def fingerprint(self) -> tuple:
+        """与 get_pending_fingerprint 相同口径的指纹 (数量, 最近更新时间)"""
+        updated = [m['updated_at'] for m in self._entries.values() if m.get('updated_at')]
+        return (len(self._entries), max(updated) if updated else None)
+
+    async def ensure_loaded(self, conn) -> bool:
+        """
+        确保缓存持有完整待办集合
+
+        Returns:
+            bool: True 表示可以直接用缓存回答
+        """
+        if self.ready:
+            return True
+        if self.backend is None:
+            return False
+        if self.overflowed:
+            # 按溢出时的平均大小估算当前待办集合，仍放不下则继续回落到数据库
+            if time.monotonic() < self._retry_at:
+                return False
+            count, _ = await self.backend.get_pending_fingerprint(conn)
+            if count * self._memo_bytes > self.max_bytes:
+                self._retry_at = time.monotonic() + OVERFLOW_RETRY_SECONDS
+                return False
+
+        if self.complete and self._snapshot_fingerprint is not None:
+            # 磁盘快照: 指纹一致则直接热启动
+            current = await self.backend.get_pending_fingerprint(conn)
+            if tuple(current) == tuple(self._snapshot_fingerprint):
+                self._snapshot_fingerprint = None
+                return True
+
+        self.load(await self.backend.get_pending_snapshot(conn))
+        return self.ready
+
+    def save(self):
+        """写入磁盘快照 (原子替换)"""
+        if not self.path or not self.ready:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({
+                'fingerprint': self.fingerprint(),
+                'memos': list(self._entries.values())
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def restore(self):
+        """从磁盘快照恢复 (首次使用前仍会校验指纹)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        self.load(snapshot['memos'])
+        if self.complete:
+            self._snapshot_fingerprint = snapshot['fingerprint']
+
+
+pending_cache = PendingMemoCache(CACHE_MAX_BYTES, CACHE_PATH)
+
+
+def write_through_create(fn):
+    """create_memo: 新备忘录写入缓存"""
+    @functools.wraps(fn)
+    async def wrapper(conn, *args, **kwargs):
+        row = await fn(conn, *args, **kwargs)
+        if row:
+            after_commit(conn, lambda: pending_cache.put(row))
+        return row
+    return wrapper
+
+
+def write_through_create_bulk(fn):
+    """create_memos_bulk: 整批写入缓存"""
+    @functools.wraps(fn)
+    async def wrapper(conn, memos, *args, **kwargs):
+        rows = await fn(conn, memos, *args, **kwargs)
+
+        def apply():
+            for row in rows:
+                pending_cache.put(row)
+        after_commit(conn, apply)
+        return rows
+    return wrapper
+
+
+def write_through_complete(fn):
+    """complete_memo: 已完成的备忘录移出缓存"""
+    @functools.wraps(fn)
+    async def wrapper(conn, memo_id, *args, **kwargs):
+        row = await fn(conn, memo_id, *args, **kwargs)
+        if row:
+            after_commit(conn, lambda: pending_cache.discard(row['id']))
+        return row
+    return wrapper
+
+
+def write_through_resolve_complete(fn):
+    """resolve_complete_memo: 已完成的那一条移出缓存"""
+    @functools.wraps(fn)
+    async def wrapper(conn, *args, **kwargs):
+        completed, candidates = await fn(conn, *args, **kwargs)
+        if completed:
+            after_commit(conn, lambda: pending_cache.discard(completed['id']))
+        return completed, candidates
+    return wrapper
+
+
+def write_through_batch_complete(fn):
+    """batch_complete: 批量移出缓存"""
+    @functools.wraps(fn)
+    async def wrapper(conn, memo_ids, *args, **kwargs):
+        count = await fn(conn, memo_ids, *args, **kwargs)
+
+        def apply():
+            for memo_id in memo_ids:
+                pending_cache.discard(memo_id)
+        after_commit(conn, apply)
+        return count
+    return wrapper
+
+
+def write_through_clear(fn):
+    """clear_memos: 按返回的 ID 移出缓存"""
+    @functools.wraps(fn)
+    async def wrapper(conn, *args, **kwargs):
+        memo_ids = await fn(conn, *args, **kwargs)
+
+        def apply():
+            for memo_id in memo_ids:
+                pending_cache.discard(memo_id)
+        after_commit(conn, apply)
+        return memo_ids
+    return wrapper
+
+
+def read_through_pending(fn):
+    """get_pending_memos: 缓存完整时不访问数据库"""
+    @functools.wraps(fn)
+    async def wrapper(conn, limit: int = 20, category: Optional[str] = None, cursor: Optional[str] = None):
+        if await pending_cache.ensure_loaded(conn):
+            pending_cache.hits += 1
+            return pending_cache.list_pending(limit, category, cursor)
+        pending_cache.misses += 1
+        return await fn(conn, limit, category, cursor)
+    return wrapper
+
+
+def read_through_fuzzy(fn):
+    """fuzzy_search_memos: 待办范围内的默认模式搜索直接在缓存中完成"""
+    @functools.wraps(fn)
+    async def wrapper(
+        conn,
+        keywords,
+        status: str = "pending",
+        limit: int = 20,
+        ranked: bool = False,
+        cursor: Optional[str] = None
+    ):
+        if status == "pending" and not ranked and keywords and await pending_cache.ensure_loaded(conn):
+            pending_cache.hits += 1
+            return pending_cache.fuzzy(keywords, limit, cursor)
+        pending_cache.misses += 1
+        return await fn(conn, keywords, status, limit, ranked, cursor)
+    return wrapper
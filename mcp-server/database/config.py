@@ -0,0 +1,93 @@
+"""
+存储后端配置
+优先读取环境变量，其次读取项目根目录的 supabase_config/config.py
+
+MEMO_STORAGE_BACKEND:
+    postgres - Supabase PostgreSQL (默认，asyncpg 连接池)
+    sqlite   - 本地嵌入式 SQLite (WAL + FTS5)，适合单用户/离线/测试
+"""
+
+import os
+import sys
+
+# 添加项目根目录到路径 (mcp-server 的上一级)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+STORAGE_BACKEND = os.getenv("MEMO_STORAGE_BACKEND", "postgres").lower()
+
+# SQLite 数据库文件路径 (":memory:" 表示纯内存库)
+SQLITE_PATH = os.getenv("MEMO_SQLITE_PATH", os.path.join(project_root, "memos.db"))
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL and STORAGE_BACKEND == "postgres":
+    try:
+        from supabase_config.config import DATABASE_URL
+    except ImportError:
+        pass
+
+if STORAGE_BACKEND not in ("postgres", "sqlite"):
+    raise ValueError(f"Unknown MEMO_STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+# 进程内待办缓存 (见 cache.py)
+CACHE_ENABLED = os.getenv("MEMO_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_BYTES = int(os.getenv("MEMO_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+# 缓存快照文件 (可选)，设置后服务重启可直接热启动
+CACHE_PATH = os.getenv("MEMO_CACHE_PATH")
+
+# 连接池 (见 pools.py)
+# MEMO_POOL_PROFILE:
+#     direct    - 直连 5432 端口，预编译热点语句 (默认)
+#     pgbouncer - 经 Supabase 池化端口 6543 (PgBouncer 事务模式)，关闭语句缓存与预编译
+POOL_PROFILE = os.getenv("MEMO_POOL_PROFILE", "direct").lower()
+if POOL_PROFILE not in ("direct", "pgbouncer"):
+    raise ValueError(f"Unknown MEMO_POOL_PROFILE: {POOL_PROFILE}")
+
+
+def _pool_size(name: str, default: str) -> tuple:
+    """读取 "最小:最大" 格式的连接数"""
+    value = os.getenv(name, default)
+    try:
+        min_size, max_size = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise ValueError(f"{name} must look like 'min:max', got {value!r}") from None
+    if not 0 <= min_size <= max_size or max_size == 0:
+        raise ValueError(f"{name} must satisfy 0 <= min <= max and max > 0, got {value!r}")
+    return min_size, max_size
+
+
+# 各命名连接池的连接数: 交互式工具调用 / 报告与批量导入等后台任务，两者互不抢占
+POOL_SIZES = {
+    "interactive": _pool_size("MEMO_POOL_INTERACTIVE_SIZE", "2:10"),
+    "batch": _pool_size("MEMO_POOL_BATCH_SIZE", "0:3"),
+}
+# 空闲超过该秒数的连接被关闭 (不低于最小连接数)，执行超过 POOL_MAX_QUERIES 次查询的连接被替换
+POOL_IDLE_SECONDS = float(os.getenv("MEMO_POOL_IDLE_SECONDS", "300"))
+POOL_MAX_QUERIES = int(os.getenv("MEMO_POOL_MAX_QUERIES", "50000"))
+# 健康检查间隔 (秒)，0 表示不检查
+POOL_HEALTH_SECONDS = float(os.getenv("MEMO_POOL_HEALTH_SECONDS", "30"))
+
+# 多实例缓存一致性: 监听 PostgreSQL memo_changes 频道 (migrations/004)
+LISTEN_ENABLED = os.getenv("MEMO_LISTEN_ENABLED", "true").lower() in ("1", "true", "yes")
+NOTIFY_CHANNEL = "memo_changes"
+# LISTEN 需要会话级连接，PgBouncer 事务模式下不可用，需另给一个直连地址 (默认同 DATABASE_URL)
+LISTEN_DATABASE_URL = os.getenv("MEMO_LISTEN_DATABASE_URL") or (DATABASE_URL if POOL_PROFILE == "direct" else None)
+
+# 人名词典 (见 tools/people.py): 别名文件 (JSON: {"人名": ["别名", ...]}) 与增量刷新间隔
+PEOPLE_ALIASES_PATH = os.getenv("MEMO_PEOPLE_ALIASES")
+PEOPLE_REFRESH_SECONDS = float(os.getenv("MEMO_PEOPLE_REFRESH_SECONDS", "300"))
+
+# 本地语义索引 (见 semantic.py) 的向量维度
+SEMANTIC_DIM = int(os.getenv("MEMO_SEMANTIC_DIM", "256"))
+# 行数达到该值后改用 IVF 近似最近邻索引 (见 ann.py)，每次查询扫描 SEMANTIC_NPROBE 个簇
+SEMANTIC_ANN_MIN_ROWS = int(os.getenv("MEMO_SEMANTIC_ANN_MIN_ROWS", "50000"))
+SEMANTIC_NPROBE = int(os.getenv("MEMO_SEMANTIC_NPROBE", "16"))
+# 语义索引快照目录 (可选)，设置后服务重启时以内存映射加载，不必重新计算全部向量
+SEMANTIC_PATH = os.getenv("MEMO_SEMANTIC_PATH")
+
+# 慢查询日志 (见 slow_queries.py): 超过阈值 (ms) 的语句记录日志 (参数脱敏)，0 表示关闭
+SLOW_QUERY_MS = float(os.getenv("MEMO_SLOW_QUERY_MS", "200"))
+# 慢查询中按该比例 (0-1) 抽样执行 EXPLAIN (ANALYZE, BUFFERS)，计划以 JSON 文件保存到 SLOW_QUERY_DIR
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("MEMO_SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+SLOW_QUERY_DIR = os.getenv("MEMO_SLOW_QUERY_DIR")
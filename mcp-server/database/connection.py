@@ -2,47 +2,74 @@
 Supabase PostgreSQL 连接池配置
 使用 asyncpg 实现高性能异步数据库连接
 
-重要: 使用直连端口 (5432) 而非 Supabase 池化端口 (6543)
-asyncpg 与 Supabase PgBouncer 不兼容
+默认使用直连端口 (5432)；经 Supabase 池化端口 (6543, PgBouncer 事务模式) 连接时
+设置 MEMO_POOL_PROFILE=pgbouncer，关闭语句缓存与预编译 (见 pools.py)
+
+MEMO_STORAGE_BACKEND=sqlite 时改用本地嵌入式 SQLite (见 sqlite_backend.py)，
+返回的连接池对象接口与 asyncpg.Pool 一致，工具层无需区分
+
+连接池按用途命名 (interactive / batch)，由 pools.PoolManager 分别创建和维护
+
+预编译语句: 每个新连接通过 init 钩子注册 JSON 编解码并预编译 statements.py 中登记的热点语句
+
+变更通知: PostgreSQL 后端额外维护一条专用的 LISTEN 连接，
+将 memo_changes 频道的事件分发给进程内订阅者 (例如待办缓存)
 """
 
+import asyncio
+import json
+import logging
+
 import asyncpg
-import os
-import sys
 
-# 添加项目根目录到路径
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
+from .config import (
+    STORAGE_BACKEND,
+    LISTEN_ENABLED,
+    LISTEN_DATABASE_URL,
+    NOTIFY_CHANNEL
+)
+from .pools import pool_manager
 
-from supabase.config import DATABASE_URL
+logger = logging.getLogger(__name__)
 
-_pool = None
+_listener = None
+_subscribers = []
 
-async def get_pool():
+async def get_pool(name: str = "interactive"):
     """
-    获取数据库连接池 (单例模式)
+    获取数据库连接池 (每个名字一个单例)
     第一次调用时创建连接池，后续调用复用
 
+    Args:
+        name: interactive (工具调用，默认) 或 batch (报告、批量导入等后台任务)
+
     Returns:
-        asyncpg.Pool: 数据库连接池
+        asyncpg.Pool | SQLitePool: 数据库连接池
     """
-    global _pool
-    if _pool is None:
-        _pool = await asyncpg.create_pool(
-            DATABASE_URL,
-            min_size=2,
-            max_size=10,
-            command_timeout=60,
-            timeout=30
-        )
-    return _pool
+    first = not pool_manager.active
+    pool = await pool_manager.get(name)
+    if first and STORAGE_BACKEND != "sqlite" and LISTEN_ENABLED:
+        if LISTEN_DATABASE_URL is None:
+            logger.warning("PgBouncer 事务模式不支持 LISTEN，未设置 MEMO_LISTEN_DATABASE_URL，跨实例变更通知已停用")
+        else:
+            try:
+                await start_listener()
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("变更监听启动失败，后台重试: %s", e)
+                asyncio.get_running_loop().create_task(_reconnect_listener())
+    return pool
 
 async def close_pool():
-    """关闭数据库连接池"""
-    global _pool
-    if _pool:
-        await _pool.close()
-        _pool = None
+    """关闭全部数据库连接池 (同时写入待办缓存与语义索引快照)"""
+    from .cache import pending_cache
+    from .semantic import semantic_index, SEMANTIC_AVAILABLE
+    from .slow_queries import slow_query_log
+    await slow_query_log.close()
+    pending_cache.save()
+    if SEMANTIC_AVAILABLE:
+        semantic_index.save()
+    await stop_listener()
+    await pool_manager.close()
 
 async def get_connection():
     """
@@ -54,3 +81,80 @@ async def get_connection():
     """
     pool = await get_pool()
     return await pool.acquire()
+
+
+def subscribe(callback):
+    """
+    订阅备忘录变更事件
+
+    Args:
+        callback: callback(event: dict)，event 形如
+            {"op": "INSERT|UPDATE|DELETE", "id": ..., "status": ..., "version": n}
+            监听连接断开/重连时会收到 {"op": "RESET"}，表示期间可能丢失事件
+    """
+    _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    """取消订阅"""
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def _dispatch(event: dict):
+    for callback in list(_subscribers):
+        try:
+            callback(event)
+        except Exception:
+            logger.exception("变更事件处理失败: %s", event)
+
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        logger.warning("无法解析变更事件: %s", payload)
+        return
+    _dispatch(event)
+
+
+def _on_terminate(connection):
+    # 连接断开期间的事件会丢失，先让订阅者重置状态，再后台重连
+    global _listener
+    _listener = None
+    _dispatch({"op": "RESET"})
+    asyncio.get_event_loop().create_task(_reconnect_listener())
+
+
+async def start_listener():
+    """建立专用的 LISTEN 连接 (不占用连接池)"""
+    global _listener
+    if _listener is not None:
+        return
+    conn = await asyncpg.connect(LISTEN_DATABASE_URL)
+    await conn.add_listener(NOTIFY_CHANNEL, _on_notify)
+    conn.add_termination_listener(_on_terminate)
+    _listener = conn
+
+
+async def stop_listener():
+    """关闭 LISTEN 连接"""
+    global _listener
+    conn, _listener = _listener, None
+    if conn is not None:
+        conn.remove_termination_listener(_on_terminate)
+        await conn.close()
+
+
+async def _reconnect_listener():
+    """指数退避重连，成功后再次通知订阅者重置"""
+    delay = 1
+    while pool_manager.active and _listener is None:
+        try:
+            await start_listener()
+            _dispatch({"op": "RESET"})
+            return
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("变更监听重连失败 (%ss 后重试): %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
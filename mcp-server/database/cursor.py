@@ -0,0 +1,69 @@
+"""
+分页游标
+游标是不透明的字符串，内容为上一页最后一行的排序键 (base64url 编码的 JSON)，
+下一页从该键之后继续 (keyset 分页)，翻到多深每页的代价都相同
+"""
+
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import List
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析，或与当前查询类型不符"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'t': value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 't' in value:
+        return datetime.fromisoformat(value['t'])
+    return value
+
+
+def encode_cursor(kind: str, key: List) -> str:
+    """
+    生成游标
+
+    Args:
+        kind: 查询类型 ('pending' / 'search' / 'fuzzy' / 'fuzzy_ranked' / 'hybrid' / 'semantic')
+        key: 上一页最后一行的排序键
+    """
+    payload = json.dumps([kind, [_encode_value(v) for v in key]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def cursor_kind(token: str) -> str:
+    """游标对应的查询类型"""
+    return _decode(token)[0]
+
+
+def decode_cursor(token: str, kind: str) -> List:
+    """
+    解析游标，返回排序键
+
+    Raises:
+        InvalidCursor: 游标损坏或不是 kind 类型的游标
+    """
+    token_kind, key = _decode(token)
+    if token_kind != kind:
+        raise InvalidCursor(f"Cursor is for '{token_kind}', not '{kind}'")
+    return key
+
+
+def _decode(token: str):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        kind, key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return kind, [_decode_value(v) for v in key]
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
@@ -4,47 +4,87 @@
 
 from datetime import datetime
 from typing import Optional, List
-from dataclasses import dataclass
-import uuid
 
 
-@dataclass
 class Memo:
-    """备忘录数据模型"""
-    id: str
-    what: str
-    when_due: Optional[datetime]
-    who: Optional[str]
-    status: str = "pending"
-    priority: str = "normal"
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
-    tags: Optional[List[str]] = None
-    context: Optional[str] = None
-    category: Optional[str] = None
-    metadata: Optional[dict] = None
+    """
+    备忘录数据模型
+
+    直接包装查询返回的行 (asyncpg.Record / sqlite3.Row / dict)，不复制行数据。
+    列表、搜索类查询只投影摘要列 (见 queries.MEMO_SUMMARY_COLUMNS)，
+    context / metadata 等大字段首次使用前通过 await memo.load_details(conn) 按需加载。
+
+    兼容 dict 风格访问: memo['what']、memo.get('who')、dict(memo)
+    """
+
+    __slots__ = ('_row', '_fields')
+
+    FIELDS = (
+        'id', 'what', 'when_due', 'who', 'status', 'priority', 'priority_rank',
+        'created_at', 'updated_at', 'completed_at', 'tags', 'context',
+        'category', 'metadata', 'version'
+    )
+    # 不在摘要投影中的大字段
+    HEAVY_FIELDS = ('context', 'metadata')
+
+    def __init__(self, row=None, **fields):
+        """
+        Args:
+            row: 查询返回的行，可为 None
+            fields: 覆盖或补充行中的字段 (例如新建备忘录时直接传入各字段)
+        """
+        self._row = row
+        self._fields = fields
 
     @classmethod
     def from_row(cls, row):
         """从数据库行创建 Memo 对象"""
         if not row:
             return None
-        return cls(
-            id=str(row['id']),
-            what=row['what'],
-            when_due=row['when_due'],
-            who=row['who'],
-            status=row['status'],
-            priority=row['priority'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at'],
-            completed_at=row['completed_at'],
-            tags=row['tags'],
-            context=row['context'],
-            category=row['category'],
-            metadata=row['metadata']
-        )
+        if isinstance(row, cls):
+            return row
+        return cls(row)
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return self._fields[key]
+        if self._row is None:
+            raise KeyError(key)
+        try:
+            return self._row[key]
+        except IndexError:
+            # sqlite3.Row 对不存在的列抛出 IndexError
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        keys = list(self._row.keys()) if self._row is not None else []
+        return keys + [k for k in self._fields if k not in keys]
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __setitem__(self, key, value):
+        self._fields[key] = value
+
+    @property
+    def loaded(self) -> bool:
+        """大字段是否已可访问"""
+        return all(field in self for field in self.HEAVY_FIELDS)
+
+    async def load_details(self, conn) -> 'Memo':
+        """按需加载 context / metadata (已加载时不访问数据库)"""
+        if not self.loaded:
+            from . import get_memo_details
+            row = await get_memo_details(conn, self['id'])
+            for field in self.HEAVY_FIELDS:
+                self._fields[field] = row[field] if row else None
+        return self
 
     async def create(self, conn):
         """创建新备忘录"""
@@ -54,11 +94,11 @@ class Memo:
             what=self.what,
             when_due=self.when_due,
             who=self.who,
-            priority=self.priority,
+            priority=self.priority or "normal",
             tags=self.tags,
-            context=self.context,
+            context=self.get('context'),
             category=self.category,
-            metadata=self.metadata
+            metadata=self.get('metadata')
         )
 
     async def update_status(self, conn, new_status: str):
@@ -74,9 +114,9 @@ class Memo:
         """, new_status, self.completed_at, self.id)
 
     def to_dict(self):
-        """转换为字典"""
-        return {
-            'id': self.id,
+        """转换为字典 (未加载的大字段不输出)"""
+        result = {
+            'id': str(self.id) if self.id is not None else None,
             'what': self.what,
             'when_due': self.when_due.isoformat() if self.when_due else None,
             'who': self.who,
@@ -85,9 +125,32 @@ class Memo:
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'tags': self.tags,
-            'context': self.context,
             'category': self.category
         }
+        if 'context' in self:
+            result['context'] = self['context']
+        return result
 
     def __repr__(self):
-        return f"Memo(id={self.id[:8]}..., what={self.what[:20]}..., status={self.status})"
+        return f"Memo(id={str(self.id)[:8]}..., what={(self.what or '')[:20]}..., status={self.status})"
+
+
+def _field_property(name: str, heavy: bool):
+    def getter(self: Memo):
+        try:
+            return self[name]
+        except KeyError:
+            if heavy:
+                raise AttributeError(
+                    f"Memo.{name} 未加载，先调用 await memo.load_details(conn)"
+                ) from None
+            return None
+
+    def setter(self: Memo, value):
+        self._fields[name] = value
+
+    return property(getter, setter)
+
+
+for _name in Memo.FIELDS:
+    setattr(Memo, _name, _field_property(_name, _name in Memo.HEAVY_FIELDS))
@@ -0,0 +1,149 @@
+"""
+命名连接池管理
+交互式工具调用与报告、批量导入等后台任务使用各自的连接池 (POOL_SIZES)，
+后台任务占满自己的连接池时不影响交互式调用
+
+- 连接建立时由 statements.init_connection 注册编解码并预编译热点语句 (预热)
+- 空闲连接超过 POOL_IDLE_SECONDS 关闭，执行超过 POOL_MAX_QUERIES 次查询后替换
+- 后台任务每 POOL_HEALTH_SECONDS 检查一次各连接池，失败时让现有连接全部过期重建
+- pgbouncer 配置 (MEMO_POOL_PROFILE=pgbouncer): 事务模式下同一会话的语句可能落在不同的服务端连接上，
+  关闭 asyncpg 语句缓存 (也就不再预编译)，每次查询使用未命名语句
+
+SQLite 后端只有一个连接，所有名字共用同一个 SQLitePool
+"""
+
+import asyncio
+import logging
+from typing import Dict
+
+import asyncpg
+
+from .config import (
+    STORAGE_BACKEND,
+    DATABASE_URL,
+    SQLITE_PATH,
+    POOL_PROFILE,
+    POOL_SIZES,
+    POOL_IDLE_SECONDS,
+    POOL_MAX_QUERIES,
+    POOL_HEALTH_SECONDS
+)
+from .statements import MemoConnection, init_connection
+
+logger = logging.getLogger(__name__)
+
+# 健康检查等待连接与执行查询的超时 (秒)
+HEALTH_CHECK_TIMEOUT = 5
+
+
+def pool_options(name: str) -> dict:
+    """名为 name 的连接池的 asyncpg.create_pool 参数"""
+    if name not in POOL_SIZES:
+        raise ValueError(f"Unknown pool: {name} (expected one of {', '.join(POOL_SIZES)})")
+    min_size, max_size = POOL_SIZES[name]
+    options = {
+        'min_size': min_size,
+        'max_size': max_size,
+        'max_queries': POOL_MAX_QUERIES,
+        'max_inactive_connection_lifetime': POOL_IDLE_SECONDS,
+        'command_timeout': 60,
+        'timeout': 30,
+        'init': init_connection,
+        'connection_class': MemoConnection
+    }
+    if POOL_PROFILE == "pgbouncer":
+        options['statement_cache_size'] = 0
+    return options
+
+
+class PoolManager:
+    """按名字创建并维护连接池"""
+
+    def __init__(self):
+        self._pools: Dict[str, object] = {}
+        self._lock = asyncio.Lock()
+        self._health_task = None
+
+    def __contains__(self, name: str):
+        return name in self._pools
+
+    @property
+    def active(self) -> bool:
+        return bool(self._pools)
+
+    async def get(self, name: str = "interactive"):
+        """获取连接池 (首次使用时创建)"""
+        pool = self._pools.get(name)
+        if pool is not None:
+            return pool
+
+        async with self._lock:
+            pool = self._pools.get(name)
+            if pool is None:
+                pool = await self._create(name)
+                self._pools[name] = pool
+                self._start_health_checks()
+        return pool
+
+    async def _create(self, name: str):
+        if STORAGE_BACKEND == "sqlite":
+            if self._pools:
+                return next(iter(self._pools.values()))
+            from .sqlite_backend import SQLitePool
+            return SQLitePool(SQLITE_PATH)
+        return await asyncpg.create_pool(DATABASE_URL, **pool_options(name))
+
+    def _start_health_checks(self):
+        if STORAGE_BACKEND == "sqlite" or POOL_HEALTH_SECONDS <= 0 or self._health_task is not None:
+            return
+        self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(POOL_HEALTH_SECONDS)
+            await self.check_health()
+
+    async def check_health(self) -> Dict[str, bool]:
+        """
+        每个连接池取一个空闲连接执行 SELECT 1；失败的连接池让现有连接全部过期，之后按需重建
+        没有空闲连接的连接池 (全部在用或尚未建立连接) 跳过，不为检查新建连接或与调用方争抢
+        """
+        results = {}
+        for name, pool in list(self._pools.items()):
+            if STORAGE_BACKEND == "sqlite" or pool.get_idle_size() == 0:
+                results[name] = True
+                continue
+            try:
+                async with pool.acquire(timeout=HEALTH_CHECK_TIMEOUT) as conn:
+                    await conn.fetchval("SELECT 1", timeout=HEALTH_CHECK_TIMEOUT)
+                results[name] = True
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("连接池 %s 健康检查失败，重建连接: %s", name, e)
+                await pool.expire_connections()
+                results[name] = False
+        return results
+
+    def stats(self) -> Dict[str, dict]:
+        """各连接池的当前连接数与空闲连接数"""
+        stats = {}
+        for name, pool in self._pools.items():
+            if STORAGE_BACKEND == "sqlite":
+                stats[name] = {'size': 1, 'idle': 0 if pool._lock.locked() else 1, 'max_size': 1}
+            else:
+                stats[name] = {'size': pool.get_size(), 'idle': pool.get_idle_size(), 'max_size': pool.get_max_size()}
+        return stats
+
+    async def close(self):
+        """停止健康检查并关闭全部连接池"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        pools, self._pools = self._pools, {}
+        closed = set()
+        for pool in pools.values():
+            if id(pool) not in closed:
+                closed.add(id(pool))
+                await pool.close()
+
+
+pool_manager = PoolManager()
@@ -1,12 +1,30 @@
 """
 数据库查询封装
-所有 SQL 操作都在这里定义
+所有 SQL 操作都在这里定义，并通过 statements.statement() 登记到语句注册表
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
+import json
 import uuid
 
+from .cursor import encode_cursor, decode_cursor
+from .models import Memo
+from .statements import statement
+
+
+# 列表、搜索、清算预览等只展示摘要的查询统一投影这些列，
+# 不传输 context / metadata 大字段 (需要时由 Memo.load_details 按需加载)
+MEMO_SUMMARY_FIELDS = tuple(f for f in Memo.FIELDS if f not in Memo.HEAVY_FIELDS)
+MEMO_SUMMARY_COLUMNS = ", ".join(MEMO_SUMMARY_FIELDS)
+
+
+CREATE_MEMO = statement("memos.create", """
+    INSERT INTO memos (id, what, when_due, who, priority, tags, context, category, metadata)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+    RETURNING *
+""")
+
 
 async def create_memo(
     conn,
@@ -22,174 +40,669 @@ async def create_memo(
     """创建新备忘录"""
     memo_id = uuid.uuid4()
 
-    row = await conn.fetchrow("""
-        INSERT INTO memos (id, what, when_due, who, priority, tags, context, category, metadata)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-        RETURNING *
-    """, memo_id, what, when_due, who, priority, tags or [], context, category, metadata or {})
+    row = await CREATE_MEMO.fetchrow(
+        conn, memo_id, what, when_due, who, priority, tags or [], context, category, metadata or {}
+    )
+
+    return Memo(row)
+
+
+MEMO_INSERT_COLUMNS = ('id', 'what', 'when_due', 'who', 'priority', 'tags', 'context', 'category', 'metadata')
+
+CREATE_MEMOS_BULK = statement("memos.create_bulk", """
+    INSERT INTO memos (id, what, when_due, who, priority, tags, context, category, metadata)
+    SELECT id, what, when_due, who, COALESCE(priority, 'normal'),
+           COALESCE(tags, '{}'), context, category, COALESCE(metadata, '{}')
+    FROM jsonb_to_recordset($1::text::jsonb) AS t(
+        id UUID, what TEXT, when_due TIMESTAMPTZ, who TEXT, priority TEXT,
+        tags TEXT[], context TEXT, category TEXT, metadata JSONB
+    )
+    RETURNING *
+""")
+
+
+def _bulk_record(memo: dict) -> dict:
+    """单条待插入备忘录 -> jsonb_to_recordset 的一条记录"""
+    record = {column: memo.get(column) for column in MEMO_INSERT_COLUMNS}
+    record['id'] = str(memo.get('id') or uuid.uuid4())
+    if record['when_due'] is not None:
+        # 与 asyncpg 编码 TIMESTAMPTZ 参数一致: 无时区的时间按本地时间处理
+        record['when_due'] = record['when_due'].astimezone(timezone.utc).isoformat()
+    return record
+
+
+async def create_memos_bulk(conn, memos: List[dict]) -> List[dict]:
+    """
+    批量创建备忘录
+    memos 中每项的键与 create_memo 的参数相同
+
+    全部记录序列化为一个 JSON 数组，单条 INSERT ... SELECT FROM jsonb_to_recordset 写入，
+    一次往返、一个事务; 任意一条失败则整体回滚
+    返回的行与 memos 顺序一致
+    """
+    if not memos:
+        return []
+
+    records = [_bulk_record(memo) for memo in memos]
+    rows = await CREATE_MEMOS_BULK.fetch(conn, json.dumps(records, ensure_ascii=False, default=str))
+
+    by_id = {str(row['id']): Memo(row) for row in rows}
+    return [by_id[record['id']] for record in records]
+
+
+MEMO_DETAILS = statement("memos.details", """
+    SELECT context, metadata FROM memos WHERE id = $1
+""", prepare=False, readonly=True)
 
-    return dict(row)
+
+async def get_memo_details(conn, memo_id) -> Optional[dict]:
+    """单条备忘录的大字段 (context, metadata)，供 Memo.load_details 使用"""
+    row = await MEMO_DETAILS.fetchrow(conn, memo_id)
+
+    return dict(row) if row else None
+
+
+SEARCH_MEMOS = statement("memos.search", """
+    SELECT id, what, when_due, who, status, priority, created_at,
+           ts_rank(search_vector, q) as rank
+    FROM memos, plainto_tsquery('memo_cjk', memo_cjk_tokens($1)) q
+    WHERE ($2 = 'all' OR status = $2)
+      AND search_vector @@ q
+    ORDER BY rank DESC, created_at DESC, id DESC
+    LIMIT $3
+""", readonly=True)
+
+SEARCH_MEMOS_AFTER = statement("memos.search_after", """
+    SELECT id, what, when_due, who, status, priority, created_at,
+           ts_rank(search_vector, q) as rank
+    FROM memos, plainto_tsquery('memo_cjk', memo_cjk_tokens($1)) q
+    WHERE ($2 = 'all' OR status = $2)
+      AND search_vector @@ q
+      AND (ts_rank(search_vector, q), created_at, id) < ($4::real, $5::timestamptz, $6::uuid)
+    ORDER BY rank DESC, created_at DESC, id DESC
+    LIMIT $3
+""", prepare=False, readonly=True)
+
+
+def search_cursor(row) -> str:
+    """search_memos 结果行 -> 下一页游标"""
+    return encode_cursor('search', [row['rank'], row['created_at'], row['id']])
 
 
 async def search_memos(
     conn,
     query: str,
     status: str = "pending",
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None
 ) -> List[dict]:
     """
     全文搜索备忘录
-    使用 PostgreSQL 的全文搜索功能
-    """
-    if status == "all":
-        rows = await conn.fetch("""
-            SELECT id, what, when_due, who, status, priority,
-                   ts_rank(to_tsvector('english', what || ' ' || COALESCE(context, '')),
-                           to_tsquery('english', $1)) as rank
-            FROM memos
-            WHERE to_tsvector('english', what || ' ' || COALESCE(context, '')) @@ to_tsquery('english', $1)
-            ORDER BY rank DESC, created_at DESC
-            LIMIT $2
-        """, query, limit)
+    使用预计算的 search_vector 列 (GIN 索引, 见 migrations/001)
+    中文查询先经 memo_cjk_tokens 切分为双字, 与入库时的切分方式一致
+    cursor 为上一页 search_cursor() 生成的游标
+    """
+    if cursor:
+        rows = await SEARCH_MEMOS_AFTER.fetch(conn, query, status, limit, *decode_cursor(cursor, 'search'))
     else:
-        rows = await conn.fetch("""
-            SELECT id, what, when_due, who, status, priority,
-                   ts_rank(to_tsvector('english', what || ' ' || COALESCE(context, '')),
-                           to_tsquery('english', $1)) as rank
-            FROM memos
-            WHERE status = $2
-              AND to_tsvector('english', what || ' ' || COALESCE(context, '')) @@ to_tsquery('english', $1)
-            ORDER BY rank DESC, created_at DESC
-            LIMIT $3
-        """, query, status, limit)
+        rows = await SEARCH_MEMOS.fetch(conn, query, status, limit)
 
-    return [dict(row) for row in rows]
+    return [Memo(row) for row in rows]
+
+
+# 与 migrations/002 中 idx_memos_what_who_trgm 的索引表达式保持一致
+MEMO_TRGM_TEXT = "(what || ' ' || COALESCE(who, ''))"
+
+
+def _like_pattern(keyword: str) -> str:
+    """转义 LIKE 通配符，构造 '%keyword%' 模式"""
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+FUZZY_RANKED = statement("memos.fuzzy_ranked", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS}, word_similarity($1, {MEMO_TRGM_TEXT}) as similarity
+    FROM memos
+    WHERE ($2 = 'all' OR status = $2)
+      AND $1 <% {MEMO_TRGM_TEXT}
+    ORDER BY similarity DESC, created_at DESC, id DESC
+    LIMIT $3
+""", readonly=True)
+
+FUZZY_RANKED_AFTER = statement("memos.fuzzy_ranked_after", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS}, word_similarity($1, {MEMO_TRGM_TEXT}) as similarity
+    FROM memos
+    WHERE ($2 = 'all' OR status = $2)
+      AND $1 <% {MEMO_TRGM_TEXT}
+      AND (word_similarity($1, {MEMO_TRGM_TEXT}), created_at, id) < ($4::real, $5::timestamptz, $6::uuid)
+    ORDER BY similarity DESC, created_at DESC, id DESC
+    LIMIT $3
+""", prepare=False, readonly=True)
+
+
+def _fuzzy_statement(keyword_count: int, after: bool = False):
+    """
+    按关键词个数生成的模糊搜索语句 (memos.fuzzy.N / memos.fuzzy_after.N)
+    占位符 $3.. 对应每个关键词，其后两个占位符为游标 (created_at, id)；
+    SQL 中不拼接任何用户输入，首次使用时才在连接上预编译
+    """
+    conditions = " AND ".join(
+        f"{MEMO_TRGM_TEXT} ILIKE ${i}" for i in range(3, keyword_count + 3)
+    )
+    if after:
+        conditions += f" AND (created_at, id) < (${keyword_count + 3}::timestamptz, ${keyword_count + 4}::uuid)"
+    name = "fuzzy_after" if after else "fuzzy"
+    return statement(f"memos.{name}.{keyword_count}", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+    WHERE ($1 = 'all' OR status = $1)
+      AND {conditions}
+    ORDER BY created_at DESC, id DESC
+    LIMIT $2
+""", prepare=keyword_count <= 2 and not after, readonly=True)
+
+
+def fuzzy_cursor(row, ranked: bool = False) -> str:
+    """fuzzy_search_memos 结果行 -> 下一页游标"""
+    if ranked:
+        return encode_cursor('fuzzy_ranked', [row['similarity'], row['created_at'], row['id']])
+    return encode_cursor('fuzzy', [row['created_at'], row['id']])
 
 
 async def fuzzy_search_memos(
     conn,
     keywords: List[str],
-    status: str = "pending"
+    status: str = "pending",
+    limit: int = 20,
+    ranked: bool = False,
+    cursor: Optional[str] = None
 ) -> List[dict]:
     """
     模糊搜索备忘录
     用于自然语言匹配 (例如 "给老板做演示")
+
+    默认模式: 每个关键词都需出现在 what 或 who 中，按创建时间倒序
+    ranked=True: 按 pg_trgm word_similarity 相似度排序，容忍错别字和语序差异
+
+    两种模式都只使用绑定参数，并命中 idx_memos_what_who_trgm 索引。
+    SQL 文本只随关键词个数变化，每种个数对应注册表中的一条预编译语句。
+    cursor 为上一页 fuzzy_cursor() 生成的游标
     """
+    keywords = [k for k in keywords if k]
     if not keywords:
         return []
 
-    # 构建查询条件
-    conditions = []
-    for keyword in keywords:
-        conditions.append(f"what ILIKE '%{keyword}%'")
+    if ranked:
+        text = " ".join(keywords)
+        if cursor:
+            rows = await FUZZY_RANKED_AFTER.fetch(
+                conn, text, status, limit, *decode_cursor(cursor, 'fuzzy_ranked')
+            )
+        else:
+            rows = await FUZZY_RANKED.fetch(conn, text, status, limit)
+        return [Memo(row) for row in rows]
 
-    where_clause = " AND ".join(conditions)
-    if status != "all":
-        where_clause = f"status = '{status}' AND " + where_clause
+    after = decode_cursor(cursor, 'fuzzy') if cursor else []
+    rows = await _fuzzy_statement(len(keywords), bool(after)).fetch(
+        conn, status, limit, *[_like_pattern(k) for k in keywords], *after
+    )
 
-    query = f"""
-        SELECT * FROM memos
-        WHERE {where_clause}
-        ORDER BY created_at DESC
-        LIMIT 20
-    """
+    return [Memo(row) for row in rows]
 
-    rows = await conn.fetch(query)
-    return [dict(row) for row in rows]
+
+COMPLETE_MEMO = statement("memos.complete", """
+    UPDATE memos
+    SET status = 'completed',
+        completed_at = NOW(),
+        updated_at = NOW()
+    WHERE id = $1
+    RETURNING *
+""")
 
 
 async def complete_memo(conn, memo_id: str) -> Optional[dict]:
     """标记备忘录为完成"""
-    row = await conn.fetchrow("""
-        UPDATE memos
+    row = await COMPLETE_MEMO.fetchrow(conn, memo_id)
+
+    return Memo(row) if row else None
+
+
+# 候选打分权重: 词元重合 / 人名命中 / 截止时间接近 / 新近程度 (总和为 1)
+RESOLVE_WEIGHTS = {'overlap': 0.65, 'person': 0.15, 'due': 0.10, 'recency': 0.10}
+
+RESOLVE_COMPLETE = statement("memos.resolve_complete", f"""
+    WITH scored AS (
+        SELECT {MEMO_SUMMARY_COLUMNS}, s.overlap,
+               ({RESOLVE_WEIGHTS['overlap']} * s.overlap
+                + {RESOLVE_WEIGHTS['person']} * (CASE WHEN lower({MEMO_TRGM_TEXT}) LIKE ANY ($2::text[]) THEN 1 ELSE 0 END)
+                + {RESOLVE_WEIGHTS['due']} * COALESCE(1 / (1 + abs(extract(epoch FROM when_due - $3::timestamptz)) / 86400), 0)
+                + {RESOLVE_WEIGHTS['recency']} / (1 + extract(epoch FROM NOW() - created_at) / 604800)
+               )::real AS score
+        FROM memos,
+             LATERAL (
+                 SELECT count(*)::real / cardinality($1::text[]) AS overlap
+                 FROM unnest($1::text[]) term
+                 WHERE strpos(lower({MEMO_TRGM_TEXT}), term) > 0
+             ) s
+        WHERE status = 'pending' AND s.overlap > 0
+        ORDER BY score DESC, created_at DESC, id DESC
+        LIMIT $6
+    ),
+    ranked AS (
+        SELECT *,
+               row_number() OVER w AS position,
+               score - COALESCE(lead(score) OVER w, 0) AS margin
+        FROM scored
+        WINDOW w AS (ORDER BY score DESC, created_at DESC, id DESC)
+    ),
+    done AS (
+        UPDATE memos m
         SET status = 'completed',
             completed_at = NOW(),
             updated_at = NOW()
-        WHERE id = $1
-        RETURNING *
-    """, memo_id)
+        FROM ranked r
+        WHERE r.position = 1 AND r.score >= $4 AND r.margin >= $5
+          AND m.id = r.id AND m.status = 'pending'
+        RETURNING m.id, m.completed_at AS resolved_at
+    )
+    SELECT ranked.*, done.resolved_at
+    FROM ranked LEFT JOIN done USING (id)
+    ORDER BY position
+""")
 
-    return dict(row) if row else None
+
+async def resolve_complete_memo(
+    conn,
+    terms: List[str],
+    people: Optional[List[str]] = None,
+    due_hint: Optional[datetime] = None,
+    min_score: float = 0.4,
+    min_margin: float = 0.15,
+    limit: int = 5
+):
+    """
+    按描述为待办打分，胜出者足够明确时在同一条语句中直接完成
+
+    得分 = 词元重合比例 (terms 中出现在 what/who 里的比例) + 人名命中
+         + 截止时间与 due_hint (默认当前时间) 的接近程度 + 创建时间的新近程度，
+    权重见 RESOLVE_WEIGHTS。第一名得分不低于 min_score 且领先第二名至少 min_margin 时
+    UPDATE 只作用于仍为 pending 的该行，并发完成同一条时只有一方成功
+
+    Args:
+        terms: 小写的词元 (英文单词、汉字双字)
+        people: 描述中提到的人名
+
+    Returns:
+        tuple: (已完成的 Memo 或 None, 按得分排序的候选 [Memo(score, overlap), ...])
+    """
+    terms = [t for t in dict.fromkeys(terms) if t]
+    if not terms:
+        return None, []
+
+    rows = await RESOLVE_COMPLETE.fetch(
+        conn, terms, [_like_pattern(p.lower()) for p in people or []],
+        due_hint or datetime.now(timezone.utc), min_score, min_margin, limit
+    )
+
+    candidates = [Memo(row) for row in rows]
+    completed = None
+    if candidates and rows[0]['resolved_at'] is not None:
+        completed = candidates[0] = Memo(rows[0], status='completed', completed_at=rows[0]['resolved_at'])
+    return completed, candidates
+
+
+# 与 migrations/006 中 priority_rank 生成列的取值一致
+PRIORITY_RANK = {'high': 3, 'normal': 2, 'low': 1}
+
+# 待办排序: priority_rank DESC, when_due ASC (NULL 排最后), id
+# 与 migrations/006 中 idx_memos_pending_rank 的索引表达式保持一致
+PENDING_DUE_KEY = "COALESCE(when_due, 'infinity'::timestamptz)"
+PENDING_ORDER = f"priority_rank DESC, {PENDING_DUE_KEY}, id"
+
+PENDING_MEMOS = statement("memos.pending", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+    WHERE status = 'pending'
+      AND ($1::text IS NULL OR category = $1)
+    ORDER BY {PENDING_ORDER}
+    LIMIT $2
+""", readonly=True)
+
+# 游标之后的一页: 同优先级内 (due, id) 之后的行 + 更低优先级的行，
+# 两个分支各自是 idx_memos_pending_rank 上的一次范围扫描，代价与翻页深度无关
+PENDING_MEMOS_AFTER = statement("memos.pending_after", f"""
+    SELECT * FROM (
+        (SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+         WHERE status = 'pending'
+           AND ($1::text IS NULL OR category = $1)
+           AND priority_rank = $3::smallint
+           AND ({PENDING_DUE_KEY}, id) > (COALESCE($4::timestamptz, 'infinity'::timestamptz), $5::uuid)
+         ORDER BY {PENDING_ORDER}
+         LIMIT $2)
+        UNION ALL
+        (SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+         WHERE status = 'pending'
+           AND ($1::text IS NULL OR category = $1)
+           AND priority_rank < $3::smallint
+         ORDER BY {PENDING_ORDER}
+         LIMIT $2)
+    ) page
+    ORDER BY {PENDING_ORDER}
+    LIMIT $2
+""", readonly=True)
+
+
+def pending_cursor(row) -> str:
+    """
+    get_pending_memos 结果行 -> 下一页游标
+
+    迁移 006 之前写入的待办缓存快照中没有 priority_rank，按 priority 计算
+    """
+    rank = row.get('priority_rank')
+    if rank is None:
+        rank = PRIORITY_RANK.get(row['priority'], 0)
+    return encode_cursor('pending', [rank, row['when_due'], row['id']])
 
 
 async def get_pending_memos(
     conn,
     limit: int = 20,
-    category: Optional[str] = None
+    category: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> List[dict]:
+    """
+    获取待办事项列表
+    cursor 为上一页 pending_cursor() 生成的游标
+    """
+    if cursor:
+        rows = await PENDING_MEMOS_AFTER.fetch(conn, category, limit, *decode_cursor(cursor, 'pending'))
+    else:
+        rows = await PENDING_MEMOS.fetch(conn, category, limit)
+
+    return [Memo(row) for row in rows]
+
+
+PENDING_SNAPSHOT = statement("memos.pending_snapshot", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+    WHERE status = 'pending'
+    ORDER BY {PENDING_ORDER}
+""", readonly=True)
+
+
+async def get_pending_snapshot(conn) -> List[dict]:
+    """获取全部待办事项 (用于加载进程内待办缓存)"""
+    rows = await PENDING_SNAPSHOT.fetch(conn)
+
+    return [Memo(row) for row in rows]
+
+
+PENDING_FINGERPRINT = statement("memos.pending_fingerprint", """
+    SELECT COUNT(*) as total, MAX(updated_at) as last_updated
+    FROM memos
+    WHERE status = 'pending'
+""", readonly=True)
+
+
+async def get_pending_fingerprint(conn) -> tuple:
+    """
+    待办集合指纹 (数量, 最近更新时间)
+    用于校验磁盘上的缓存快照是否仍与数据库一致
+    """
+    row = await PENDING_FINGERPRINT.fetchrow(conn)
+
+    return (row['total'], row['last_updated'])
+
+
+MEMO_TEXTS = statement("memos.texts", """
+    SELECT id, what, who, context, status, version, updated_at FROM memos
+    WHERE ($1::timestamptz IS NULL OR updated_at >= $1)
+""", prepare=False, readonly=True)
+
+MEMO_TEXTS_BY_ID = statement("memos.texts_by_id", """
+    SELECT id, what, who, context, status, version, updated_at FROM memos
+    WHERE id = ANY($1::uuid[])
+""", readonly=True)
+
+MEMOS_FINGERPRINT = statement("memos.fingerprint", """
+    SELECT COUNT(*) AS total, MAX(updated_at) AS last_updated FROM memos
+""", prepare=False, readonly=True)
+
+MEMOS_BY_ID = statement("memos.by_id", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+    WHERE id = ANY($1::uuid[])
+""", readonly=True)
+
+
+async def get_memo_texts(
+    conn,
+    memo_ids: Optional[List] = None,
+    since: Optional[datetime] = None
 ) -> List[dict]:
-    """获取待办事项列表"""
-    if category:
-        rows = await conn.fetch("""
-            SELECT * FROM memos
-            WHERE status = 'pending' AND category = $1
-            ORDER BY priority DESC, when_due ASC
-            LIMIT $2
-        """, category, limit)
+    """
+    备忘录的可检索文本 (what / who / context) 与状态，用于构建语义索引
+
+    Args:
+        memo_ids: 只取这些备忘录，默认全部
+        since: 只取该时间之后有更新的备忘录 (快照恢复后追赶)
+    """
+    if memo_ids is None:
+        rows = await MEMO_TEXTS.fetch(conn, since)
     else:
-        rows = await conn.fetch("""
-            SELECT * FROM memos
-            WHERE status = 'pending'
-            ORDER BY priority DESC, when_due ASC
-            LIMIT $1
-        """, limit)
+        rows = await MEMO_TEXTS_BY_ID.fetch(conn, [str(memo_id) for memo_id in memo_ids])
+
+    return [dict(row) for row in rows]
+
+
+async def get_memos_fingerprint(conn) -> tuple:
+    """全部备忘录的指纹 (数量, 最近更新时间)，用于校验语义索引快照"""
+    row = await MEMOS_FINGERPRINT.fetchrow(conn)
+
+    return (row['total'], row['last_updated'])
+
+
+async def get_memos_by_ids(conn, memo_ids: List) -> List[Memo]:
+    """按 id 批量取备忘录 (顺序与 memo_ids 一致，不存在的 id 跳过)"""
+    rows = await MEMOS_BY_ID.fetch(conn, [str(memo_id) for memo_id in memo_ids])
+    by_id = {str(row['id']): Memo(row) for row in rows}
+
+    return [by_id[str(memo_id)] for memo_id in memo_ids if str(memo_id) in by_id]
+
+
+PEOPLE = statement("memos.people", """
+    SELECT who, MAX(updated_at) AS last_seen FROM memos
+    WHERE who IS NOT NULL AND who <> ''
+      AND ($1::timestamptz IS NULL OR updated_at >= $1)
+    GROUP BY who
+""", readonly=True)
+
+
+async def get_people(conn, since: Optional[datetime] = None) -> List[dict]:
+    """
+    出现过的 who 取值及其最近更新时间 (用于构建人名词典)
+
+    Args:
+        since: 只返回该时间之后有更新的取值 (增量刷新)
+    """
+    rows = await PEOPLE.fetch(conn, since)
 
     return [dict(row) for row in rows]
 
 
-async def get_daily_memos(conn, date: datetime) -> dict:
+OVERDUE_MEMOS = statement("memos.overdue", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+    WHERE status = 'pending' AND when_due < NOW()
+    ORDER BY when_due ASC
+""", readonly=True)
+
+
+async def get_overdue_memos(conn) -> List[dict]:
+    """获取所有逾期的待办事项"""
+    rows = await OVERDUE_MEMOS.fetch(conn)
+
+    return [Memo(row) for row in rows]
+
+
+COMPLETED_MEMOS = statement("memos.completed", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+    WHERE status = 'completed'
+      AND ($1::text IS NULL OR priority = $1)
+    ORDER BY completed_at DESC
+""", prepare=False, readonly=True)
+
+
+async def get_completed_memos(conn, priority: Optional[str] = None) -> List[dict]:
+    """获取已完成的备忘录 (可按优先级过滤)"""
+    rows = await COMPLETED_MEMOS.fetch(conn, priority)
+
+    return [Memo(row) for row in rows]
+
+
+REPORT_SECTIONS = ('overdue', 'pending', 'upcoming', 'unscheduled', 'completed')
+
+
+def _parse_report_item(item: dict) -> dict:
+    """将 JSONB 中的 ISO 时间字符串还原为 datetime"""
+    for key in ('when_due', 'completed_at'):
+        if item.get(key):
+            item[key] = datetime.fromisoformat(item[key])
+    return item
+
+
+DAILY_REPORT = statement("memos.daily_report", """
+    SELECT memo_daily_report($1, $2, $3)
+""", prepare=False)
+
+
+async def get_daily_memos(
+    conn,
+    date: datetime,
+    now: Optional[datetime] = None
+) -> dict:
     """
     获取指定日期的备忘录统计
     用于每日早报生成
+
+    一次调用 memo_daily_report (migrations/003)，单次往返返回全部分组:
+    overdue / pending (今日剩余) / upcoming / unscheduled / completed
+    now 默认为 date，用于划分逾期与今日待办
     """
     day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    day_end = day_start.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    # 今日待办
-    pending = await conn.fetch("""
-        SELECT what, when_due, priority, who
-        FROM memos
-        WHERE status = 'pending'
-          AND when_due >= $1
-          AND when_due < $2
-        ORDER BY priority DESC, when_due ASC
-    """, day_start, day_end)
-
-    # 逾期任务
-    overdue = await conn.fetch("""
-        SELECT what, when_due, who
-        FROM memos
-        WHERE status = 'pending'
-          AND when_due < $1
-        ORDER BY when_due ASC
-    """, day_start)
-
-    # 今日已完成
-    completed = await conn.fetch("""
-        SELECT what, completed_at
-        FROM memos
-        WHERE status = 'completed'
-          AND completed_at >= $1
-          AND completed_at < $2
-        ORDER BY completed_at DESC
-    """, day_start, day_end)
+    day_end = day_start + timedelta(days=1)
+
+    report = await DAILY_REPORT.fetchval(conn, day_start, day_end, now or date)
+    if isinstance(report, str):
+        # 未注册 JSON 编解码的连接 (例如脚本直连) 返回原始文本
+        report = json.loads(report)
 
     return {
-        'pending': [dict(row) for row in pending],
-        'overdue': [dict(row) for row in overdue],
-        'completed': [dict(row) for row in completed]
+        section: [_parse_report_item(item) for item in report.get(section, [])]
+        for section in REPORT_SECTIONS
     }
 
 
+BATCH_COMPLETE = statement("memos.batch_complete", """
+    UPDATE memos
+    SET status = 'completed',
+        completed_at = NOW(),
+        updated_at = NOW()
+    WHERE id = ANY($1::uuid[])
+""")
+
+
 async def batch_complete(conn, memo_ids: List[str]) -> int:
     """批量完成备忘录"""
-    result = await conn.execute("""
-        UPDATE memos
-        SET status = 'completed',
-            completed_at = NOW(),
-            updated_at = NOW()
-        WHERE id = ANY($1)
-    """, memo_ids)
+    result = await BATCH_COMPLETE.execute(conn, memo_ids)
 
     # result 返回 "UPDATE count" 格式
     count = int(result.split()[-1])
     return count
+
+
+# batch_clear 支持的条件类型: 逾期待办 / 低优先级待办 / 关键词匹配的待办
+CLEAR_KINDS = ('overdue', 'low', 'keywords')
+
+# 大批量清算时每个 UPDATE 处理的行数，每块单独提交，行锁只持有一小段时间
+CLEAR_CHUNK_SIZE = 500
+
+
+def _clear_predicate(kind: str, keyword_count: int = 0) -> str:
+    """
+    将清算条件编译为 WHERE 片段 ($1 留给 LIMIT，关键词占位符从 $2 开始)
+    只匹配待办，已完成的备忘录不会被重复更新
+    """
+    if kind == 'overdue':
+        condition = "when_due < NOW()"
+    elif kind == 'low':
+        condition = "priority = 'low'"
+    elif kind == 'keywords' and keyword_count:
+        condition = " AND ".join(
+            f"{MEMO_TRGM_TEXT} ILIKE ${i}" for i in range(2, keyword_count + 2)
+        )
+    else:
+        raise ValueError(f"Unknown clear criteria: {kind}")
+    return f"status = 'pending' AND {condition}"
+
+
+def _clear_statement_name(kind: str, keywords: List[str]) -> str:
+    return f"{kind}.{len(keywords)}" if kind == 'keywords' else kind
+
+
+async def preview_clear(
+    conn,
+    kind: str,
+    keywords: Optional[List[str]] = None,
+    sample: int = 10
+) -> tuple:
+    """
+    清算预览: 单次查询返回 (匹配总数, 前 sample 条样本)
+    总数由窗口函数在 LIMIT 之前计算
+    """
+    keywords = keywords or []
+    predicate = _clear_predicate(kind, len(keywords))
+    stmt = statement(f"memos.clear_preview.{_clear_statement_name(kind, keywords)}", f"""
+    SELECT {MEMO_SUMMARY_COLUMNS}, COUNT(*) OVER () AS total
+    FROM memos
+    WHERE {predicate}
+    ORDER BY when_due ASC NULLS LAST, created_at ASC
+    LIMIT $1
+""", prepare=False, readonly=True)
+
+    rows = await stmt.fetch(conn, sample, *[_like_pattern(k) for k in keywords])
+
+    total = rows[0]['total'] if rows else 0
+    return total, [Memo(row) for row in rows]
+
+
+async def clear_memos(
+    conn,
+    kind: str,
+    keywords: Optional[List[str]] = None,
+    chunk_size: int = CLEAR_CHUNK_SIZE
+) -> List:
+    """
+    按条件批量完成待办，返回被完成的 ID
+
+    条件直接在数据库中求值 (UPDATE ... WHERE <条件> RETURNING id)，不先查询再回传 ID;
+    按 chunk_size 分块执行，每块是一个独立的短事务
+    """
+    keywords = keywords or []
+    predicate = _clear_predicate(kind, len(keywords))
+    stmt = statement(f"memos.clear.{_clear_statement_name(kind, keywords)}", f"""
+    UPDATE memos
+    SET status = 'completed',
+        completed_at = NOW(),
+        updated_at = NOW()
+    WHERE id IN (
+        SELECT id FROM memos
+        WHERE {predicate}
+        LIMIT $1
+        FOR UPDATE
+    )
+    RETURNING id
+""", prepare=False)
+
+    patterns = [_like_pattern(k) for k in keywords]
+    cleared = []
+    while True:
+        rows = await stmt.fetch(conn, chunk_size, *patterns)
+        cleared.extend(row['id'] for row in rows)
+        if len(rows) < chunk_size:
+            return cleared
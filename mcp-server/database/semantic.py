@@ -0,0 +1,574 @@
+"""
+本地语义索引
+每条备忘录的 what / who / context 经字符 n-gram 特征哈希得到定长向量 (L2 归一化)，
+全部向量存放在一块连续的 float32 矩阵中；查询只做一次矩阵-向量乘积求余弦相似度。
+不依赖网络服务，需要 numpy
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    from .ann import IVFIndex
+except ImportError:
+    np = None
+
+from .config import SEMANTIC_DIM, SEMANTIC_ANN_MIN_ROWS, SEMANTIC_NPROBE, SEMANTIC_PATH
+from .tokens import HAN_RE
+from .unit_of_work import after_commit
+
+logger = logging.getLogger(__name__)
+
+# 各字段的特征权重
+FIELD_WEIGHTS = (('what', 1.0), ('who', 0.6), ('context', 0.4))
+
+# 低于该相似度的结果不返回 (256 维哈希向量间的随机噪声约为 0.06)
+MIN_SIMILARITY = 0.15
+
+# 状态编码 (0 表示已删除的空行)
+_STATUS_CODES = {'pending': 1, 'completed': 2}
+_STATUS_OTHER = 3
+_DELETED = 0
+
+_WORD_RE = re.compile(rf'[a-z0-9]+|{HAN_RE.pattern}+')
+
+SEMANTIC_AVAILABLE = np is not None
+
+
+@functools.lru_cache(maxsize=65536)
+def _bucket(feature: str, dim: int) -> tuple:
+    """特征 -> (维度, 符号)；crc32 跨进程稳定 (内置 hash 带随机盐)"""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+
+def _features(text: str):
+    """
+    字符 n-gram 特征
+
+    - 连续汉字: 单字 + 相邻双字
+    - 英文/数字: 整词 + 首尾加边界符后的三字母组 ("<review>" -> "<re", "rev", ...)
+    """
+    for m in _WORD_RE.finditer(text.casefold()):
+        token = m.group(0)
+        if HAN_RE.match(token):
+            yield from token
+            for i in range(len(token) - 1):
+                yield token[i:i + 2]
+        else:
+            yield token
+            if len(token) > 2:
+                padded = f"<{token}>"
+                for i in range(len(padded) - 2):
+                    yield '#' + padded[i:i + 3]
+
+
+def embed(fields: Dict[str, Optional[str]], dim: int = SEMANTIC_DIM):
+    """把一条备忘录 (或查询文本，放在 'what') 编码为 L2 归一化的 float32 向量"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for field, weight in FIELD_WEIGHTS:
+        text = fields.get(field)
+        if not text:
+            continue
+        for feature, count in Counter(_features(text)).items():
+            index, sign = _bucket(feature, dim)
+            # 次线性词频，避免重复词主导向量
+            vector[index] += sign * weight * (1.0 + math.log(count))
+
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class SemanticIndex:
+    """
+    语义向量索引 (id -> 矩阵行)
+
+    首次查询时从数据库整体加载 (配置了 SEMANTIC_PATH 时优先从快照恢复再追赶变更)；
+    之后由本进程的写操作增量更新 (见 write_through_*)，
+    其他实例的变更通过 memo_changes 事件记下 id，下次查询前补读这些行。
+    行数达到 SEMANTIC_ANN_MIN_ROWS 后查询改走 IVF 近似索引 (见 ann.py，增长后在工作线程中重新训练)
+    """
+
+    def __init__(
+        self,
+        dim: int = SEMANTIC_DIM,
+        path: Optional[str] = None,
+        ann_min_rows: int = SEMANTIC_ANN_MIN_ROWS,
+        nprobe: int = SEMANTIC_NPROBE
+    ):
+        self.dim = dim
+        self.path = path
+        self.ann_min_rows = ann_min_rows
+        self.nprobe = nprobe
+        self.backend = None
+        self.loaded = False
+        self._loading = False
+        self._matrix = None          # (容量, dim) float32，前 self._count 行有效
+        self._status = None          # (容量,) int8 状态编码
+        self._count = 0
+        self._rows: Dict[str, int] = {}       # id -> 行号
+        self._ids: List[str] = []             # 行号 -> id
+        self._versions: Dict[str, int] = {}
+        self._dirty = set()          # 需要从数据库补读的 id
+        self._watermark = None       # 已索引行的最近 updated_at
+        self._restored = False       # 内容来自磁盘快照，首次使用前需追赶并校验
+        self._ann = None
+        self._training = None        # 后台训练近似索引的任务
+        self._touched = None         # 训练期间更新/删除过的行 (训练完成后重新应用)
+        self._generation = 0         # clear() 时递增，丢弃基于旧内容的训练结果
+        self._lock = asyncio.Lock()
+
+    def bind(self, backend):
+        """绑定存储后端模块 (queries / sqlite_queries)"""
+        self.backend = backend
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._matrix.nbytes + self._status.nbytes if self._matrix is not None else 0
+
+    def clear(self):
+        self.loaded = False
+        self._matrix = None
+        self._status = None
+        self._count = 0
+        self._rows.clear()
+        self._ids.clear()
+        self._versions.clear()
+        self._dirty.clear()
+        self._watermark = None
+        self._restored = False
+        self._ann = None
+        self._touched = None
+        self._generation += 1
+
+    def _reserve(self, rows: int):
+        """保证矩阵至少能容纳 rows 行 (容量翻倍，追加摊还 O(1))"""
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        status = np.zeros(capacity, dtype=np.int8)
+        if self._count:
+            matrix[:self._count] = self._matrix[:self._count]
+            status[:self._count] = self._status[:self._count]
+        self._matrix, self._status = matrix, status
+
+    def upsert(self, memo: dict):
+        """写入或更新一条备忘录的向量与状态"""
+        key = str(memo['id'])
+        row = self._rows.get(key)
+        if row is None:
+            self._reserve(self._count + 1)
+            row = self._count
+            self._count += 1
+            self._rows[key] = row
+            self._ids.append(key)
+        self._matrix[row] = embed(memo, self.dim)
+        self._status[row] = _STATUS_CODES.get(memo.get('status'), _STATUS_OTHER)
+        if memo.get('version') is not None:
+            self._versions[key] = memo['version']
+        updated_at = memo.get('updated_at')
+        if updated_at and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+        if self._ann is not None:
+            self._ann.add(row, self._matrix[row])
+        if self._touched is not None:
+            self._touched.add(row)
+
+    def written(self, memos: List[dict]):
+        """写穿透: 本进程新建/修改的完整行"""
+        if self.loaded:
+            for memo in memos:
+                self.upsert(memo)
+        elif self._loading:
+            # 正在加载的快照可能读不到这些行，加载完成后补读
+            self._dirty.update(str(memo['id']) for memo in memos)
+
+    def status_changed(self, memo_ids, status: str):
+        """写穿透: 只改了状态 (完成/清算不改变文本，向量不用重算)"""
+        if self._loading:
+            self._dirty.update(str(memo_id) for memo_id in memo_ids)
+        if not self.loaded:
+            return
+        code = _STATUS_CODES.get(status, _STATUS_OTHER)
+        for memo_id in memo_ids:
+            row = self._rows.get(str(memo_id))
+            if row is not None:
+                self._status[row] = code
+
+    def remove(self, memo_id):
+        """删除: 该行置零并标记为已删除 (行号不回收，近似索引中留下墓碑)"""
+        key = str(memo_id)
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._matrix[row] = 0
+            self._status[row] = _DELETED
+            self._versions.pop(key, None)
+            if self._ann is not None:
+                self._ann.remove(row)
+            if self._touched is not None:
+                self._touched.add(row)
+
+    def load(self, memos: List[dict]):
+        """用完整的备忘录集合替换索引内容"""
+        self.clear()
+        self._reserve(len(memos))
+        for memo in memos:
+            self.upsert(memo)
+        self.loaded = True
+        self._train_ann()
+
+    def _adopt(self, other: 'SemanticIndex'):
+        """换入另一个 (在工作线程中构建好的) 索引的内容，保留加载期间记下的待补读 id"""
+        self._matrix, self._status, self._count = other._matrix, other._status, other._count
+        self._rows, self._ids, self._versions = other._rows, other._ids, other._versions
+        self._watermark = other._watermark
+        self._ann = other._ann
+        self._restored = False
+        self.loaded = True
+
+    def _needs_training(self) -> bool:
+        """行数达到阈值且尚未训练，或较训练时翻倍"""
+        if self._count < self.ann_min_rows:
+            return False
+        return self._ann is None or self._count >= 2 * self._ann.trained_rows
+
+    def _train_ann(self):
+        """同步训练近似索引 (整体加载时在工作线程中调用，以及基准脚本)"""
+        if not self._needs_training():
+            return
+        self._ann = IVFIndex.train(self._matrix[:self._count])
+        for row in np.flatnonzero(self._status[:self._count] == _DELETED):
+            self._ann.remove(int(row))
+        logger.info("语义近似索引已训练: %d 行, %d 簇", self._count, self._ann.nlist)
+
+    def _schedule_training(self):
+        """需要时在后台训练近似索引；训练期间查询继续使用现有索引 (或精确扫描)"""
+        if self._training is None and self._needs_training():
+            self._training = asyncio.create_task(self._train_in_background())
+
+    async def _train_in_background(self):
+        """在工作线程中对矩阵副本训练 k-means，完成后补上训练期间的变更再换入"""
+        count, generation = self._count, self._generation
+        matrix = self._matrix[:count].copy()
+        self._touched = set()
+        try:
+            ann = await asyncio.to_thread(IVFIndex.train, matrix)
+        except Exception:
+            logger.exception("语义近似索引训练失败")
+            return
+        finally:
+            self._training = None
+            touched, self._touched = self._touched, None
+        if generation != self._generation:
+            return
+
+        # 训练期间追加的行、更新过的行重新分配簇，再给已删除的行留下墓碑
+        if self._count > count:
+            ann.add_batch(np.arange(count, self._count, dtype=np.int32), self._matrix[count:self._count])
+        for row in touched:
+            if row < count and self._status[row] != _DELETED:
+                ann.add(row, self._matrix[row])
+        for row in np.flatnonzero(self._status[:self._count] == _DELETED):
+            ann.remove(int(row))
+        self._ann = ann
+        logger.info("语义近似索引已训练: %d 行, %d 簇", count, ann.nlist)
+
+    def apply_change(self, event: dict):
+        """处理 memo_changes 变更事件 (见 connection.subscribe)"""
+        op = event.get('op')
+        if op == 'RESET':
+            self.clear()
+            return
+        if self._loading:
+            # 正在加载的快照可能早于这次变更，加载完成后补读 (补读不到即已删除)
+            self._dirty.add(str(event.get('id')))
+            return
+        if not self.loaded:
+            return
+
+        memo_id = str(event.get('id'))
+        if op == 'DELETE':
+            self.remove(memo_id)
+        elif self._versions.get(memo_id, -1) < event.get('version', 0):
+            # 本进程的写入已经更新过索引，版本号不会更新；其他实例的变更事件不含文本，稍后补读
+            self._dirty.add(memo_id)
+
+    async def ensure_loaded(self, pool):
+        """
+        首次查询时加载 (快照恢复后只追赶变更)，之后只补读变更过的行
+
+        Args:
+            pool: 连接池；每次读取时短暂租用连接，构建索引期间不持有连接
+                  (SQLite 连接池只有一个连接，持有期间其他调用都要等待)
+        """
+        async with self._lock:
+            if self._restored:
+                async with pool.acquire() as conn:
+                    await self._catch_up(conn)
+            if not self.loaded:
+                self._loading = True
+                try:
+                    async with pool.acquire() as conn:
+                        memos = await self.backend.get_memo_texts(conn)
+                    # 逐行编码是纯 CPU 计算，在工作线程中构建新索引，不阻塞事件循环
+                    fresh = SemanticIndex(self.dim, ann_min_rows=self.ann_min_rows, nprobe=self.nprobe)
+                    await asyncio.to_thread(fresh.load, memos)
+                finally:
+                    self._loading = False
+                self._adopt(fresh)
+                logger.info("语义索引已加载: %d 条, %.1f MB", len(self), self.size_bytes / 1e6)
+            if self._dirty:
+                dirty, self._dirty = list(self._dirty), set()
+                async with pool.acquire() as conn:
+                    memos = await self.backend.get_memo_texts(conn, dirty)
+                for memo in memos:
+                    self.upsert(memo)
+                # 补读不到的行已被删除
+                for memo_id in set(dirty) - {str(memo['id']) for memo in memos}:
+                    self.remove(memo_id)
+            self._schedule_training()
+
+    async def _catch_up(self, conn):
+        """快照恢复后: 补读快照之后更新过的行，行数对不上 (期间有删除) 则整体重新加载"""
+        self._restored = False
+        for memo in await self.backend.get_memo_texts(conn, since=self._watermark):
+            self.upsert(memo)
+        total, _ = await self.backend.get_memos_fingerprint(conn)
+        if total != len(self):
+            logger.info("语义索引快照与数据库不一致 (%d / %d 行)，重新加载", len(self), total)
+            self.clear()
+
+    def search(
+        self,
+        query: str,
+        status: str = "pending",
+        limit: int = 10,
+        exact: bool = False
+    ) -> List[tuple]:
+        """
+        余弦相似度最高的备忘录
+
+        Args:
+            exact: 不使用近似索引，扫描全部向量
+
+        Returns:
+            list: [(id, 相似度), ...]，按相似度降序
+        """
+        if not self._count or limit <= 0:
+            return []
+        q = embed({'what': query}, self.dim)
+        if not q.any():
+            return []
+
+        if self._ann is not None and not exact:
+            rows = np.unique(self._ann.candidates(q, self.nprobe))
+            scores = self._matrix[rows] @ q
+            codes = self._status[rows]
+        else:
+            rows = None
+            scores = self._matrix[:self._count] @ q
+            codes = self._status[:self._count]
+        if scores.shape[0] == 0:
+            return []
+
+        allowed = codes != _DELETED if status == 'all' else codes == _STATUS_CODES.get(status, _STATUS_OTHER)
+        scores = np.where(allowed & (scores >= MIN_SIMILARITY), scores, -1.0)
+
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[scores[top] >= MIN_SIMILARITY]
+
+        return [
+            (self._ids[row if rows is None else rows[row]], float(scores[row]))
+            for row in top
+        ]
+
+    def save(self):
+        """
+        写入快照目录 (内存映射格式 .npy，先写临时目录再原子替换)
+
+        只保存已加载、且已与数据库对齐的索引
+        """
+        if not self.path or not self.loaded or self._restored:
+            return
+
+        tmp_path = f"{self.path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        arrays = {
+            'matrix': self._matrix[:self._count],
+            'status': self._status[:self._count],
+            'ids': np.array(self._ids, dtype='S36'),
+            'versions': np.array([self._versions.get(key, -1) for key in self._ids], dtype=np.int64),
+        }
+        if self._ann is not None:
+            arrays.update({f"ann_{name}": value for name, value in self._ann.state().items()})
+        for name, value in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), value)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump({
+                'dim': self.dim,
+                'watermark': self._watermark.isoformat() if self._watermark else None,
+                # 尚未补读的其他实例变更，恢复后继续补读
+                'dirty': sorted(self._dirty),
+            }, f)
+
+        old_path = f"{self.path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, old_path)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def restore(self):
+        """从快照目录恢复 (矩阵以写时复制方式内存映射，首次使用前追赶数据库变更)"""
+        if not self.path or not os.path.exists(os.path.join(self.path, "meta.json")):
+            return
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta['dim'] != self.dim:
+                return
+
+            def array(name, mmap_mode=None):
+                return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+            matrix = array('matrix', mmap_mode='c')
+            status = np.array(array('status'))
+            ids = [value.decode() for value in array('ids')]
+            versions = array('versions')
+            ann_files = [name for name in os.listdir(self.path) if name.startswith('ann_')]
+            ann_state = {name[4:-4]: array(name[:-4]) for name in ann_files}
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("语义索引快照读取失败: %s", e)
+            return
+
+        self.clear()
+        self._matrix, self._status = matrix, status
+        self._count = len(ids)
+        self._ids = ids
+        self._rows = {key: row for row, key in enumerate(ids) if status[row] != _DELETED}
+        self._versions = {key: int(v) for key, v in zip(ids, versions) if v >= 0}
+        self._watermark = datetime.fromisoformat(meta['watermark']) if meta['watermark'] else None
+        self._dirty = set(meta.get('dirty', []))
+        if ann_state:
+            self._ann = IVFIndex.from_state(ann_state)
+        self.loaded = True
+        self._restored = True
+
+
+semantic_index = SemanticIndex(path=SEMANTIC_PATH)
+
+
+async def semantic_search_memos(
+    pool,
+    query: str,
+    status: str = "pending",
+    limit: int = 10
+) -> List[dict]:
+    """
+    语义搜索备忘录 (本地向量索引)
+
+    从 pool 短暂租用连接读取变更与结果行，加载索引期间不占用连接；
+    返回的行带 similarity 字段，按相似度降序
+
+    Raises:
+        RuntimeError: 未安装 numpy
+    """
+    if not SEMANTIC_AVAILABLE:
+        raise RuntimeError("语义搜索需要安装 numpy")
+
+    await semantic_index.ensure_loaded(pool)
+    hits = semantic_index.search(query, status, limit)
+    if not hits:
+        return []
+
+    async with pool.acquire() as conn:
+        memos = await semantic_index.backend.get_memos_by_ids(conn, [memo_id for memo_id, _ in hits])
+    scores = dict(hits)
+    for memo in memos:
+        memo['similarity'] = scores[str(memo['id'])]
+    return memos
+
+
+def write_through_create(fn):
+    """create_memo: 新备忘录写入索引"""
+    @functools.wraps(fn)
+    async def wrapper(conn, *args, **kwargs):
+        row = await fn(conn, *args, **kwargs)
+        if row:
+            after_commit(conn, lambda: semantic_index.written([row]))
+        return row
+    return wrapper
+
+
+def write_through_create_bulk(fn):
+    """create_memos_bulk: 整批写入索引"""
+    @functools.wraps(fn)
+    async def wrapper(conn, memos, *args, **kwargs):
+        rows = await fn(conn, memos, *args, **kwargs)
+        after_commit(conn, lambda: semantic_index.written(rows))
+        return rows
+    return wrapper
+
+
+def write_through_complete(fn):
+    """complete_memo: 返回完整的行，直接更新索引"""
+    @functools.wraps(fn)
+    async def wrapper(conn, memo_id, *args, **kwargs):
+        row = await fn(conn, memo_id, *args, **kwargs)
+        if row:
+            after_commit(conn, lambda: semantic_index.written([row]))
+        return row
+    return wrapper
+
+
+def write_through_resolve_complete(fn):
+    """resolve_complete_memo: 完成了某一条时更新其状态"""
+    @functools.wraps(fn)
+    async def wrapper(conn, *args, **kwargs):
+        completed, candidates = await fn(conn, *args, **kwargs)
+        if completed:
+            after_commit(conn, lambda: semantic_index.status_changed([completed['id']], 'completed'))
+        return completed, candidates
+    return wrapper
+
+
+def write_through_batch_complete(fn):
+    """batch_complete: 按传入的 id 更新状态"""
+    @functools.wraps(fn)
+    async def wrapper(conn, memo_ids, *args, **kwargs):
+        count = await fn(conn, memo_ids, *args, **kwargs)
+        after_commit(conn, lambda: semantic_index.status_changed(memo_ids, 'completed'))
+        return count
+    return wrapper
+
+
+def write_through_clear(fn):
+    """clear_memos: 按返回的 id 更新状态"""
+    @functools.wraps(fn)
+    async def wrapper(conn, *args, **kwargs):
+        memo_ids = await fn(conn, *args, **kwargs)
+        after_commit(conn, lambda: semantic_index.status_changed(memo_ids, 'completed'))
+        return memo_ids
+    return wrapper
@@ -0,0 +1,213 @@
+"""
+慢查询日志
+作为语句观察者 (statements.observe) 接收每条语句的耗时，超过 SLOW_QUERY_MS 的记录一条警告日志，
+参数只保留类型与长度 (备忘录内容、人名等文本不写入日志)
+
+设置 SLOW_QUERY_DIR 时，慢查询按 SLOW_QUERY_EXPLAIN_RATE 抽样，在后台用另一个连接重新取得计划:
+PostgreSQL 上登记为只读的语句 (statement(..., readonly=True)) 执行 EXPLAIN (ANALYZE, BUFFERS) (在回滚的事务中)，
+写语句只取估算计划 EXPLAIN (FORMAT JSON)，不真正执行，不会持有行锁；SQLite 使用 EXPLAIN QUERY PLAN。
+计划连同语句名、耗时与脱敏参数保存为 JSON 文件；计划中出现对表的顺序扫描时在日志中指出
+
+    MEMO_SLOW_QUERY_MS=100 MEMO_SLOW_QUERY_DIR=/var/tmp/memo-plans python -m mcp_server.server
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from .config import STORAGE_BACKEND, SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN_RATE, SLOW_QUERY_DIR
+
+logger = logging.getLogger(__name__)
+
+# 同一条语句两次 EXPLAIN 之间的最短间隔 (秒)
+EXPLAIN_COOLDOWN = 60.0
+# EXPLAIN ANALYZE 的语句超时 (ms)
+EXPLAIN_TIMEOUT_MS = 30000
+# EXPLAIN 使用的连接池 (不占用交互式调用的连接)
+EXPLAIN_POOL = "batch"
+# 日志中最多列出的参数个数 (批量写入的参数是整批行)
+MAX_LOGGED_PARAMS = 20
+
+
+def redact(value):
+    """脱敏后的参数: 数值、布尔与时间原样保留，文本与容器只保留类型与长度"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes, list, tuple, dict)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def seq_scans(plan) -> List[str]:
+    """计划中做顺序扫描的表 (PostgreSQL JSON 计划或 SQLite EXPLAIN QUERY PLAN 的 detail 列表)"""
+    tables = []
+    if isinstance(plan, list) and plan and isinstance(plan[0], str):
+        for detail in plan:
+            if detail.startswith("SCAN ") and "USING" not in detail and "VIRTUAL TABLE" not in detail:
+                tables.append(detail.split()[1])
+        return tables
+
+    stack = [entry.get('Plan', {}) for entry in plan] if isinstance(plan, list) else []
+    while stack:
+        node = stack.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            tables.append(node.get('Relation Name', '?'))
+        stack.extend(node.get('Plans', []))
+    return tables
+
+
+class SlowStatement:
+    """一条语句的慢查询统计"""
+
+    __slots__ = ('name', 'count', 'max_ms', 'last_at', 'last_plan', 'explained_at')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.max_ms = 0.0
+        self.last_at = 0.0
+        self.last_plan: Optional[str] = None
+        self.explained_at = 0.0
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'count': self.count,
+            'max_ms': round(self.max_ms, 3),
+            'last_at': self.last_at,
+            'last_plan': self.last_plan
+        }
+
+
+class SlowQueryLog:
+    """
+    慢查询日志
+
+    Attributes:
+        threshold_ms: 慢查询阈值
+        explain_rate: 抽样执行 EXPLAIN 的比例
+        plan_dir: 计划文件目录 (None 表示不执行 EXPLAIN)
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, explain_rate: float = SLOW_QUERY_EXPLAIN_RATE,
+                 plan_dir: Optional[str] = SLOW_QUERY_DIR):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.plan_dir = plan_dir
+        self.statements: Dict[str, SlowStatement] = {}
+        self._explaining: Optional[asyncio.Task] = None
+
+    def on_statement(self, name, sql, args, elapsed_ms, rows, failed):
+        """语句观察者"""
+        # SQLite 的 EXPLAIN QUERY PLAN 同样经过观察者，不计入慢查询
+        if self.threshold_ms <= 0 or elapsed_ms < self.threshold_ms or sql.startswith("EXPLAIN "):
+            return
+
+        slow = self.statements.get(name)
+        if slow is None:
+            slow = self.statements[name] = SlowStatement(name)
+        slow.count += 1
+        slow.max_ms = max(slow.max_ms, elapsed_ms)
+        slow.last_at = time.time()
+
+        params = [redact(arg) for arg in args[:MAX_LOGGED_PARAMS]]
+        if len(args) > MAX_LOGGED_PARAMS:
+            params.append(f"... (共 {len(args)} 个)")
+        logger.warning(
+            "慢查询 %s: %.1fms, %d 行%s, 参数 %s",
+            name, elapsed_ms, rows, " (失败)" if failed else "", params
+        )
+
+        if (not failed and self.plan_dir and self._explaining is None
+                and time.monotonic() - slow.explained_at >= EXPLAIN_COOLDOWN
+                and random.random() < self.explain_rate):
+            slow.explained_at = time.monotonic()
+            self._explaining = asyncio.get_running_loop().create_task(
+                self._explain(slow, sql, args, elapsed_ms, rows, params)
+            )
+            self._explaining.add_done_callback(self._explained)
+
+    def _explained(self, task: asyncio.Task):
+        self._explaining = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("慢查询 EXPLAIN 失败: %s", task.exception())
+
+    async def _explain(self, slow: SlowStatement, sql: str, args: tuple, elapsed_ms: float, rows: int, params: list):
+        from .pools import pool_manager
+
+        pool = await pool_manager.get(EXPLAIN_POOL)
+        analyzed = False
+        async with pool.acquire() as conn:
+            if STORAGE_BACKEND == "sqlite":
+                plan = [row[3] for row in await conn.fetch("EXPLAIN QUERY PLAN " + sql, *args)]
+            elif self._readonly(slow.name):
+                # ANALYZE 会真正执行语句，放在回滚的事务中并限制耗时
+                transaction = conn.transaction()
+                await transaction.start()
+                try:
+                    await conn.execute(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                    plan = await conn.fetchval("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, *args)
+                    analyzed = True
+                finally:
+                    await transaction.rollback()
+            else:
+                # 写语句即使在回滚的事务中执行，也会持有行锁直到结束，只取估算计划
+                plan = await conn.fetchval("EXPLAIN (FORMAT JSON) " + sql, *args)
+
+        scans = seq_scans(plan)
+        record = {
+            'statement': slow.name,
+            'captured_at': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_ms': round(elapsed_ms, 3),
+            'rows': rows,
+            'params': params,
+            'seq_scans': scans,
+            'analyzed': analyzed,
+            'sql': sql,
+            'plan': plan
+        }
+        os.makedirs(self.plan_dir, exist_ok=True)
+        path = os.path.join(self.plan_dir, f"{datetime.now():%Y%m%dT%H%M%S%f}-{slow.name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2, default=str)
+        slow.last_plan = path
+
+        if scans:
+            logger.warning("慢查询 %s 的计划包含顺序扫描: %s (%s)", slow.name, ", ".join(scans), path)
+        else:
+            logger.info("慢查询 %s 的计划已保存: %s", slow.name, path)
+
+    @staticmethod
+    def _readonly(name: str) -> bool:
+        """语句是否登记为只读 (未登记的语句按写语句处理)"""
+        from .statements import STATEMENTS
+
+        stmt = STATEMENTS.get(name)
+        return stmt is not None and stmt.readonly
+
+    async def close(self):
+        """取消进行中的 EXPLAIN (关闭连接池前调用)"""
+        if self._explaining is not None:
+            self._explaining.cancel()
+            await asyncio.gather(self._explaining, return_exceptions=True)
+
+    def stats(self) -> List[dict]:
+        """各语句的慢查询次数，按次数倒序"""
+        return sorted((s.stats() for s in self.statements.values()), key=lambda s: s['count'], reverse=True)
+
+    def reset(self):
+        self.statements.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def slow_query_stats() -> List[dict]:
+    return slow_query_log.stats()
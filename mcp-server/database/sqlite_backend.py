@@ -0,0 +1,247 @@
+"""
+本地嵌入式 SQLite 存储引擎
+提供与 asyncpg.Pool / asyncpg.Connection 相同的调用方式，
+工具层通过 pool.acquire() 拿到的连接可以直接传给 sqlite_queries 中的函数
+
+- WAL 模式，单写多读
+- FTS5 全文索引 (memos_fts)，由触发器与 memos 表同步
+- SQL 中沿用 asyncpg 风格的 $1 占位符，执行前转换为 SQLite 的 ?1
+"""
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timezone
+
+from .statements import notify
+from .tokens import cjk_tokens
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_schema.sql")
+
+_PLACEHOLDER_RE = re.compile(r'\$(\d+)')
+
+# 增量迁移，与 supabase_config/migrations 对应；已应用版本记录在 PRAGMA user_version
+SQLITE_MIGRATIONS = [
+    # 004: 版本号 (PostgreSQL 端用于 memo_changes 通知载荷)
+    (1, """
+        ALTER TABLE memos ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+
+        CREATE TRIGGER IF NOT EXISTS bump_memos_version
+            AFTER UPDATE OF what, when_due, who, status, priority, completed_at,
+                            tags, context, category, metadata ON memos
+            FOR EACH ROW
+            BEGIN
+                UPDATE memos SET version = OLD.version + 1 WHERE rowid = NEW.rowid;
+            END;
+    """),
+    # 005: 分页游标的复合索引
+    (2, """
+        CREATE INDEX IF NOT EXISTS idx_memos_pending_order
+            ON memos (priority DESC, COALESCE(when_due, 'infinity'), id)
+            WHERE status = 'pending';
+
+        CREATE INDEX IF NOT EXISTS idx_memos_status_created
+            ON memos (status, created_at DESC, id DESC);
+    """),
+    # 006: 数值优先级 (SQLite 的 ALTER TABLE 只能添加 VIRTUAL 生成列，同样可以建索引)
+    (3, """
+        ALTER TABLE memos ADD COLUMN priority_rank INTEGER
+            GENERATED ALWAYS AS (
+                CASE priority
+                    WHEN 'high' THEN 3
+                    WHEN 'normal' THEN 2
+                    WHEN 'low' THEN 1
+                    ELSE 0
+                END
+            ) VIRTUAL;
+
+        CREATE INDEX IF NOT EXISTS idx_memos_pending_rank
+            ON memos (priority_rank DESC, COALESCE(when_due, 'infinity'), id)
+            WHERE status = 'pending';
+
+        DROP INDEX IF EXISTS idx_memos_pending_order;
+    """),
+]
+
+
+def to_db_value(value):
+    """
+    Python 值 -> SQLite 存储值 (时间统一转为 UTC ISO 8601)
+
+    不带时区的 datetime 按本地时间理解 (与 parse_when 的结果、asyncpg 写入 timestamptz 的行为一致)
+    """
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat(timespec='microseconds')
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def _now():
+    return to_db_value(datetime.now(timezone.utc))
+
+
+def _parse_timestamp(value: bytes):
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_converter("TIMESTAMPTZ", _parse_timestamp)
+sqlite3.register_converter("JSON", json.loads)
+
+
+class SQLiteConnection:
+    """asyncpg.Connection 风格的 SQLite 连接包装"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+        self._savepoint = 0
+
+    def _run(self, query, args):
+        return self._db.execute(
+            _PLACEHOLDER_RE.sub(r'?\1', query),
+            [to_db_value(arg) for arg in args]
+        )
+
+    def _observed(self, query, args, fn):
+        """执行并通知语句观察者 (见 statements.observe)，语句名为 sqlite.<动词>"""
+        started = time.perf_counter()
+        result = None
+        failed = True
+        try:
+            result = fn()
+            failed = False
+            return result
+        finally:
+            rows = len(result) if isinstance(result, list) else max(getattr(result, 'rowcount', 0) or 0, 0)
+            name = f"sqlite.{query.split(None, 1)[0].lower()}" if query.strip() else "sqlite"
+            notify(name, query, args, (time.perf_counter() - started) * 1000, rows, failed)
+
+    async def fetch(self, query, *args):
+        return self._observed(query, args, lambda: self._run(query, args).fetchall())
+
+    async def fetchrow(self, query, *args):
+        rows = await self.fetch(query, *args)
+        return rows[0] if rows else None
+
+    async def fetchval(self, query, *args, column=0):
+        row = await self.fetchrow(query, *args)
+        return row[column] if row else None
+
+    async def execute(self, query, *args):
+        """执行语句，返回 asyncpg 风格的状态字符串 (例如 'UPDATE 3')"""
+        def run():
+            cursor = self._run(query, args)
+            cursor.fetchall()
+            return cursor
+
+        cursor = self._observed(query, args, run)
+        verb = query.split(None, 1)[0].upper()
+        if verb == "INSERT":
+            return f"INSERT 0 {cursor.rowcount}"
+        return f"{verb} {max(cursor.rowcount, 0)}"
+
+    async def executemany(self, query, args):
+        self._observed(query, args, lambda: self._db.executemany(
+            _PLACEHOLDER_RE.sub(r'?\1', query),
+            [[to_db_value(v) for v in row] for row in args]
+        ))
+
+    def transaction(self):
+        """事务上下文 (用 SAVEPOINT 实现，支持嵌套)"""
+        return _SQLiteTransaction(self)
+
+
+class _SQLiteTransaction:
+    def __init__(self, conn: SQLiteConnection):
+        self._conn = conn
+        self._name = None
+
+    async def __aenter__(self):
+        self._conn._savepoint += 1
+        self._name = f"sp_{self._conn._savepoint}"
+        self._conn._db.execute(f"SAVEPOINT {self._name}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        db = self._conn._db
+        if exc_type is not None:
+            db.execute(f"ROLLBACK TO {self._name}")
+        db.execute(f"RELEASE {self._name}")
+        self._conn._savepoint -= 1
+        return False
+
+
+class _SQLiteAcquireContext:
+    """支持 `async with pool.acquire() as conn` 与 `conn = await pool.acquire()` 两种写法"""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    async def _acquire(self):
+        await self._pool._lock.acquire()
+        return self._pool._conn
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self):
+        return await self._acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._pool.release(self._pool._conn)
+        return False
+
+
+class SQLitePool:
+    """
+    asyncpg.Pool 风格的 SQLite 连接池
+
+    SQLite 单次查询在亚毫秒级完成，这里只维护一个连接，
+    用 asyncio.Lock 串行化各个工具调用，避免跨 await 的事务相互交错
+    """
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._db.row_factory = sqlite3.Row
+        self._db.create_function("NOW", 0, _now)
+        self._db.create_function("memo_cjk_tokens", 1, cjk_tokens, deterministic=True)
+
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+
+        with open(SCHEMA_FILE, encoding="utf-8") as f:
+            self._db.executescript(f.read())
+        self._migrate()
+
+        self._conn = SQLiteConnection(self._db)
+        self._lock = asyncio.Lock()
+
+    def _migrate(self):
+        """按 user_version 依次执行未应用的迁移"""
+        current = self._db.execute("PRAGMA user_version").fetchone()[0]
+        for version, script in SQLITE_MIGRATIONS:
+            if version <= current:
+                continue
+            self._db.executescript(f"BEGIN; {script}; PRAGMA user_version = {version}; COMMIT;")
+
+    def acquire(self):
+        return _SQLiteAcquireContext(self)
+
+    async def release(self, conn):
+        self._lock.release()
+
+    async def close(self):
+        self._db.close()
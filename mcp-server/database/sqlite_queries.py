@@ -0,0 +1,534 @@
+"""
+SQLite 版本的数据库查询封装
+与 queries.py 一一对应 (函数名、参数、返回值一致)，
+MEMO_STORAGE_BACKEND=sqlite 时由 database/__init__.py 导出
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import uuid
+
+from .cursor import decode_cursor
+from .models import Memo
+# 游标生成与存储后端无关，直接复用 queries 中的实现
+from .queries import (
+    REPORT_SECTIONS,
+    CLEAR_CHUNK_SIZE,
+    MEMO_SUMMARY_FIELDS,
+    MEMO_SUMMARY_COLUMNS,
+    RESOLVE_WEIGHTS,
+    pending_cursor,
+    search_cursor,
+    fuzzy_cursor
+)
+from .tokens import cjk_tokens
+
+# FTS5 bm25 列权重 (what, who, context)，对应 PostgreSQL 的 A/B/C 权重
+_BM25 = "bm25(memos_fts, 3.0, 2.0, 1.0)"
+
+MEMO_LIKE_TEXT = "(what || ' ' || COALESCE(who, ''))"
+
+# 待办排序，与 queries.PENDING_ORDER 一致 (时间以 ISO 文本存储，'infinity' 排在所有时间之后)
+PENDING_DUE_KEY = "COALESCE(when_due, 'infinity')"
+PENDING_ORDER = f"priority_rank DESC, {PENDING_DUE_KEY}, id"
+
+# 与 memos_fts 联表时摘要列需加表别名 (what / who 两表同名)
+MEMO_SUMMARY_COLUMNS_M = ", ".join(f"m.{f}" for f in MEMO_SUMMARY_FIELDS)
+
+
+def _cursor_key(cursor: Optional[str], kind: str) -> list:
+    """解析游标为排序键 (UUID 按文本比较，与 id 列存储方式一致)"""
+    return [str(v) if isinstance(v, uuid.UUID) else v for v in decode_cursor(cursor, kind)]
+
+
+def _fts_query(text: str, operator: str = " ") -> Optional[str]:
+    """将用户输入转换为 FTS5 MATCH 表达式 (每个词元加引号，避免语法注入)"""
+    terms = [t for t in cjk_tokens(text).split() if any(ch.isalnum() for ch in t)]
+    if not terms:
+        return None
+    return operator.join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def _like_pattern(keyword: str) -> str:
+    """转义 LIKE 通配符，构造 '%keyword%' 模式"""
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+async def create_memo(
+    conn,
+    what: str,
+    when_due: Optional[datetime] = None,
+    who: Optional[str] = None,
+    priority: str = "normal",
+    tags: Optional[List[str]] = None,
+    context: Optional[str] = None,
+    category: Optional[str] = None,
+    metadata: Optional[dict] = None
+) -> dict:
+    """创建新备忘录"""
+    memo_id = uuid.uuid4()
+
+    row = await conn.fetchrow("""
+        INSERT INTO memos (id, what, when_due, who, priority, tags, context, category, metadata)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        RETURNING *
+    """, memo_id, what, when_due, who, priority, tags or [], context, category, metadata or {})
+
+    return Memo(row)
+
+
+async def create_memos_bulk(conn, memos: List[dict]) -> List[dict]:
+    """批量创建备忘录 (单个事务内 executemany，返回的行与 memos 顺序一致)"""
+    if not memos:
+        return []
+
+    records = [
+        (
+            memo.get('id') or uuid.uuid4(), memo['what'], memo.get('when_due'), memo.get('who'),
+            memo.get('priority') or 'normal', memo.get('tags') or [], memo.get('context'),
+            memo.get('category'), memo.get('metadata') or {}
+        )
+        for memo in memos
+    ]
+    ids = [str(record[0]) for record in records]
+
+    async with conn.transaction():
+        await conn.executemany("""
+            INSERT INTO memos (id, what, when_due, who, priority, tags, context, category, metadata)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        """, records)
+        rows = await conn.fetch("""
+            SELECT * FROM memos WHERE id IN (SELECT value FROM json_each($1))
+        """, ids)
+
+    by_id = {row['id']: Memo(row) for row in rows}
+    return [by_id[memo_id] for memo_id in ids]
+
+
+async def get_memo_details(conn, memo_id) -> Optional[dict]:
+    """单条备忘录的大字段 (context, metadata)，供 Memo.load_details 使用"""
+    row = await conn.fetchrow("""
+        SELECT context, metadata FROM memos WHERE id = $1
+    """, str(memo_id))
+
+    return dict(row) if row else None
+
+
+async def search_memos(
+    conn,
+    query: str,
+    status: str = "pending",
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> List[dict]:
+    """全文搜索备忘录 (FTS5)"""
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    after = ""
+    args = [match, status, limit]
+    if cursor:
+        after = f"AND (-{_BM25}, m.created_at, m.id) < ($4, $5, $6)"
+        args += _cursor_key(cursor, 'search')
+
+    rows = await conn.fetch(f"""
+        SELECT m.id, m.what, m.when_due, m.who, m.status, m.priority, m.created_at,
+               -{_BM25} as rank
+        FROM memos_fts
+        JOIN memos m ON m.rowid = memos_fts.rowid
+        WHERE memos_fts MATCH $1
+          AND ($2 = 'all' OR m.status = $2)
+          {after}
+        ORDER BY rank DESC, m.created_at DESC, m.id DESC
+        LIMIT $3
+    """, *args)
+
+    return [Memo(row) for row in rows]
+
+
+async def fuzzy_search_memos(
+    conn,
+    keywords: List[str],
+    status: str = "pending",
+    limit: int = 20,
+    ranked: bool = False,
+    cursor: Optional[str] = None
+) -> List[dict]:
+    """
+    模糊搜索备忘录
+
+    默认模式: 每个关键词都需出现在 what 或 who 中 (LIKE)
+    ranked=True: SQLite 没有 pg_trgm，改为任一词元命中 FTS5 并按 bm25 排序
+    """
+    keywords = [k for k in keywords if k]
+    if not keywords:
+        return []
+
+    if ranked:
+        match = _fts_query(" ".join(keywords), operator=" OR ")
+        if not match:
+            return []
+        after = ""
+        args = [match, status, limit]
+        if cursor:
+            after = f"AND (-{_BM25}, m.created_at, m.id) < ($4, $5, $6)"
+            args += _cursor_key(cursor, 'fuzzy_ranked')
+        rows = await conn.fetch(f"""
+            SELECT {MEMO_SUMMARY_COLUMNS_M}, -{_BM25} as similarity
+            FROM memos_fts
+            JOIN memos m ON m.rowid = memos_fts.rowid
+            WHERE memos_fts MATCH $1
+              AND ($2 = 'all' OR m.status = $2)
+              {after}
+            ORDER BY similarity DESC, m.created_at DESC, m.id DESC
+            LIMIT $3
+        """, *args)
+        return [Memo(row) for row in rows]
+
+    conditions = " AND ".join(
+        f"{MEMO_LIKE_TEXT} LIKE ${i} ESCAPE '\\'" for i in range(3, len(keywords) + 3)
+    )
+    args = [status, limit, *[_like_pattern(k) for k in keywords]]
+    if cursor:
+        conditions += f" AND (created_at, id) < (${len(args) + 1}, ${len(args) + 2})"
+        args += _cursor_key(cursor, 'fuzzy')
+
+    rows = await conn.fetch(f"""
+        SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+        WHERE ($1 = 'all' OR status = $1)
+          AND {conditions}
+        ORDER BY created_at DESC, id DESC
+        LIMIT $2
+    """, *args)
+
+    return [Memo(row) for row in rows]
+
+
+async def complete_memo(conn, memo_id: str) -> Optional[dict]:
+    """标记备忘录为完成"""
+    row = await conn.fetchrow("""
+        UPDATE memos
+        SET status = 'completed',
+            completed_at = NOW(),
+            updated_at = NOW()
+        WHERE id = $1
+        RETURNING *
+    """, str(memo_id))
+
+    return Memo(row) if row else None
+
+
+async def resolve_complete_memo(
+    conn,
+    terms: List[str],
+    people: Optional[List[str]] = None,
+    due_hint: Optional[datetime] = None,
+    min_score: float = 0.4,
+    min_margin: float = 0.15,
+    limit: int = 5
+):
+    """
+    按描述为待办打分，胜出者足够明确时直接完成 (与 queries.resolve_complete_memo 对应)
+
+    SQLite 不支持在 CTE 中写入，打分与完成是同一事务中的两条语句；
+    连接由 SQLitePool 独占，期间不会有其他写入
+    """
+    terms = [t for t in dict.fromkeys(terms) if t]
+    if not terms:
+        return None, []
+
+    people_patterns = [_like_pattern(p.lower()) for p in people or []]
+    async with conn.transaction():
+        rows = await conn.fetch(f"""
+            WITH scored AS (
+                SELECT {MEMO_SUMMARY_COLUMNS},
+                       (SELECT count(*) FROM json_each($1)
+                        WHERE instr(lower({MEMO_LIKE_TEXT}), value) > 0) * 1.0 / json_array_length($1) AS overlap
+                FROM memos
+                WHERE status = 'pending'
+            )
+            SELECT *,
+                   {RESOLVE_WEIGHTS['overlap']} * overlap
+                   + {RESOLVE_WEIGHTS['person']} * EXISTS (
+                       SELECT 1 FROM json_each($2) WHERE lower({MEMO_LIKE_TEXT}) LIKE value ESCAPE '\\')
+                   + {RESOLVE_WEIGHTS['due']} * COALESCE(1.0 / (1 + abs(julianday(when_due) - julianday($3))), 0)
+                   + {RESOLVE_WEIGHTS['recency']} / (1 + (julianday('now') - julianday(created_at)) / 7) AS score
+            FROM scored
+            WHERE overlap > 0
+            ORDER BY score DESC, created_at DESC, id DESC
+            LIMIT $4
+        """, terms, people_patterns, due_hint or datetime.now(timezone.utc), limit)
+
+        candidates = [Memo(row) for row in rows]
+        if not candidates:
+            return None, []
+
+        margin = rows[0]['score'] - (rows[1]['score'] if len(rows) > 1 else 0)
+        if rows[0]['score'] < min_score or margin < min_margin:
+            return None, candidates
+
+        resolved_at = await conn.fetchval("""
+            UPDATE memos
+            SET status = 'completed',
+                completed_at = NOW(),
+                updated_at = NOW()
+            WHERE id = $1 AND status = 'pending'
+            RETURNING completed_at
+        """, rows[0]['id'])
+
+    if resolved_at is None:
+        return None, candidates
+    completed = candidates[0] = Memo(rows[0], status='completed', completed_at=resolved_at)
+    return completed, candidates
+
+
+async def get_pending_memos(
+    conn,
+    limit: int = 20,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> List[dict]:
+    """获取待办事项列表 (cursor 为上一页的游标)"""
+    after = ""
+    args = [category, limit]
+    if cursor:
+        after = f"""AND (priority_rank < $3 OR (
+            priority_rank = $3 AND ({PENDING_DUE_KEY}, id) > (COALESCE($4, 'infinity'), $5)
+        ))"""
+        args += _cursor_key(cursor, 'pending')
+
+    rows = await conn.fetch(f"""
+        SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+        WHERE status = 'pending'
+          AND ($1 IS NULL OR category = $1)
+          {after}
+        ORDER BY {PENDING_ORDER}
+        LIMIT $2
+    """, *args)
+
+    return [Memo(row) for row in rows]
+
+
+async def get_pending_snapshot(conn) -> List[dict]:
+    """获取全部待办事项 (用于加载进程内待办缓存)"""
+    rows = await conn.fetch(f"""
+        SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+        WHERE status = 'pending'
+        ORDER BY {PENDING_ORDER}
+    """)
+
+    return [Memo(row) for row in rows]
+
+
+async def get_pending_fingerprint(conn) -> tuple:
+    """
+    待办集合指纹 (数量, 最近更新时间)
+    用于校验磁盘上的缓存快照是否仍与数据库一致
+    """
+    row = await conn.fetchrow("""
+        SELECT COUNT(*) as total, MAX(updated_at) as last_updated
+        FROM memos
+        WHERE status = 'pending'
+    """)
+
+    # 聚合表达式没有列类型，SQLite 不会自动转换为 datetime
+    last_updated = row['last_updated']
+    return (row['total'], datetime.fromisoformat(last_updated) if last_updated else None)
+
+
+async def get_memo_texts(
+    conn,
+    memo_ids: Optional[List] = None,
+    since: Optional[datetime] = None
+) -> List[dict]:
+    """备忘录的可检索文本 (what / who / context) 与状态，用于构建语义索引"""
+    if memo_ids is None:
+        rows = await conn.fetch("""
+            SELECT id, what, who, context, status, version, updated_at FROM memos
+            WHERE ($1 IS NULL OR updated_at >= $1)
+        """, since)
+    else:
+        rows = await conn.fetch("""
+            SELECT id, what, who, context, status, version, updated_at FROM memos
+            WHERE id IN (SELECT value FROM json_each($1))
+        """, [str(memo_id) for memo_id in memo_ids])
+
+    return [dict(row) for row in rows]
+
+
+async def get_memos_fingerprint(conn) -> tuple:
+    """全部备忘录的指纹 (数量, 最近更新时间)，用于校验语义索引快照"""
+    row = await conn.fetchrow("""
+        SELECT COUNT(*) AS total, MAX(updated_at) AS last_updated FROM memos
+    """)
+
+    last_updated = row['last_updated']
+    return (row['total'], datetime.fromisoformat(last_updated) if last_updated else None)
+
+
+async def get_memos_by_ids(conn, memo_ids: List) -> List[Memo]:
+    """按 id 批量取备忘录 (顺序与 memo_ids 一致，不存在的 id 跳过)"""
+    rows = await conn.fetch(f"""
+        SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+        WHERE id IN (SELECT value FROM json_each($1))
+    """, [str(memo_id) for memo_id in memo_ids])
+    by_id = {str(row['id']): Memo(row) for row in rows}
+
+    return [by_id[str(memo_id)] for memo_id in memo_ids if str(memo_id) in by_id]
+
+
+async def get_people(conn, since: Optional[datetime] = None) -> List[dict]:
+    """出现过的 who 取值及其最近更新时间 (用于构建人名词典)"""
+    rows = await conn.fetch("""
+        SELECT who, MAX(updated_at) AS last_seen FROM memos
+        WHERE who IS NOT NULL AND who <> ''
+          AND ($1 IS NULL OR updated_at >= $1)
+        GROUP BY who
+    """, since)
+
+    # MAX() 丢失列类型，时间以 ISO 文本返回
+    return [
+        {'who': row['who'], 'last_seen': datetime.fromisoformat(row['last_seen']) if row['last_seen'] else None}
+        for row in rows
+    ]
+
+
+async def get_overdue_memos(conn) -> List[dict]:
+    """获取所有逾期的待办事项"""
+    rows = await conn.fetch(f"""
+        SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+        WHERE status = 'pending' AND when_due < NOW()
+        ORDER BY when_due ASC
+    """)
+
+    return [Memo(row) for row in rows]
+
+
+async def get_completed_memos(conn, priority: Optional[str] = None) -> List[dict]:
+    """获取已完成的备忘录 (可按优先级过滤)"""
+    rows = await conn.fetch(f"""
+        SELECT {MEMO_SUMMARY_COLUMNS} FROM memos
+        WHERE status = 'completed'
+          AND ($1 IS NULL OR priority = $1)
+        ORDER BY completed_at DESC
+    """, priority)
+
+    return [Memo(row) for row in rows]
+
+
+async def get_daily_memos(
+    conn,
+    date: datetime,
+    now: Optional[datetime] = None
+) -> dict:
+    """
+    获取指定日期的备忘录统计
+    用于每日早报生成
+
+    SQLite 版本: 一条语句按 section 列标注分组，在 Python 中归类，
+    返回结构与 PostgreSQL 的 memo_daily_report 一致
+    """
+    day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    day_end = day_start + timedelta(days=1)
+
+    rows = await conn.fetch("""
+        SELECT what, who, priority, when_due, completed_at,
+               CASE
+                   WHEN status = 'completed' THEN 'completed'
+                   WHEN when_due IS NULL THEN 'unscheduled'
+                   WHEN when_due < $3 THEN 'overdue'
+                   WHEN when_due < $2 THEN 'pending'
+                   ELSE 'upcoming'
+               END AS section
+        FROM memos
+        WHERE status = 'pending'
+           OR (status = 'completed' AND completed_at >= $1 AND completed_at < $2)
+        ORDER BY when_due ASC, priority_rank DESC, completed_at DESC
+    """, day_start, day_end, now or date)
+
+    report = {section: [] for section in REPORT_SECTIONS}
+    for row in rows:
+        item = dict(row)
+        report[item.pop('section')].append(item)
+    report['completed'].sort(key=lambda item: item['completed_at'], reverse=True)
+
+    return report
+
+
+async def batch_complete(conn, memo_ids: List[str]) -> int:
+    """批量完成备忘录"""
+    result = await conn.execute("""
+        UPDATE memos
+        SET status = 'completed',
+            completed_at = NOW(),
+            updated_at = NOW()
+        WHERE id IN (SELECT value FROM json_each($1))
+    """, [str(memo_id) for memo_id in memo_ids])
+
+    count = int(result.split()[-1])
+    return count
+
+
+def _clear_predicate(kind: str, keyword_count: int = 0) -> str:
+    """将清算条件编译为 WHERE 片段 (与 queries._clear_predicate 对应)"""
+    if kind == 'overdue':
+        condition = "when_due < NOW()"
+    elif kind == 'low':
+        condition = "priority = 'low'"
+    elif kind == 'keywords' and keyword_count:
+        condition = " AND ".join(
+            f"{MEMO_LIKE_TEXT} LIKE ${i} ESCAPE '\\'" for i in range(2, keyword_count + 2)
+        )
+    else:
+        raise ValueError(f"Unknown clear criteria: {kind}")
+    return f"status = 'pending' AND {condition}"
+
+
+async def preview_clear(
+    conn,
+    kind: str,
+    keywords: Optional[List[str]] = None,
+    sample: int = 10
+) -> tuple:
+    """清算预览: 单次查询返回 (匹配总数, 前 sample 条样本)"""
+    keywords = keywords or []
+    rows = await conn.fetch(f"""
+        SELECT {MEMO_SUMMARY_COLUMNS}, COUNT(*) OVER () AS total
+        FROM memos
+        WHERE {_clear_predicate(kind, len(keywords))}
+        ORDER BY when_due IS NULL, when_due ASC, created_at ASC
+        LIMIT $1
+    """, sample, *[_like_pattern(k) for k in keywords])
+
+    total = rows[0]['total'] if rows else 0
+    return total, [Memo(row) for row in rows]
+
+
+async def clear_memos(
+    conn,
+    kind: str,
+    keywords: Optional[List[str]] = None,
+    chunk_size: int = CLEAR_CHUNK_SIZE
+) -> List:
+    """按条件批量完成待办，返回被完成的 ID (分块执行，每块一个短事务)"""
+    keywords = keywords or []
+    patterns = [_like_pattern(k) for k in keywords]
+    cleared = []
+    while True:
+        rows = await conn.fetch(f"""
+            UPDATE memos
+            SET status = 'completed',
+                completed_at = NOW(),
+                updated_at = NOW()
+            WHERE id IN (
+                SELECT id FROM memos
+                WHERE {_clear_predicate(kind, len(keywords))}
+                LIMIT $1
+            )
+            RETURNING id
+        """, chunk_size, *patterns)
+        cleared.extend(row['id'] for row in rows)
+        if len(rows) < chunk_size:
+            return cleared
@@ -0,0 +1,78 @@
+-- 智能备忘录系统 - 本地 SQLite Schema
+-- 与 supabase_config/schema.sql (含 migrations) 保持同一数据模型
+-- 时间统一存为 UTC ISO 8601 文本, 数组/JSONB 存为 JSON 文本
+
+CREATE TABLE IF NOT EXISTS memos (
+    id TEXT PRIMARY KEY,
+    what TEXT NOT NULL,
+    when_due TIMESTAMPTZ,
+    who TEXT,
+    status TEXT DEFAULT 'pending',
+    priority TEXT DEFAULT 'normal',
+    created_at TIMESTAMPTZ DEFAULT (NOW()),
+    updated_at TIMESTAMPTZ DEFAULT (NOW()),
+    completed_at TIMESTAMPTZ,
+    tags JSON,
+    context TEXT,
+    category TEXT,
+    metadata JSON
+);
+
+CREATE INDEX IF NOT EXISTS idx_memos_status ON memos(status);
+CREATE INDEX IF NOT EXISTS idx_memos_when_due ON memos(when_due);
+CREATE INDEX IF NOT EXISTS idx_memos_priority ON memos(priority);
+
+CREATE TRIGGER IF NOT EXISTS update_memos_updated_at
+    AFTER UPDATE OF what, when_due, who, status, priority, completed_at,
+                    tags, context, category, metadata ON memos
+    FOR EACH ROW
+    BEGIN
+        UPDATE memos SET updated_at = NOW() WHERE rowid = NEW.rowid;
+    END;
+
+-- 全文搜索 (对应 PostgreSQL 的 search_vector 列)
+-- 中文经 memo_cjk_tokens 切分为双字后入库, 英文由 porter 词干化
+CREATE VIRTUAL TABLE IF NOT EXISTS memos_fts USING fts5(
+    what, who, context,
+    tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS memos_fts_insert AFTER INSERT ON memos
+    BEGIN
+        INSERT INTO memos_fts (rowid, what, who, context)
+        VALUES (NEW.rowid, memo_cjk_tokens(NEW.what),
+                memo_cjk_tokens(NEW.who), memo_cjk_tokens(NEW.context));
+    END;
+
+CREATE TRIGGER IF NOT EXISTS memos_fts_update AFTER UPDATE OF what, who, context ON memos
+    BEGIN
+        UPDATE memos_fts
+        SET what = memo_cjk_tokens(NEW.what),
+            who = memo_cjk_tokens(NEW.who),
+            context = memo_cjk_tokens(NEW.context)
+        WHERE rowid = NEW.rowid;
+    END;
+
+CREATE TRIGGER IF NOT EXISTS memos_fts_delete AFTER DELETE ON memos
+    BEGIN
+        DELETE FROM memos_fts WHERE rowid = OLD.rowid;
+    END;
+
+CREATE TABLE IF NOT EXISTS memo_conversations (
+    id TEXT PRIMARY KEY,
+    memo_id TEXT REFERENCES memos(id) ON DELETE CASCADE,
+    user_message TEXT,
+    system_response TEXT,
+    missing_fields JSON,
+    created_at TIMESTAMPTZ DEFAULT (NOW())
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_memo_id ON memo_conversations(memo_id);
+
+CREATE TABLE IF NOT EXISTS batch_operations (
+    id TEXT PRIMARY KEY,
+    operation_type TEXT,
+    memo_ids JSON,
+    criteria JSON,
+    created_at TIMESTAMPTZ DEFAULT (NOW())
+);
@@ -0,0 +1,197 @@
+"""
+SQL 语句注册表 (PostgreSQL)
+queries.py 中每条热点 SQL 都通过 statement() 登记一个名字，这里是审计服务端全部 SQL 的唯一入口
+
+- 连接池的 init 钩子 (init_connection) 在每个连接上预编译全部 prepare=True 的语句
+- 其余语句 (例如按关键词个数生成的模糊搜索) 首次执行时由连接的语句缓存编译并复用
+- 每条语句记录执行次数、错误次数、返回行数与耗时，可通过 statement_stats() 查看
+- 每次执行后通知 observe() 登记的观察者 (指标、慢查询日志等)；SQLite 后端的查询同样会通知
+"""
+
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class MemoConnection(asyncpg.Connection):
+    """
+    预热语句缓存的连接 (create_pool(connection_class=MemoConnection))
+
+    asyncpg 的 PreparedStatement 对象在连接归还连接池后即失效，
+    因此不持有语句对象，而是借助连接自带的语句缓存 (按 SQL 文本索引，随连接存活):
+    注册表保证同名语句的 SQL 文本不变，每次执行都命中同一条服务端预编译语句
+
+    语句缓存没有公开接口，这里用的是 asyncpg 的内部方法 (requirements.txt 固定了版本上限)；
+    内部接口变化时记录一次警告并跳过预热，语句仍会在首次执行时编译
+    """
+
+    _warm_supported = True
+
+    async def warm_statement(self, sql: str):
+        """预编译 sql 并放入本连接的语句缓存 (语句缓存关闭或不支持预热时不做任何事)"""
+        if not MemoConnection._warm_supported:
+            return
+        try:
+            if self._stmt_cache_enabled:
+                await self._get_statement(sql, None)
+        except (AttributeError, TypeError) as e:
+            MemoConnection._warm_supported = False
+            logger.warning("当前 asyncpg 版本不支持预热语句缓存，跳过预编译: %s", e)
+
+
+class Statement:
+    """一条命名 SQL 语句及其执行统计"""
+
+    __slots__ = ('name', 'sql', 'prepare', 'readonly', 'calls', 'errors', 'rows', 'total_ms', 'max_ms')
+
+    def __init__(self, name: str, sql: str, prepare: bool = True, readonly: bool = False):
+        self.name = name
+        self.sql = sql
+        self.prepare = prepare
+        self.readonly = readonly    # 只读语句 (慢查询日志只对只读语句执行 EXPLAIN ANALYZE)
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _record(self, started: float, rows: int, failed: bool, args: tuple):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        if failed:
+            self.errors += 1
+        notify(self.name, self.sql, args, elapsed_ms, rows, failed)
+
+    async def fetch(self, conn, *args) -> list:
+        started = time.perf_counter()
+        rows = []
+        failed = True
+        try:
+            rows = await conn.fetch(self.sql, *args)
+            failed = False
+            return rows
+        finally:
+            self._record(started, len(rows), failed, args)
+
+    async def fetchrow(self, conn, *args):
+        rows = await self.fetch(conn, *args)
+        return rows[0] if rows else None
+
+    async def fetchval(self, conn, *args):
+        row = await self.fetchrow(conn, *args)
+        return row[0] if row else None
+
+    async def execute(self, conn, *args) -> str:
+        """执行语句，返回状态字符串 (例如 'UPDATE 3')"""
+        started = time.perf_counter()
+        failed = True
+        status = ""
+        try:
+            status = await conn.execute(self.sql, *args)
+            failed = False
+            return status
+        finally:
+            count = status.split()[-1] if status else "0"
+            self._record(started, int(count) if count.isdigit() else 0, failed, args)
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'max_ms': round(self.max_ms, 3)
+        }
+
+
+STATEMENTS: Dict[str, Statement] = {}
+
+# 语句执行观察者: callback(name, sql, args, elapsed_ms, rows, failed)
+_observers: List[Callable] = []
+
+
+def observe(callback: Callable):
+    """登记语句执行观察者 (在执行语句的任务中同步调用，应当很快返回)"""
+    if callback not in _observers:
+        _observers.append(callback)
+
+
+def unobserve(callback: Callable):
+    if callback in _observers:
+        _observers.remove(callback)
+
+
+def notify(name: str, sql: str, args: tuple, elapsed_ms: float, rows: int, failed: bool):
+    """通知观察者一次语句执行 (观察者出错只记录日志，不影响查询)"""
+    for callback in _observers:
+        try:
+            callback(name, sql, args, elapsed_ms, rows, failed)
+        except Exception:
+            logger.exception("语句观察者执行失败: %s", name)
+
+
+def statement(name: str, sql: str, prepare: bool = True, readonly: bool = False) -> Statement:
+    """
+    登记一条命名语句 (同名重复登记返回已有对象)
+
+    Args:
+        prepare: 建立连接时预编译
+        readonly: 语句不修改数据 (SELECT)；写语句保持默认值 False
+    """
+    existing = STATEMENTS.get(name)
+    if existing is not None:
+        if existing.sql != sql:
+            raise ValueError(f"Statement {name} registered with different SQL")
+        return existing
+    stmt = Statement(name, sql, prepare, readonly)
+    STATEMENTS[name] = stmt
+    return stmt
+
+
+async def init_connection(conn):
+    """
+    连接池 init 钩子: 注册 JSON 编解码并预编译热点语句
+
+    JSON 编解码必须先于预编译设置，预编译语句会固化当时的类型编解码器
+    个别语句预编译失败 (例如尚未执行对应迁移) 不影响建立连接，首次使用时再报错
+    """
+    for typename in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            typename,
+            encoder=lambda value: json.dumps(value, ensure_ascii=False, default=str),
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+    if not isinstance(conn, MemoConnection):
+        return
+    for stmt in STATEMENTS.values():
+        if not stmt.prepare:
+            continue
+        try:
+            await conn.warm_statement(stmt.sql)
+        except asyncpg.PostgresError as e:
+            logger.warning("语句 %s 预编译失败: %s", stmt.name, e)
+
+
+def statement_stats(names: Optional[List[str]] = None) -> List[dict]:
+    """各语句执行统计，按总耗时倒序"""
+    stmts = [STATEMENTS[n] for n in names] if names else STATEMENTS.values()
+    return sorted((s.stats() for s in stmts), key=lambda s: s['total_ms'], reverse=True)
+
+
+def reset_statement_stats():
+    for stmt in STATEMENTS.values():
+        stmt.calls = stmt.errors = stmt.rows = 0
+        stmt.total_ms = stmt.max_ms = 0.0
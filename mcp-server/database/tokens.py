@@ -0,0 +1,44 @@
+"""
+中文分词辅助
+与 migrations/001 中的 SQL 函数 memo_cjk_tokens 保持同一切分规则
+"""
+
+import re
+
+# CJK 统一汉字 (含扩展 A 与兼容汉字)
+HAN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+def cjk_tokens(text: str) -> str:
+    """
+    将连续汉字切分为相邻双字，非汉字字符原样保留
+
+    Examples:
+        "给老板做演示" -> "给老 老板 板做 做演 演示"
+        "Review Q3 会" -> "Review Q3 会"
+    """
+    if not text:
+        return ""
+
+    parts = []
+    prev = ""
+    run_len = 0
+
+    for ch in text:
+        if HAN_RE.match(ch):
+            if run_len > 0:
+                parts.append(" " + prev + ch)
+            prev = ch
+            run_len += 1
+        else:
+            if run_len == 1:
+                parts.append(" " + prev)
+            if run_len > 0:
+                parts.append(" ")
+            run_len = 0
+            parts.append(ch)
+
+    if run_len == 1:
+        parts.append(" " + prev)
+
+    return "".join(parts)
@@ -0,0 +1,175 @@
+"""
+工具调用的执行上下文 (unit of work)
+每次工具调用至多从连接池租用一个连接，处理器内的查找与更新都在这个连接上完成，
+需要时整个调用包在一个事务中；租约的等待时间与持有时间按工具名记录
+
+    async with UnitOfWork(pool, "complete_memo", transactional=True) as uow:
+        conn = await uow.connection()
+        ...
+
+连接在第一次调用 connection() 时才租用，参数校验失败、追问等不访问数据库的分支不占用连接。
+需要并发使用多个连接的处理器 (例如混合搜索) 直接使用 uow.pool，且不应同时持有租约:
+SQLite 连接池只有一个连接，持有租约时再次 acquire 会一直等待
+
+事务中的写穿透 (待办缓存、语义索引) 通过 after_commit() 推迟到提交之后执行，
+事务回滚时丢弃，进程内缓存不会领先于数据库
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseStats:
+    """一个工具的连接租约统计"""
+
+    __slots__ = ('name', 'calls', 'leases', 'errors', 'wait_ms', 'max_wait_ms', 'hold_ms', 'max_hold_ms')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0          # 调用次数 (含未租用连接的调用)
+        self.leases = 0
+        self.errors = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.hold_ms = 0.0
+        self.max_hold_ms = 0.0
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'leases': self.leases,
+            'errors': self.errors,
+            'avg_wait_ms': round(self.wait_ms / self.leases, 3) if self.leases else 0.0,
+            'max_wait_ms': round(self.max_wait_ms, 3),
+            'avg_hold_ms': round(self.hold_ms / self.leases, 3) if self.leases else 0.0,
+            'max_hold_ms': round(self.max_hold_ms, 3)
+        }
+
+
+LEASES: Dict[str, LeaseStats] = {}
+
+# id(连接) -> 在该连接上开启了事务、尚未结束的 UnitOfWork
+_TRANSACTIONS: Dict[int, 'UnitOfWork'] = {}
+
+
+def after_commit(conn, callback: Callable[[], None]):
+    """
+    conn 上有进行中的 UnitOfWork 事务时，callback 在事务提交后执行 (回滚时丢弃)；
+    否则语句已经自动提交，立即执行
+    """
+    uow = _TRANSACTIONS.get(id(conn))
+    if uow is None:
+        callback()
+    else:
+        uow._after_commit.append(callback)
+
+
+class UnitOfWork:
+    """
+    一次工具调用的连接租约
+
+    Attributes:
+        pool: 数据库连接池
+        name: 统计用的名字 (通常为工具名)
+        transactional: 租用连接后是否开启事务 (调用正常结束时提交，抛出异常时回滚)
+    """
+
+    __slots__ = ('pool', 'name', 'transactional', '_acquire', '_conn', '_transaction',
+                 '_leased_at', '_wait_ms', '_after_commit')
+
+    def __init__(self, pool, name: str, transactional: bool = False):
+        self.pool = pool
+        self.name = name
+        self.transactional = transactional
+        self._acquire = None
+        self._conn = None
+        self._transaction = None
+        self._leased_at = None
+        self._wait_ms = 0.0
+        self._after_commit: List[Callable[[], None]] = []
+
+    @property
+    def leased(self) -> bool:
+        return self._conn is not None
+
+    @property
+    def acquired_at(self) -> Optional[float]:
+        """开始租用连接的时刻 (perf_counter)，未租用过连接时为 None"""
+        return self._leased_at - self._wait_ms / 1000 if self._leased_at is not None else None
+
+    @property
+    def wait_ms(self) -> float:
+        """等待连接的时间"""
+        return self._wait_ms
+
+    async def connection(self):
+        """本次调用的连接 (首次调用时租用，之后返回同一个连接)"""
+        if self._conn is not None:
+            return self._conn
+
+        started = time.perf_counter()
+        self._acquire = self.pool.acquire()
+        conn = await self._acquire.__aenter__()
+        self._leased_at = time.perf_counter()
+        self._wait_ms = (self._leased_at - started) * 1000
+        self._conn = conn
+
+        if self.transactional:
+            self._transaction = conn.transaction()
+            await self._transaction.__aenter__()
+            _TRANSACTIONS[id(conn)] = self
+        return conn
+
+    async def __aenter__(self) -> 'UnitOfWork':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        stats = LEASES.get(self.name)
+        if stats is None:
+            stats = LEASES[self.name] = LeaseStats(self.name)
+        stats.calls += 1
+        if exc_type is not None:
+            stats.errors += 1
+
+        if self._conn is None:
+            return False
+
+        committed = False
+        try:
+            if self._transaction is not None:
+                _TRANSACTIONS.pop(id(self._conn), None)
+                await self._transaction.__aexit__(exc_type, exc, tb)
+                committed = exc_type is None
+        finally:
+            callbacks, self._after_commit = self._after_commit, []
+            if committed:
+                for callback in callbacks:
+                    try:
+                        callback()
+                    except Exception:
+                        logger.exception("提交后回调执行失败: %s", self.name)
+            self._transaction = None
+            self._conn = None
+            await self._acquire.__aexit__(exc_type, exc, tb)
+
+            hold_ms = (time.perf_counter() - self._leased_at) * 1000
+            stats.leases += 1
+            stats.wait_ms += self._wait_ms
+            stats.hold_ms += hold_ms
+            stats.max_wait_ms = max(stats.max_wait_ms, self._wait_ms)
+            stats.max_hold_ms = max(stats.max_hold_ms, hold_ms)
+        return False
+
+
+def lease_stats(names: Optional[List[str]] = None) -> List[dict]:
+    """各工具的连接租约统计，按总持有时间倒序"""
+    entries = [LEASES[n] for n in names if n in LEASES] if names else LEASES.values()
+    return [s.stats() for s in sorted(entries, key=lambda s: s.hold_ms, reverse=True)]
+
+
+def reset_lease_stats():
+    LEASES.clear()
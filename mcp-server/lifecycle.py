@@ -0,0 +1,155 @@
+"""
+服务生命周期管理
+
+- 延迟导入: 工具模块 (以及它们依赖的 database、numpy、asyncpg) 不在 server.py 导入时加载，
+  启动后由后台预热任务在线程中导入，首次调用早于预热完成时按需导入
+- 后台预热: MCP 握手进行的同时建立各连接池 (新连接预编译热点语句)、
+  加载人名词典、待办缓存与语义索引，第一次工具调用不再承担这些开销
+- 平滑退出: 停止接受新调用，等待进行中的调用完成 (最长 DRAIN_TIMEOUT 秒) 后关闭连接池
+- 启动耗时: 各阶段耗时记录在 lifecycle.timings 中并写入日志，用于衡量冷启动延迟
+"""
+
+import asyncio
+import importlib
+import logging
+import sys
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 本模块首次导入的时刻 (server.py 最先导入本模块)，启动耗时均从这里起算
+STARTED_AT = time.perf_counter()
+
+# 退出时等待进行中调用的最长时间 (秒)
+DRAIN_TIMEOUT = 10.0
+
+
+class ServerClosing(RuntimeError):
+    """服务正在退出，不再接受新的调用"""
+
+
+class Lifecycle:
+    """
+    服务生命周期
+
+    Attributes:
+        timings: 阶段名 -> 耗时 (ms)，例如 import.tools.search_memos、pool.interactive、startup
+    """
+
+    def __init__(self, package: str):
+        self.package = package
+        self.timings: Dict[str, float] = {}
+        self._modules: Dict[str, object] = {}
+        self._inflight = set()
+        self._closing = False
+        self._warmup: Optional[asyncio.Task] = None
+
+    def record(self, name: str, started: float):
+        """记录从 started (perf_counter) 到现在的耗时"""
+        self.timings[name] = round((time.perf_counter() - started) * 1000, 3)
+
+    def module(self, name: str):
+        """导入 (或取已导入的) 包内模块，例如 "tools.create_memo"，首次导入时记录耗时"""
+        module = self._modules.get(name)
+        if module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(f"{self.package}.{name}")
+            self._modules[name] = module
+            self.timings.setdefault(f"import.{name}", round((time.perf_counter() - started) * 1000, 3))
+        return module
+
+    @property
+    def warmed(self) -> bool:
+        return self._warmup is not None and self._warmup.done()
+
+    def start_warmup(self, modules, pools):
+        """在后台开始预热 (不等待完成)"""
+        if self._warmup is None:
+            self._warmup = asyncio.get_running_loop().create_task(self._warm(list(modules), list(pools)))
+        return self._warmup
+
+    async def _warm(self, modules, pools):
+        started = time.perf_counter()
+        try:
+            # 导入在线程中进行，事件循环可以继续处理 MCP 握手
+            for name in modules:
+                await asyncio.to_thread(self.module, name)
+
+            database = self.module("database")
+            for name in pools:
+                step = time.perf_counter()
+                await database.get_pool(name)
+                self.record(f"pool.{name}", step)
+
+            people_lexicon = self.module("tools.people").people_lexicon
+            async with database.UnitOfWork(await database.get_pool(), "warmup") as uow:
+                step = time.perf_counter()
+                await people_lexicon.ensure_fresh(uow.connection)
+                self.record("warm.people", step)
+
+                conn = await uow.connection()
+                if database.CACHE_ENABLED:
+                    step = time.perf_counter()
+                    await database.pending_cache.ensure_loaded(conn)
+                    self.record("warm.pending_cache", step)
+
+            # 语义索引在租约之外加载: 只在读取时短暂租用连接，构建期间其他调用可以使用连接
+            if database.SEMANTIC_AVAILABLE:
+                step = time.perf_counter()
+                await database.semantic_index.ensure_loaded(await database.get_pool())
+                self.record("warm.semantic", step)
+        except Exception as e:
+            # 预热失败不影响服务，首次调用时按需重试
+            logger.warning("启动预热失败: %s", e)
+        finally:
+            self.record("warmup", started)
+            self.timings["startup"] = round((time.perf_counter() - STARTED_AT) * 1000, 3)
+            logger.info("启动耗时: %s", self.format_timings())
+
+    async def run_call(self, coro):
+        """
+        执行一次工具调用并登记为进行中
+
+        调用在独立任务中执行并以 shield 等待: 退出时外层被取消，调用本身仍会完成，由 drain 等待
+        """
+        if self._closing:
+            coro.close()
+            raise ServerClosing("服务正在退出")
+        task = asyncio.ensure_future(coro)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return await asyncio.shield(task)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def shutdown(self, timeout: float = DRAIN_TIMEOUT):
+        """停止接受新调用，等待进行中的调用，然后关闭连接池 (并写入缓存快照)"""
+        self._closing = True
+        started = time.perf_counter()
+
+        if self._warmup is not None and not self._warmup.done():
+            self._warmup.cancel()
+            await asyncio.gather(self._warmup, return_exceptions=True)
+
+        if self._inflight:
+            logger.info("等待 %d 个进行中的调用完成", len(self._inflight))
+            _, pending = await asyncio.wait(set(self._inflight), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning("%d 个调用未在 %.0fs 内完成，已取消", len(pending), timeout)
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # database 未导入 (例如启动即退出) 时没有连接需要关闭
+        database = sys.modules.get(f"{self.package}.database")
+        if database is not None:
+            await database.close_pool()
+        self.record("shutdown", started)
+        logger.info("已退出 (耗时 %.1fms)", self.timings["shutdown"])
+
+    def format_timings(self) -> str:
+        """例如 "import.database 180.2ms · pool.interactive 35.1ms · startup 420.0ms" """
+        return " · ".join(f"{name} {ms:.1f}ms" for name, ms in self.timings.items())
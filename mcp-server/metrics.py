@@ -0,0 +1,392 @@
+"""
+工具调用指标
+按工具记录调用次数、错误次数、延迟分布 (HDR 风格直方图)、数据库耗时与返回行数，
+连同连接租约 (database/unit_of_work.py) 与语句统计 (database/statements.py) 一起
+通过 server_stats 工具查看，或以 Prometheus 文本格式导出
+
+    MEMO_METRICS_FILE=/var/run/memo.prom   每 MEMO_METRICS_INTERVAL 秒原子写入一次 (供 node_exporter textfile 收集)
+    MEMO_METRICS_PORT=9464                 在 127.0.0.1 上提供 GET /metrics
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = os.getenv("MEMO_METRICS_FILE")
+METRICS_INTERVAL = float(os.getenv("MEMO_METRICS_INTERVAL", "15"))
+METRICS_PORT = int(os.getenv("MEMO_METRICS_PORT", "0"))
+
+# 直方图精度: 每个 2 的幂区间再线性分为 2**SUB_BUCKET_BITS 个桶 (相对误差约 1/32)
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LatencyHistogram:
+    """
+    对数-线性分桶的延迟直方图 (HdrHistogram 的简化版)
+
+    以微秒为单位；小于 2 * SUB_BUCKETS 的值每个整数一个桶，之后每个 2 的幂区间 SUB_BUCKETS 个桶，
+    任意量级的分位数相对误差都不超过 1/SUB_BUCKETS，桶数只随最大值对数增长
+    """
+
+    __slots__ = ('counts', 'count', 'total_us', 'min_us', 'max_us')
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < 2 * SUB_BUCKETS:
+            return value
+        # 最高 SUB_BUCKET_BITS + 1 位决定桶: shift 为量级，value >> shift 落在 [SUB_BUCKETS, 2 * SUB_BUCKETS)
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return shift * SUB_BUCKETS + (value >> shift)
+
+    @staticmethod
+    def _upper(index: int) -> int:
+        """桶内的最大值"""
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        return ((index - shift * SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, elapsed_ms: float):
+        value = max(int(elapsed_ms * 1000), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value
+        if self.min_us is None or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+
+    def percentile(self, q: float) -> float:
+        """第 q 分位 (0-1) 的延迟 (ms)，取所在桶的上界"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            'min_ms': (self.min_us or 0) / 1000,
+            **{f'p{int(q * 100)}_ms': self.percentile(q) for q in QUANTILES},
+            'max_ms': self.max_us / 1000
+        }
+
+
+class ToolMetrics:
+    """一个工具的调用指标"""
+
+    __slots__ = ('name', 'calls', 'errors', 'latency', 'db_ms', 'queries', 'rows')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.db_ms = 0.0
+        self.queries = 0
+        self.rows = 0
+
+
+# 当前正在执行的工具 (语句观察者据此把数据库耗时和行数记到对应工具上)
+_current_tool: contextvars.ContextVar[Optional[ToolMetrics]] = contextvars.ContextVar('memo_current_tool', default=None)
+
+
+class _Track:
+    """metrics.track(name) 返回的上下文管理器"""
+
+    __slots__ = ('_registry', '_metrics', '_token', '_started')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str):
+        self._registry = registry
+        self._metrics = registry.tool(name)
+
+    def __enter__(self):
+        self._token = _current_tool.set(self._metrics)
+        self._started = time.perf_counter()
+        return self._metrics
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.latency.record((time.perf_counter() - self._started) * 1000)
+        self._metrics.calls += 1
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            self._metrics.errors += 1
+        _current_tool.reset(self._token)
+        return False
+
+
+class MetricsRegistry:
+    """进程内指标注册表"""
+
+    def __init__(self):
+        self.tools: Dict[str, ToolMetrics] = {}
+        self.started_at = time.time()
+        # 启动各阶段耗时 (server.py 指向 lifecycle.timings)
+        self.timings: Dict[str, float] = {}
+        self._database = None
+        self._exporter = None
+
+    def tool(self, name: str) -> ToolMetrics:
+        metrics = self.tools.get(name)
+        if metrics is None:
+            metrics = self.tools[name] = ToolMetrics(name)
+        return metrics
+
+    def track(self, name: str) -> _Track:
+        """
+        记录一次工具调用
+
+            with metrics.track("list_pending"):
+                ...
+        """
+        return _Track(self, name)
+
+    def bind(self, database):
+        """database 包导入后登记语句观察者，并读取其中的租约、语句与连接池统计"""
+        if self._database is None:
+            self._database = database
+            database.observe(self._on_statement)
+
+    @staticmethod
+    def _on_statement(name, sql, args, elapsed_ms, rows, failed):
+        metrics = _current_tool.get()
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_ms += elapsed_ms
+            metrics.rows += rows
+
+    def reset(self):
+        self.tools.clear()
+        self.started_at = time.time()
+        if self._database is not None:
+            self._database.reset_lease_stats()
+            self._database.reset_statement_stats()
+            self._database.slow_query_log.reset()
+
+    def snapshot(self) -> dict:
+        """全部指标 (可直接序列化为 JSON)"""
+        uptime = max(time.time() - self.started_at, 1e-9)
+        leases = {}
+        statements: List[dict] = []
+        pools = {}
+        slow = []
+        if self._database is not None:
+            leases = {s['name']: s for s in self._database.lease_stats()}
+            statements = self._database.statement_stats()
+            pools = self._database.pool_manager.stats()
+            slow = self._database.slow_query_stats()
+
+        tools = {}
+        for name, metrics in sorted(self.tools.items()):
+            if not metrics.calls:
+                # 进行中的首次调用 (例如 server_stats 自身)
+                continue
+            lease = leases.get(name, {})
+            tools[name] = {
+                'calls': metrics.calls,
+                'errors': metrics.errors,
+                'rate_per_min': round(metrics.calls / uptime * 60, 3),
+                'latency': metrics.latency.summary(),
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db_ms, 3),
+                'rows': metrics.rows,
+                'pool_wait_avg_ms': lease.get('avg_wait_ms', 0.0),
+                'pool_wait_max_ms': lease.get('max_wait_ms', 0.0)
+            }
+        return {
+            'uptime_s': round(uptime, 1),
+            'tools': tools,
+            'statements': [s for s in statements if s['calls']],
+            'slow_queries': slow,
+            'pools': pools
+        }
+
+    def format_text(self, top_statements: int = 5) -> str:
+        """server_stats 工具的文本输出"""
+        snapshot = self.snapshot()
+        lines = [f"📈 服务指标 (运行 {snapshot['uptime_s']:.0f}s)", ""]
+
+        if not snapshot['tools']:
+            lines.append("暂无工具调用")
+        for name, tool in snapshot['tools'].items():
+            latency = tool['latency']
+            lines.append(
+                f"{name}: {tool['calls']} 次 ({tool['rate_per_min']:.1f}/min), 错误 {tool['errors']}"
+            )
+            lines.append(
+                f"   延迟 P50 {latency['p50_ms']:.1f}ms · P90 {latency['p90_ms']:.1f}ms · "
+                f"P99 {latency['p99_ms']:.1f}ms · 最大 {latency['max_ms']:.1f}ms"
+            )
+            lines.append(
+                f"   数据库 {tool['queries']} 次查询 {tool['db_ms']:.1f}ms, {tool['rows']} 行 · "
+                f"等待连接 平均 {tool['pool_wait_avg_ms']:.2f}ms 最大 {tool['pool_wait_max_ms']:.2f}ms"
+            )
+
+        if snapshot['statements']:
+            lines += ["", f"最耗时的语句 (前 {top_statements}):"]
+            for stmt in snapshot['statements'][:top_statements]:
+                lines.append(
+                    f"   {stmt['name']}: {stmt['calls']} 次, 平均 {stmt['avg_ms']:.2f}ms, "
+                    f"最大 {stmt['max_ms']:.2f}ms, 错误 {stmt['errors']}"
+                )
+
+        if snapshot['slow_queries']:
+            lines += ["", "慢查询:"]
+            for slow in snapshot['slow_queries'][:top_statements]:
+                plan = f", 计划 {slow['last_plan']}" if slow['last_plan'] else ""
+                lines.append(f"   {slow['name']}: {slow['count']} 次, 最大 {slow['max_ms']:.1f}ms{plan}")
+
+        if snapshot['pools']:
+            lines += ["", "连接池:"]
+            for name, pool in snapshot['pools'].items():
+                lines.append(f"   {name}: {pool['size']}/{pool['max_size']} 个连接, 空闲 {pool['idle']}")
+
+        if self.timings:
+            lines += ["", "启动耗时: " + " · ".join(f"{name} {ms:.1f}ms" for name, ms in self.timings.items())]
+
+        return "\n".join(lines)
+
+    def format_prometheus(self) -> str:
+        """Prometheus 文本格式 (延迟以 summary 导出分位数)"""
+        snapshot = self.snapshot()
+        out = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                out.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        tools = snapshot['tools']
+        metric("memo_tool_calls_total", "counter", "Tool calls",
+               [({'tool': n}, t['calls']) for n, t in tools.items()])
+        metric("memo_tool_errors_total", "counter", "Tool calls that raised",
+               [({'tool': n}, t['errors']) for n, t in tools.items()])
+
+        latency_samples = []
+        for name, metrics in sorted(self.tools.items()):
+            if not metrics.calls:
+                continue
+            for q in QUANTILES:
+                latency_samples.append(({'tool': name, 'quantile': str(q)}, round(metrics.latency.percentile(q) / 1000, 6)))
+        out.append("# HELP memo_tool_latency_seconds Tool call latency")
+        out.append("# TYPE memo_tool_latency_seconds summary")
+        for labels, value in latency_samples:
+            out.append(f'memo_tool_latency_seconds{{tool="{_escape(labels["tool"])}",quantile="{labels["quantile"]}"}} {value}')
+        for name, metrics in sorted(self.tools.items()):
+            if not metrics.calls:
+                continue
+            out.append(f'memo_tool_latency_seconds_sum{{tool="{_escape(name)}"}} {metrics.latency.total_us / 1e6}')
+            out.append(f'memo_tool_latency_seconds_count{{tool="{_escape(name)}"}} {metrics.latency.count}')
+
+        metric("memo_tool_db_seconds_total", "counter", "Database time spent by tool",
+               [({'tool': n}, t['db_ms'] / 1000) for n, t in tools.items()])
+        metric("memo_tool_rows_total", "counter", "Rows returned or affected by tool queries",
+               [({'tool': n}, t['rows']) for n, t in tools.items()])
+        metric("memo_tool_pool_wait_seconds_avg", "gauge", "Average connection lease wait",
+               [({'tool': n}, t['pool_wait_avg_ms'] / 1000) for n, t in tools.items()])
+
+        statements = snapshot['statements']
+        metric("memo_statement_calls_total", "counter", "Statement executions",
+               [({'statement': s['name']}, s['calls']) for s in statements])
+        metric("memo_statement_errors_total", "counter", "Statement failures",
+               [({'statement': s['name']}, s['errors']) for s in statements])
+        metric("memo_statement_seconds_total", "counter", "Statement execution time",
+               [({'statement': s['name']}, s['total_ms'] / 1000) for s in statements])
+
+        metric("memo_slow_queries_total", "counter", "Statements slower than the slow query threshold",
+               [({'statement': s['name']}, s['count']) for s in snapshot['slow_queries']])
+
+        pools = snapshot['pools']
+        metric("memo_pool_connections", "gauge", "Open connections per pool",
+               [({'pool': n}, p['size']) for n, p in pools.items()])
+        metric("memo_pool_idle_connections", "gauge", "Idle connections per pool",
+               [({'pool': n}, p['idle']) for n, p in pools.items()])
+
+        return "\n".join(out) + "\n"
+
+    def start_exporters(self):
+        """按环境变量启动文件或端口导出 (都未设置时不做任何事)"""
+        if self._exporter is None and (METRICS_FILE or METRICS_PORT):
+            self._exporter = asyncio.get_running_loop().create_task(self._export())
+
+    async def stop_exporters(self):
+        if self._exporter is not None:
+            self._exporter.cancel()
+            await asyncio.gather(self._exporter, return_exceptions=True)
+            self._exporter = None
+        if METRICS_FILE:
+            self.write_file(METRICS_FILE)
+
+    async def _export(self):
+        server = None
+        if METRICS_PORT:
+            server = await asyncio.start_server(self._serve, "127.0.0.1", METRICS_PORT)
+            logger.info("指标导出: http://127.0.0.1:%d/metrics", METRICS_PORT)
+        try:
+            while METRICS_FILE:
+                self.write_file(METRICS_FILE)
+                await asyncio.sleep(METRICS_INTERVAL)
+            if server is not None:
+                await server.serve_forever()
+        finally:
+            if server is not None:
+                server.close()
+
+    def write_file(self, path: str):
+        """原子写入 Prometheus 文本 (写失败只记录日志)"""
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.format_prometheus())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("指标文件写入失败 %s: %s", path, e)
+
+    async def _serve(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            if request.split()[1:2] == [b"/metrics"]:
+                body, status = self.format_prometheus().encode(), "200 OK"
+            else:
+                body, status = b"not found\n", "404 Not Found"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (OSError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = MetricsRegistry()
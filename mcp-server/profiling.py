@@ -0,0 +1,164 @@
+"""
+工具处理器的按需性能剖析
+默认关闭；设置 MEMO_PROFILE_DIR 后，对选中的工具调用剖析处理器的 CPU 开销并写到本地文件
+
+    MEMO_PROFILE_DIR=/var/tmp/memo-profiles    开启并指定输出目录
+    MEMO_PROFILE_TOOLS=list_pending,create_memo  只剖析这些工具 (默认 * 表示全部)
+    MEMO_PROFILE_EVERY=10                      每个工具每 N 次调用剖析 1 次 (默认每次)
+    MEMO_PROFILE_MODE=cprofile|sample          cProfile (.pstats) 或采样 (.collapsed，默认每 MEMO_PROFILE_INTERVAL_MS 采样一次)
+
+- cprofile: 确定性剖析，记录每个函数的调用次数与耗时，开销较大 (处理器变慢数倍)，适合定位具体函数
+- sample: 后台线程定时采样事件循环线程的调用栈，开销小，输出可直接交给 flamegraph.pl / speedscope；
+  采样线程需要拿到 GIL，实际间隔不小于解释器的线程切换间隔 (sys.getswitchinterval()，默认 5ms)，
+  单次几毫秒的调用样本很少，适合剖析慢调用或汇总多次调用
+
+两种方式都在事件循环线程上进行，剖析期间同一线程上运行的其他任务也会计入；
+同一时刻只剖析一次调用 (cProfile 不能嵌套启用)，选中但已有剖析进行中的调用直接跳过。
+scripts/profile_report.py 汇总目录中的文件并输出热点函数
+"""
+
+import contextlib
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("MEMO_PROFILE_DIR")
+PROFILE_TOOLS = os.getenv("MEMO_PROFILE_TOOLS", "*")
+PROFILE_EVERY = max(int(os.getenv("MEMO_PROFILE_EVERY", "1")), 1)
+PROFILE_MODE = os.getenv("MEMO_PROFILE_MODE", "cprofile").lower()
+PROFILE_INTERVAL_MS = float(os.getenv("MEMO_PROFILE_INTERVAL_MS", "5"))
+
+PROFILE_MODES = ("cprofile", "sample")
+
+_OWN_FILE = os.path.basename(__file__) + ":"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """在后台线程中定时采样目标线程的调用栈，按折叠栈 ("a;b;c") 计数"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memo-profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            # 停止采样时 (等待本线程结束) 的栈不计入
+            if stack and not any(label.startswith(_OWN_FILE) for label in stack):
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class HandlerProfiler:
+    """
+    按工具与 1/N 抽样决定是否剖析一次处理器调用
+
+    Attributes:
+        profile_dir: 输出目录 (None 表示关闭)
+        tools: 剖析的工具名集合 (None 表示全部)
+        every: 每个工具每 every 次调用剖析 1 次
+        mode: cprofile 或 sample
+    """
+
+    def __init__(self, profile_dir: Optional[str] = PROFILE_DIR, tools: str = PROFILE_TOOLS,
+                 every: int = PROFILE_EVERY, mode: str = PROFILE_MODE,
+                 interval_ms: float = PROFILE_INTERVAL_MS):
+        if profile_dir and mode not in PROFILE_MODES:
+            # 只在开启剖析时校验，配置错误不影响服务启动
+            logger.warning("未知的 MEMO_PROFILE_MODE: %s (可选 %s)，剖析已关闭", mode, ", ".join(PROFILE_MODES))
+            profile_dir = None
+        self.profile_dir = profile_dir
+        names = {name.strip() for name in tools.split(",") if name.strip()}
+        self.tools = None if "*" in names else names
+        self.every = every
+        self.mode = mode
+        self.interval = interval_ms / 1000
+        self._calls: Dict[str, int] = {}
+        self._active = False
+
+    def selected(self, tool: str) -> bool:
+        """本次调用是否剖析 (同时推进该工具的调用计数)"""
+        if not self.profile_dir or (self.tools is not None and tool not in self.tools):
+            return False
+        count = self._calls.get(tool, 0)
+        self._calls[tool] = count + 1
+        return count % self.every == 0 and not self._active
+
+    @contextlib.contextmanager
+    def profile(self, tool: str):
+        """
+        剖析一次处理器调用 (未选中时不做任何事)
+
+            with profiler.profile("list_pending"):
+                return await handler(uow, args)
+        """
+        if not self.selected(tool):
+            yield
+            return
+
+        self._active = True
+        started = time.perf_counter()
+        if self.mode == "sample":
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                self._active = False
+                self._save(tool, started, "collapsed", sampler.write)
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._active = False
+                self._save(tool, started, "pstats", profile.dump_stats)
+
+    def _save(self, tool: str, started: float, suffix: str, write):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(
+                self.profile_dir, f"{datetime.now():%Y%m%dT%H%M%S%f}-{tool}-{elapsed_ms:.0f}ms.{suffix}"
+            )
+            write(path)
+            logger.info("已剖析 %s (%.1fms): %s", tool, elapsed_ms, path)
+        except OSError as e:
+            logger.warning("剖析结果写入失败: %s", e)
+
+
+profiler = HandlerProfiler()
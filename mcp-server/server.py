@@ -4,16 +4,44 @@
 提供备忘录 CRUD、语义搜索、批量操作等工具
 """
 
+# 最先导入，启动耗时从这里起算
+from .lifecycle import Lifecycle, ServerClosing, STARTED_AT
+from .metrics import metrics
+from .tracing import tracer, span
+from .profiling import profiler
+
 import asyncio
+import logging
+import os
+import signal
+
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
-from .database import get_pool
-from .tools import create_memo, search_memos, complete_memo, list_pending, batch_clear
+logger = logging.getLogger(__name__)
 
 # 创建 MCP Server 实例
 app = Server("smart-memo-server")
 
+# 工具处理器: 名称 -> (tools 下的模块, 是否在事务中执行, 连接池)
+# 模块在后台预热或首次调用时才导入 (见 lifecycle.py)；
+# 每次调用至多租用一个连接 (见 database/unit_of_work.py)；
+# batch_clear 按块分别提交 (见 queries.clear_memos)，不整体包在事务中。
+# 批量导入与批量清算使用 batch 连接池，不占用交互式调用的连接 (见 database/pools.py)
+TOOL_HANDLERS = {
+    "create_memo": ("create_memo", False, "interactive"),
+    "create_memos": ("create_memos", False, "batch"),
+    "search_memos": ("search_memos", False, "interactive"),
+    "complete_memo": ("complete_memo", True, "interactive"),
+    "list_pending": ("list_pending", False, "interactive"),
+    "batch_clear": ("batch_clear", False, "batch"),
+    "server_stats": ("server_stats", False, "interactive")
+}
+
+lifecycle = Lifecycle(__package__)
+lifecycle.record("import.server", STARTED_AT)
+metrics.timings = lifecycle.timings
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -56,9 +84,39 @@ async def list_tools() -> list[Tool]:
                 "required": ["what"]
             }
         ),
+        Tool(
+            name="create_memos",
+            description="批量创建备忘录 (例如一次会议的全部行动项)，一次写入并逐项返回结果。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "memos": {
+                        "type": "array",
+                        "description": "备忘录数组（必需），每项字段与 create_memo 相同",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "what": {"type": "string", "description": "任务内容（必需）"},
+                                "when": {"type": "string", "description": "截止时间 (可选)，格式同 create_memo"},
+                                "who": {"type": "string", "description": "相关人员 (可选)"},
+                                "priority": {
+                                    "type": "string",
+                                    "enum": ["high", "normal", "low"],
+                                    "default": "normal"
+                                },
+                                "tags": {"type": "array", "items": {"type": "string"}},
+                                "context": {"type": "string"}
+                            },
+                            "required": ["what"]
+                        }
+                    }
+                },
+                "required": ["memos"]
+            }
+        ),
         Tool(
             name="search_memos",
-            description="模糊语义搜索备忘录，支持自然语言查询。",
+            description="搜索备忘录: 默认模糊、全文与本地语义搜索并发执行、按倒数排名融合，附各方式耗时；mode=semantic 只用语义搜索。支持自然语言查询与游标分页。",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -74,8 +132,18 @@ async def list_tools() -> list[Tool]:
                     },
                     "limit": {
                         "type": "integer",
-                        "description": "返回结果数量限制 (默认: 10)",
+                        "description": "每页结果数量 (默认: 10)",
                         "default": 10
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["hybrid", "semantic"],
+                        "description": "搜索模式 (默认: hybrid)。hybrid 融合全部搜索方式；semantic 只按本地语义向量相似度排序",
+                        "default": "hybrid"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "分页游标 (可选)。传入上一页返回的 next_cursor 获取下一页，query 与 status 需保持不变"
                     }
                 },
                 "required": ["query"]
@@ -97,40 +165,64 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="list_pending",
-            description="列出当前待办事项。",
+            description="列出当前待办事项，支持游标分页。",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "limit": {
                         "type": "integer",
-                        "description": "返回结果数量限制 (默认: 20)",
+                        "description": "每页结果数量 (默认: 20)",
                         "default": 20
                     },
                     "category": {
                         "type": "string",
                         "description": "过滤分类 (可选)。例如: 'work', 'personal'"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "分页游标 (可选)。传入上一页返回的 next_cursor 获取下一页"
                     }
                 }
             }
         ),
         Tool(
             name="batch_clear",
-            description="批量清算已完成或符合条件的备忘录。",
+            description="批量清算符合条件的待办 (标记为完成)。预览模式返回匹配总数与样本。",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "criteria": {
                         "type": "string",
-                        "description": "匹配条件（必需）。例如: '已完成', '逾期', '低优先级', 或包含的关键词"
+                        "description": "匹配条件（必需）。例如: '逾期', '低优先级', 或包含的关键词 (多个关键词用空格分隔，需全部匹配)"
                     },
                     "preview_only": {
                         "type": "boolean",
                         "description": "预览模式 (默认: true)。true=仅预览不执行, false=实际执行",
-                        "default": true
+                        "default": True
                     }
                 },
                 "required": ["criteria"]
             }
+        ),
+        Tool(
+            name="server_stats",
+            description="查看服务指标: 各工具的调用次数、错误、延迟分位数 (P50/P90/P99)、数据库耗时、返回行数与等待连接时间，以及最耗时的语句和连接池状态。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "format": {
+                        "type": "string",
+                        "enum": ["text", "json", "prometheus"],
+                        "description": "输出格式 (默认: text)",
+                        "default": "text"
+                    },
+                    "reset": {
+                        "type": "boolean",
+                        "description": "输出后清零统计 (默认: false)",
+                        "default": False
+                    }
+                }
+            }
         )
     ]
 
@@ -147,26 +239,21 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     Returns:
         list[TextContent]: 返回结果
     """
-    pool = await get_pool()
-
-    # 工具处理器映射
-    handlers = {
-        "create_memo": create_memo.handle,
-        "search_memos": search_memos.handle,
-        "complete_memo": complete_memo.handle,
-        "list_pending": list_pending.handle,
-        "batch_clear": batch_clear.handle
-    }
-
-    if name not in handlers:
+    if name not in TOOL_HANDLERS:
         return [TextContent(
             type="text",
-            text=f"❌ 未知工具: {name}\n\n可用工具: {', '.join(handlers.keys())}"
+            text=f"❌ 未知工具: {name}\n\n可用工具: {', '.join(TOOL_HANDLERS.keys())}"
         )]
 
+    module, transactional, pool_name = TOOL_HANDLERS[name]
+
     try:
-        result = await handlers[name](pool, arguments)
-        return [TextContent(type="text", text=result)]
+        return [TextContent(
+            type="text",
+            text=await lifecycle.run_call(_run_tool(name, module, transactional, pool_name, arguments))
+        )]
+    except ServerClosing:
+        return [TextContent(type="text", text="❌ 服务正在重启，请稍后重试")]
     except Exception as e:
         return [TextContent(
             type="text",
@@ -174,16 +261,67 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         )]
 
 
+async def _run_tool(name: str, module: str, transactional: bool, pool_name: str, arguments: dict) -> str:
+    handler = lifecycle.module(f"tools.{module}").handle
+    database = lifecycle.module("database")
+    metrics.bind(database)
+    tracer.bind(database)
+
+    # 调用次数、错误与延迟按工具记录 (见 metrics.py)，数据库耗时与行数由语句观察者计入当前工具；
+    # 开启追踪时另记录连接租用、处理器与其中每条语句的 span (见 tracing.py)；
+    # 开启剖析时按工具与抽样剖析处理器 (见 profiling.py)
+    with metrics.track(name), tracer.trace(name) as trace:
+        pool = await database.get_pool(pool_name)
+        async with database.UnitOfWork(pool, name, transactional=transactional) as uow:
+            with span("handler"), profiler.profile(name):
+                try:
+                    return await handler(uow, arguments)
+                finally:
+                    # 连接在处理器第一次访问数据库时才租用，结束后按记录的时刻补上 acquire span
+                    if trace is not None and uow.acquired_at is not None:
+                        trace.add("acquire", uow.acquired_at, uow.acquired_at + uow.wait_ms / 1000, pool=pool_name)
+
+
 async def main():
-    """启动 MCP 服务器"""
+    """
+    启动 MCP 服务器
+
+    握手与后台预热同时进行；标准输入关闭、收到 SIGTERM/SIGINT 时
+    等待进行中的调用完成后关闭连接池
+    """
     from mcp.server.stdio import stdio_server
 
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
-        )
+    # 日志写到标准错误 (标准输出是 MCP 协议通道)
+    logging.basicConfig(level=os.getenv("MEMO_LOG_LEVEL", "WARNING").upper())
+
+    main_task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, main_task.cancel)
+        except (NotImplementedError, RuntimeError):
+            # Windows 等平台不支持，退回默认行为
+            pass
+
+    metrics.start_exporters()
+    lifecycle.start_warmup(
+        ["database"] + [f"tools.{module}" for module, _, _ in TOOL_HANDLERS.values()],
+        {pool_name for _, _, pool_name in TOOL_HANDLERS.values()}
+    )
+
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
+    except asyncio.CancelledError:
+        logger.info("收到退出信号")
+    finally:
+        # 等待进行中的调用，关闭连接池，并写入待办缓存与语义索引快照
+        await lifecycle.shutdown()
+        await metrics.stop_exporters()
 
 
 if __name__ == "__main__":
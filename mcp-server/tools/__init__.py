@@ -1,17 +1,22 @@
 """
 MCP 工具模块
+各工具模块在首次访问时才导入 (例如 tools.create_memo)，导入 tools 包本身不加载数据库层
 """
 
-from . import create_memo
-from . import search_memos
-from . import complete_memo
-from . import list_pending
-from . import batch_clear
+import importlib
 
 __all__ = [
     'create_memo',
+    'create_memos',
     'search_memos',
     'complete_memo',
     'list_pending',
-    'batch_clear'
+    'batch_clear',
+    'server_stats'
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,15 +2,37 @@
 批量清算工具 - 批量完成/删除备忘录
 """
 
-from ..database import fuzzy_search_memos, batch_complete
+from ..database import preview_clear, clear_memos
 
+# 预览模式展示的样本条数
+PREVIEW_SAMPLE = 10
 
-async def handle(pool, args):
+
+def parse_criteria(criteria: str):
+    """
+    将清算条件解析为 (条件类型, 关键词)，条件类型见 queries.CLEAR_KINDS
+
+    Returns:
+        tuple: (kind, keywords)；"已完成" 返回 (None, [])，已完成的任务无需再清算
     """
-    处理批量清算请求
+    if criteria in ("已完成", "completed"):
+        return None, []
+    if criteria in ("逾期", "过期", "overdue"):
+        return "overdue", []
+    if criteria in ("低优先级", "low"):
+        return "low", []
+    return "keywords", criteria.split()
+
+
+async def handle(uow, args):
+    """
+    处理批量清算请求 (将符合条件的待办批量标记为完成)
+
+    条件编译为单个 SQL 谓词，预览只返回总数与样本，
+    执行时直接 UPDATE ... WHERE <条件>，不在 Python 中收集 ID
 
     Args:
-        pool: 数据库连接池
+        uow: 本次调用的执行上下文 (见 database/unit_of_work.py)
         args: {criteria, preview_only}
 
     Returns:
@@ -23,71 +45,41 @@ async def handle(pool, args):
         return """❌ 请提供清算条件
 
 💡 示例:
-   - "已完成" - 清算所有已完成的任务
    - "过期" - 清算所有逾期的任务
    - "低优先级" - 清算所有低优先级任务
    - "包含关键词X" - 清算所有包含特定关键词的任务"""
 
-    # 解析条件
-    keywords = []
-    status_filter = "completed"  # 默认清算已完成的
-
-    if criteria == "已完成" or criteria == "completed":
-        status_filter = "completed"
-    elif criteria == "逾期" or criteria == "过期" or criteria == "overdue":
-        status_filter = "pending"
-        keywords = []  # 特殊处理
-    elif criteria == "低优先级" or criteria == "low":
-        status_filter = "pending"
-        keywords = []  # 特殊处理
+    kind, keywords = parse_criteria(criteria)
+    if kind is None:
+        return f"""✅ 条件 '{criteria}' 匹配的任务均已完成
+
+无需清算。"""
+
+    conn = await uow.connection()
+    if preview_only:
+        total, memos = await preview_clear(conn, kind, keywords, sample=PREVIEW_SAMPLE)
     else:
-        keywords = criteria.split()
-
-    # 搜索匹配的备忘录
-    async with pool.acquire() as conn:
-        if criteria == "逾期" or criteria == "过期":
-            # 查询逾期任务
-            from datetime import datetime
-            rows = await conn.fetch("""
-                SELECT * FROM memos
-                WHERE status = 'pending' AND when_due < NOW()
-                ORDER BY when_due ASC
-            """)
-            memos = [dict(row) for row in rows]
-        elif criteria == "低优先级" or criteria == "low":
-            rows = await conn.fetch("""
-                SELECT * FROM memos
-                WHERE status = 'completed' AND priority = 'low'
-                ORDER BY completed_at DESC
-            """)
-            memos = [dict(row) for row in rows]
-        else:
-            memos = await fuzzy_search_memos(conn, keywords, status=status_filter)
-
-    if not memos:
+        total = len(await clear_memos(conn, kind, keywords))
+
+    if not total:
         return f"""🔍 未找到匹配条件 '{criteria}' 的备忘录
 
 无需清算。"""
 
     if preview_only:
         # 预览模式
-        return format_preview(memos, criteria)
-    else:
-        # 执行清算
-        memo_ids = [m['id'] for m in memos]
-        async with pool.acquire() as conn:
-            count = await batch_complete(conn, memo_ids)
+        return format_preview(memos, criteria, total)
 
-        return f"""✅ 已批量清算 {count} 个任务
+    return f"""✅ 已批量清算 {total} 个任务
 
 条件: {criteria}
 
 太棒了！继续保持高效！"""
 
 
-def format_preview(memos, criteria):
-    """格式化预览结果"""
-    response = f"""🔍 预览: 将清算以下 {len(memos)} 个任务
+def format_preview(memos, criteria, total):
+    """格式化预览结果 (memos 为样本，total 为匹配总数)"""
+    response = f"""🔍 预览: 将清算 {total} 个任务
 
 条件: {criteria}
 
@@ -104,9 +96,12 @@ def format_preview(memos, criteria):
         if memo.get('who'):
             response += f"\n   👥 {memo['who']}"
 
-        response += f"\n   🆔 {memo['id'][:8]}..."
+        response += f"\n   🆔 {str(memo['id'])[:8]}..."
         response += "\n\n"
 
+    if total > len(memos):
+        response += f"... 以及其他 {total - len(memos)} 个任务\n\n"
+
     response += """--------
 💡 这是预览模式，尚未执行。
 
@@ -2,15 +2,70 @@
 完成备忘录工具 - 支持模糊语义匹配
 """
 
-from ..database import fuzzy_search_memos, complete_memo
+import re
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
 
+from ..database import complete_memo, resolve_complete_memo
+from ..database.tokens import cjk_tokens
+from ..tracing import span, phase
+from .timeexpr import parse_time_expression, find_time_expression
+from .people import people_lexicon, guess_people
 
-async def handle(pool, args):
+# 自动完成的门槛: 第一名得分下限，以及领先第二名的最小差距
+RESOLVE_MIN_SCORE = 0.4
+RESOLVE_MIN_MARGIN = 0.15
+
+# 描述中不指代具体任务的指令词、指示词和虚词 (长的在前，避免 "那个" 被拆成 "那")
+_FILLER_RE = re.compile(
+    r'帮我|麻烦|把|将|那个|这个|那条|这条|那件|这件|那项|这项|任务|事情|'
+    r'划掉|勾掉|删掉|完成|搞定|做完|弄完|办完|标记为|标记|已经|一下|了|的|'
+    r'(?<![a-z])(?:mark|as|done|complete|completed|finish|finished|the|a|an|that|this|task|todo|please)(?![a-z])',
+    re.IGNORECASE
+)
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def describe(text: str) -> Tuple[List[str], List[str], Optional[datetime]]:
+    """
+    把任务描述拆成打分用的线索
+
+    Examples:
+        "把那个给老板的演示划掉" -> 词元 ["给老", "老板", "演示"]
+        "mark Paul's deck done" -> 词元 ["paul", "deck"]，人名 ["Paul"]
+
+    Returns:
+        tuple: (小写词元, 人名, 时间提示 datetime 或 None)
+    """
+    hint = find_time_expression(text)
+    due_hint = parse_time_expression(hint) if hint else None
+    people = people_lexicon.match(text) or guess_people(text)
+
+    stripped = text.replace(hint, " ") if hint else text
+    stripped = _FILLER_RE.sub(" ", stripped.lower())
+    tokens = _TOKEN_RE.findall(cjk_tokens(stripped))
+    # 单个汉字、单个字母区分度太低，只在没有其他词元时使用
+    terms = [t for t in tokens if len(t) > 1] or tokens
+
+    return terms, people, due_hint
+
+
+def _format_completed(memo) -> str:
+    return f"""🎉 太棒了！已完成任务:
+
+  {memo['what']}
+
+  完成时间: {memo['completed_at'].strftime('%Y-%m-%d %H:%M')}"""
+
+
+async def handle(uow, args):
     """
     处理完成备忘录请求
 
     Args:
-        pool: 数据库连接池
+        uow: 本次调用的执行上下文 (见 database/unit_of_work.py)
         args: {memo_id} - 可以是 ID 或模糊匹配文本
 
     Returns:
@@ -22,62 +77,52 @@ async def handle(pool, args):
         return "❌ 请提供要完成的备忘录ID或描述"
 
     # 检查是否是 UUID (精确匹配)
-    import uuid
     try:
         uuid.UUID(memo_id)
         # 是有效的 UUID，直接完成
-        async with pool.acquire() as conn:
-            result = await complete_memo(conn, memo_id)
+        result = await complete_memo(await uow.connection(), memo_id)
 
         if result:
-            return f"""🎉 太棒了！已完成任务:
-
-  {result['what']}
-
-  完成时间: {result['completed_at'].strftime('%Y-%m-%d %H:%M')}"""
+            return _format_completed(result)
         else:
             return f"❌ 未找到 ID 为 {memo_id} 的备忘录"
 
     except ValueError:
-        # 不是 UUID，尝试模糊搜索
+        # 不是 UUID，按描述打分
         pass
 
-    # 模糊搜索
-    keywords = memo_id.split()
+    await people_lexicon.ensure_fresh(uow.connection)
+    with span("parse"):
+        terms, people, due_hint = describe(memo_id)
+
+    # 打分与完成在同一条语句中进行: 胜出者足够明确时直接完成，不再单独更新
+    completed, candidates = await resolve_complete_memo(
+        await uow.connection(), terms, people, due_hint,
+        min_score=RESOLVE_MIN_SCORE, min_margin=RESOLVE_MIN_MARGIN
+    )
 
-    async with pool.acquire() as conn:
-        results = await fuzzy_search_memos(conn, keywords, status="pending")
+    phase("render")
+    if completed:
+        return _format_completed(completed)
 
-    if not results:
+    if not candidates:
         return f"""❌ 未找到匹配 '{memo_id}' 的待办任务
 
 💡 提示:
    - 尝试使用不同的关键词
    - 或者直接使用备忘录ID"""
 
-    if len(results) == 1:
-        # 唯一匹配，直接完成
-        memo = results[0]
-        async with pool.acquire() as conn:
-            result = await complete_memo(conn, memo['id'])
-
-        return f"""🎉 太棒了！已完成任务:
-
-  {result['what']}
-
-  完成时间: {result['completed_at'].strftime('%Y-%m-%d %H:%M')}"""
-
-    # 多个匹配，让用户选择
-    response = f"""🤔 找到 {len(results)} 个匹配的任务，请问你要完成哪一个？
+    # 没有明确的胜出者，让用户选择
+    response = f"""🤔 找到 {len(candidates)} 个可能的任务，请问你要完成哪一个？
 
 """
 
-    for i, row in enumerate(results, 1):
+    for i, row in enumerate(candidates, 1):
         response += f"{i}. {row['what']}"
         if row['when_due']:
             due_str = row['when_due'].strftime("%Y-%m-%d %H:%M")
             response += f" (截止: {due_str})"
-        response += "\n"
+        response += f"\n   ID: {row['id']}\n"
 
     response += "\n💡 请使用具体的任务ID或更精确的描述"
 
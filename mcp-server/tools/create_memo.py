@@ -2,18 +2,20 @@
 创建备忘录工具 - 支持追问式补全缺失信息
 """
 
-import re
 from datetime import datetime, timedelta
-from dateutil import parser as date_parser
+from typing import Optional
 from ..database import Memo, create_memo
+from ..tracing import span, phase
+from .timeexpr import parse_time_expression, find_time_expression
+from .people import people_lexicon, guess_people
 
 
-async def handle(pool, args):
+async def handle(uow, args):
     """
     处理创建备忘录请求
 
     Args:
-        pool: 数据库连接池
+        uow: 本次调用的执行上下文 (见 database/unit_of_work.py)
         args: 用户参数 {what, when, who, priority, tags, context}
 
     Returns:
@@ -27,41 +29,34 @@ async def handle(pool, args):
     context = args.get("context", "")
 
     # 分析缺失字段
-    missing = []
-    if not when_str:
-        # 尝试从内容中推断时间
-        when_str = extract_time_hint(what)
-        if not when_str:
-            missing.append("when")
-
-    if not who:
-        # 尝试从内容中推断人名
-        who = extract_people(what)
-        if not who:
-            missing.append("who")
+    await people_lexicon.ensure_fresh(uow.connection)
+    with span("parse"):
+        when_str, who, missing = infer_missing(what, when_str, who)
 
     # 如果仍有缺失字段，返回追问
     if missing:
         return generate_followup_questions(what, when_str, who, missing)
 
     # 解析时间
-    when_due = parse_when(when_str)
+    with span("parse"):
+        when_due = parse_when(when_str)
 
     # 创建备忘录
-    async with pool.acquire() as conn:
-        row = await create_memo(
-            conn,
-            what=what,
-            when_due=when_due,
-            who=who,
-            priority=priority,
-            tags=tags,
-            context=context
-        )
+    row = await create_memo(
+        await uow.connection(),
+        what=what,
+        when_due=when_due,
+        who=who,
+        priority=priority,
+        tags=tags,
+        context=context
+    )
 
     memo = Memo.from_row(row)
+    people_lexicon.add(who)
 
     # 格式化响应
+    phase("render")
     when_str_fmt = when_due.strftime("%Y-%m-%d %H:%M") if when_due else "无截止时间"
     response = f"""✅ 已创建备忘录:
 
@@ -74,98 +69,73 @@ async def handle(pool, args):
     return response
 
 
-def parse_when(when_str: str) -> datetime:
+def infer_missing(what: str, when_str: str, who: str):
     """
-    智能解析时间字符串
+    从任务内容中补全缺失的 when / who (create_memo 与 create_memos 共用)
+
+    Returns:
+        tuple: (when_str, who, missing)，missing 为仍然缺失的字段列表
+    """
+    missing = []
+    if not when_str:
+        # 尝试从内容中推断时间
+        when_str = extract_time_hint(what)
+        if not when_str:
+            missing.append("when")
+    elif parse_when(when_str) is None:
+        # 给出了时间但无法识别: 追问，而不是悄悄用默认时间
+        missing.append("when")
+
+    if not who:
+        # 尝试从内容中推断人名
+        who = extract_people(what)
+        if not who:
+            missing.append("who")
+
+    return when_str, who, missing
+
+
+def parse_when(when_str: str) -> Optional[datetime]:
+    """
+    智能解析时间字符串 (规则见 tools/timeexpr.py)
 
     支持格式:
     - ISO 8601: "2026-01-23T10:00:00"
-    - 自然语言: "tomorrow 3pm", "next Monday", "下周五"
-    - 相对时间: "今天", "明天", "后天"
+    - 数字日期: "10/25", "12/31/2026", "2026/10/25"
+    - 自然语言: "tomorrow 3pm", "next Monday", "下周五", "明天上午10点"
+    - 相对时间: "今天", "明天", "后天", "3小时后"
+
+    未给出时间时使用默认值: 明天上午9:30；给出了但无法解析时返回 None (由调用方追问)
     """
     if not when_str:
-        # 默认: 明天上午9:30
         return datetime.now().replace(hour=9, minute=30, second=0, microsecond=0) + timedelta(days=1)
-
-    try:
-        # 尝试 ISO 8601 格式
-        return datetime.fromisoformat(when_str.replace('Z', '+00:00'))
-    except:
-        try:
-            # 尝试自然语言解析
-            result = date_parser.parse(when_str, fuzzy=True)
-            # 如果解析出的时间是过去的，假设是未来的
-            if result < datetime.now():
-                # 尝试添加年份或月份
-                if "小时" in when_str or "hour" in when_str.lower():
-                    return datetime.now() + timedelta(hours=int(re.findall(r'\d+', when_str)[0]) if re.findall(r'\d+', when_str) else datetime.now() + timedelta(hours=1)
-                else:
-                    # 默认加一天
-                    return result + timedelta(days=1)
-            return result
-        except:
-            # 解析失败，使用默认值
-            return datetime.now().replace(hour=9, minute=30, second=0, microsecond=0) + timedelta(days=1)
+    return parse_time_expression(when_str)
 
 
 def extract_time_hint(text: str) -> str:
     """
-    从文本中提取时间提示
+    从文本中提取时间提示 (原文中的时间表达式片段)
 
     Examples:
-        "明天下午3点" -> "tomorrow 3pm"
-        "后天" -> "后天" (会被 parse_when 处理)
+        "明天下午3点给Paul发邮件" -> "明天下午3点"
+        "Review deck by Friday 5pm" -> "Friday 5pm"
     """
-    if not text:
-        return None
-
-    text_lower = text.lower()
-
-    # 简单规则匹配
-    patterns = [
-        (r'今天', 'today'),
-        (r'明天', 'tomorrow'),
-        (r'后天', '后天'),
-        (r'下周', 'next week'),
-        (r'(\d+)月(\d+)日', None),  # 特殊处理
-        (r'(\d+)点', None),  # 特殊处理
-    ]
-
-    for pattern, replacement in patterns:
-        if re.search(pattern, text):
-            if replacement:
-                return replacement
-            else:
-                # 返回原始匹配，让 parse_when 处理
-                match = re.search(pattern, text)
-                return match.group(0)
-
-    return None
+    return find_time_expression(text)
 
 
 def extract_people(text: str) -> str:
     """
     从文本中提取人名
 
-    简单实现: 查找大写开头的单词
-    后续可以集成更复杂的 NER 模型
+    先用历史 who 构建的人名词典匹配 (见 tools/people.py)，
+    未命中时退回保守规则；多人以 ", " 连接
     """
     if not text:
         return None
 
-    # 常见英文名模式
-    people = re.findall(r'\b[A-Z][a-z]+\b', text)
-
-    if people:
-        # 返回第一个人名（通常是主要对象）
-        return people[0]
-
-    # 尝试中文人名（简单规则：2-3个汉字）
-    chinese_people = re.findall(r'[\u4e00-\u9fff]{2,3}', text)
-    if chinese_people:
-        return chinese_people[0]
+    people = people_lexicon.match(text) or guess_people(text)
 
-    return None
+    return ", ".join(people) if people else None
 
 
 def generate_followup_questions(what, when, who, missing):
@@ -184,7 +154,8 @@ def generate_followup_questions(what, when, who, missing):
     questions = []
 
     if "when" in missing:
-        questions.append("📅 这个任务什么时候需要完成？\n   例如: '明天下午3点', '下周五', '2026-01-25'")
+        unknown = f"无法识别时间 '{when}'，" if when else ""
+        questions.append(f"📅 {unknown}这个任务什么时候需要完成？\n   例如: '明天下午3点', '下周五', '2026-01-25'")
 
     if "who" in missing:
         questions.append("👥 这个任务涉及谁？\n   例如: '给Paul', '产品总监'")
@@ -0,0 +1,69 @@
+"""
+批量创建备忘录工具 - 一次调用导入多条 (例如一次会议的全部行动项)
+"""
+
+from ..database import create_memos_bulk
+from .create_memo import infer_missing, parse_when, generate_followup_questions
+from .people import people_lexicon
+
+
+async def handle(uow, args):
+    """
+    处理批量创建备忘录请求
+
+    每一项与 create_memo 的参数相同，逐项执行时间/人名推断与追问判断;
+    信息完整的项在同一个事务中一次写入，缺少信息的项返回追问，不写入
+
+    Args:
+        uow: 本次调用的执行上下文 (见 database/unit_of_work.py)
+        args: {memos: [{what, when, who, priority, tags, context}, ...]}
+
+    Returns:
+        str: 逐项结果
+    """
+    items = args.get("memos") or []
+    if not items:
+        return "❌ 没有需要创建的备忘录"
+
+    await people_lexicon.ensure_fresh(uow.connection)
+
+    ready = []      # (序号, 待插入字段)
+    results = {}    # 序号 -> 结果行
+
+    for index, item in enumerate(items, 1):
+        what = item.get("what")
+        if not what:
+            results[index] = f"❌ [{index}] 缺少任务内容 (what)"
+            continue
+
+        when_str, who, missing = infer_missing(what, item.get("when"), item.get("who"))
+        if missing:
+            followup = generate_followup_questions(what, when_str, who, missing)
+            results[index] = f"❓ [{index}] {what}\n" + followup.split("\n", 2)[-1]
+            continue
+
+        ready.append((index, {
+            "what": what,
+            "when_due": parse_when(when_str),
+            "who": who,
+            "priority": item.get("priority", "normal"),
+            "tags": item.get("tags", []),
+            "context": item.get("context", "")
+        }))
+
+    if ready:
+        rows = await create_memos_bulk(await uow.connection(), [memo for _, memo in ready])
+
+        for (index, _), row in zip(ready, rows):
+            people_lexicon.add(row['who'])
+            when_due = row['when_due']
+            when_str_fmt = when_due.strftime("%Y-%m-%d %H:%M") if when_due else "无截止时间"
+            line = f"✅ [{index}] {row['what']} 📅 {when_str_fmt}"
+            if row['who']:
+                line += f" 👥 {row['who']}"
+            results[index] = line
+
+    response = f"📥 批量创建: 成功 {len(ready)} 项，共 {len(items)} 项\n\n"
+    response += "\n".join(results[index] for index in sorted(results))
+
+    return response
@@ -0,0 +1,161 @@
+"""
+混合搜索
+各种搜索方式各自从连接池租用连接并发执行，
+结果按倒数排名融合 (Reciprocal Rank Fusion) 合并，并按 id 去重
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from ..database import search_memos, fuzzy_search_memos, semantic_search_memos, SEMANTIC_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+# RRF 平滑常数: 得分 = Σ 1 / (RRF_K + 名次)
+RRF_K = 60
+# 每种搜索方式取回的行数上限 (更深的结果不再返回，见 search_memos 的提示)
+FUSION_DEPTH = 100
+# 每种搜索方式至少取回的行数；翻页需要更多行时按 2 倍加深
+MIN_FUSION_DEPTH = 16
+
+
+class StrategyResult(NamedTuple):
+    """单个搜索方式的结果与耗时"""
+    name: str
+    rows: List[dict]
+    elapsed_ms: float
+    error: Optional[Exception] = None
+
+
+async def _fuzzy(pool, query: str, status: str, limit: int) -> List[dict]:
+    async with pool.acquire() as conn:
+        return await fuzzy_search_memos(conn, query.split(), status, limit)
+
+
+async def _fulltext(pool, query: str, status: str, limit: int) -> List[dict]:
+    async with pool.acquire() as conn:
+        return await search_memos(conn, query, status, limit)
+
+
+# 名称 -> async fn(pool, query, status, limit)，返回按各自相关度排序的行
+# 搜索方式自行租用连接 (语义搜索加载索引期间不持有连接)
+STRATEGIES: Dict[str, Callable[..., Awaitable[List[dict]]]] = {
+    'fuzzy': _fuzzy,
+    'fulltext': _fulltext,
+}
+if SEMANTIC_AVAILABLE:
+    STRATEGIES['semantic'] = semantic_search_memos
+
+
+def register_strategy(name: str, fn: Callable[..., Awaitable[List[dict]]]):
+    """登记一种搜索方式 (例如向量检索)，之后的混合搜索会并发执行它"""
+    STRATEGIES[name] = fn
+
+
+def reciprocal_rank_fusion(rankings: List[List[dict]], k: int = RRF_K) -> List[Tuple[float, dict]]:
+    """
+    倒数排名融合
+
+    每一路结果中排第 r 名的行得 1 / (k + r) 分，同一 id 在多路中的得分相加;
+    按 (得分倒序, id) 排序，同样的输入总是得到同样的顺序，可以按 (得分, id) 翻页
+
+    Returns:
+        list: [(得分, 行), ...]
+    """
+    scores: Dict[str, float] = {}
+    rows: Dict[str, dict] = {}
+
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, 1):
+            key = str(row['id'])
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            rows.setdefault(key, row)
+
+    return [(scores[key], rows[key]) for key in sorted(scores, key=lambda key: (-scores[key], key))]
+
+
+def fusion_depth(needed: int) -> int:
+    """返回 needed 行融合结果所需的每种方式深度 (从 MIN_FUSION_DEPTH 起按 2 倍取整，不超过 FUSION_DEPTH)"""
+    depth = MIN_FUSION_DEPTH
+    while depth < needed:
+        depth *= 2
+    return min(depth, FUSION_DEPTH)
+
+
+def remaining_after(rankings: List[List[dict]], checkpoints: List[list]) -> List[Tuple[float, dict]]:
+    """
+    融合结果中尚未返回的行 (按融合顺序)
+
+    深度不同时同一行的融合得分不同，单个 (得分, id) 键只在同一深度内有效:
+    checkpoints 为 [[深度, 得分, id], ...]，每项是在该深度上最后返回的一行 (深度递增)。
+    rankings 按最大深度取回，较浅深度的排名是它的前缀，逐个检查点重放即可得到已返回的行
+
+    Returns:
+        list: [(得分, 行), ...]，rankings 全部深度上的融合结果去掉已返回的行
+    """
+    shown = set()
+    for depth, score, last_id in checkpoints:
+        for row_score, row in reciprocal_rank_fusion([ranking[:depth] for ranking in rankings]):
+            key = str(row['id'])
+            if key in shown:
+                continue
+            if (-row_score, key) > (-score, last_id):
+                break
+            shown.add(key)
+    return [(score, row) for score, row in reciprocal_rank_fusion(rankings) if str(row['id']) not in shown]
+
+
+async def _run_strategy(pool, name: str, query: str, status: str, limit: int) -> StrategyResult:
+    started = time.perf_counter()
+    try:
+        rows = await STRATEGIES[name](pool, query, status, limit)
+    except Exception as e:
+        logger.warning("搜索方式 %s 失败: %s", name, e)
+        return StrategyResult(name, [], (time.perf_counter() - started) * 1000, e)
+
+    return StrategyResult(name, rows, (time.perf_counter() - started) * 1000)
+
+
+async def hybrid_search(
+    pool,
+    query: str,
+    status: str = "pending",
+    limit: int = FUSION_DEPTH,
+    strategies: Optional[List[str]] = None
+):
+    """
+    并发执行各搜索方式并融合结果
+
+    单个搜索方式失败不影响其他方式，全部失败时抛出第一个错误
+
+    Args:
+        limit: 每种搜索方式取回的行数 (融合后的总行数可能更多)
+        strategies: 参与的搜索方式，默认为全部已登记的方式
+
+    Returns:
+        tuple: ([(融合得分, 行), ...], [StrategyResult, ...])
+    """
+    names = strategies or list(STRATEGIES)
+    results = await asyncio.gather(*(
+        _run_strategy(pool, name, query, status, limit) for name in names
+    ))
+
+    failed = [r for r in results if r.error is not None]
+    if len(failed) == len(results):
+        raise failed[0].error
+
+    fused = reciprocal_rank_fusion([r.rows for r in results if r.error is None])
+    return fused, list(results)
+
+
+def format_timings(results: List[StrategyResult]) -> str:
+    """各搜索方式的耗时明细，例如 "fuzzy 3.1ms (5 条) · fulltext 2.4ms (3 条)" """
+    parts = []
+    for r in results:
+        if r.error is not None:
+            parts.append(f"{r.name} {r.elapsed_ms:.1f}ms (失败)")
+        else:
+            parts.append(f"{r.name} {r.elapsed_ms:.1f}ms ({len(r.rows)} 条)")
+    return " · ".join(parts)
@@ -3,25 +3,39 @@
 """
 
 from datetime import datetime
-from ..database import get_pending_memos
+from ..database import get_pending_memos, pending_cursor, InvalidCursor
+from ..tracing import phase
 
 
-async def handle(pool, args):
+async def handle(uow, args):
     """
     处理列出待办请求
 
     Args:
-        pool: 数据库连接池
-        args: {limit, category}
+        uow: 本次调用的执行上下文 (见 database/unit_of_work.py)
+        args: {limit, category, cursor}
 
     Returns:
-        str: 待办列表
+        str: 待办列表 (还有更多时末尾附 next_cursor)
     """
     limit = args.get("limit", 20)
     category = args.get("category", None)
+    cursor = args.get("cursor")
 
-    async with pool.acquire() as conn:
-        memos = await get_pending_memos(conn, limit, category)
+    try:
+        # 多取一条判断是否还有下一页
+        memos = await get_pending_memos(await uow.connection(), limit + 1, category, cursor)
+    except InvalidCursor:
+        return "❌ 无效的分页游标，请去掉 cursor 从第一页开始"
+
+    phase("render")
+    next_cursor = None
+    if len(memos) > limit:
+        memos = memos[:limit]
+        next_cursor = pending_cursor(memos[-1])
+
+    if not memos and cursor:
+        return "📋 没有更多待办了"
 
     if not memos:
         return """📋 当前没有待办任务
@@ -72,6 +86,9 @@ async def handle(pool, args):
         for memo in low_priority:
             response += format_memo(memo)
 
+    if next_cursor:
+        response += f"\n➡️ 还有更多待办，next_cursor: {next_cursor}"
+
     return response
 
 
@@ -99,7 +116,7 @@ def format_memo(memo):
     if memo['who']:
         response += f"\n   👥 {memo['who']}"
 
-    response += f"\n   🆔 {memo['id'][:8]}..."
+    response += f"\n   🆔 {str(memo['id'])[:8]}..."
 
     response += "\n"
     return response
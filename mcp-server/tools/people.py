@@ -0,0 +1,248 @@
+"""
+人名识别
+用历史备忘录中出现过的 who 取值 (及别名) 构建人名词典，
+以 Aho-Corasick 自动机一次线性扫描找出文本中提到的人
+"""
+
+import json
+import logging
+import re
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..database import get_people
+from ..database.config import PEOPLE_ALIASES_PATH, PEOPLE_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# who 中多人之间的分隔 ("Paul, Amy"、"张三、李四"、"Paul & Amy")
+_WHO_SEPARATOR_RE = re.compile(r'\s*(?:[,，、/&;；]|\band\b)\s*', re.IGNORECASE)
+
+# 词典未命中时的保守规则: 句中 (非句首) 的英文人名，以及 "老王"、"王总" 这类称呼
+_EN_NAME_RE = re.compile(r'(?<![A-Za-z])[A-Z][a-z]{2,}(?![A-Za-z])')
+_CN_TITLE_RE = re.compile(r'(?:给|和|跟|与|找|问|约|通知|提醒|@)([老小][一-鿿]|[一-鿿](?:总监|经理|老师|主任|总))')
+
+# 大写开头但不是人名的常见英文词
+_NOT_NAMES = frozenset("""
+    monday tuesday wednesday thursday friday saturday sunday
+    january february march april may june july august september october november december
+    today tomorrow tonight next this the review call email meeting report plan deck
+    send check update draft follow prepare team project
+""".split())
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class AhoCorasick:
+    """
+    多模式串匹配自动机
+
+    构建后扫描文本一次即可找出所有模式串的出现位置，
+    耗时与文本长度及命中数成正比，与词典大小无关
+    """
+
+    __slots__ = ('patterns', '_goto', '_fail', '_out')
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (index,)
+
+        # 广度优先计算失败指针，输出集合沿失败指针合并
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def iter(self, text: str):
+        """逐个产出 (起始位置, 结束位置, 模式串序号)，按结束位置排序"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for index in out[node]:
+                yield end - len(self.patterns[index]), end, index
+
+
+class PeopleLexicon:
+    """
+    人名词典 (名字/别名 -> 规范名)
+
+    启动时从数据库加载全部 who 取值，之后按 PEOPLE_REFRESH_SECONDS 增量刷新
+    (只取上次刷新之后有更新的行)；本进程新建备忘录时通过 add() 立即收录
+    """
+
+    def __init__(self, refresh_seconds: float = PEOPLE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._names: Dict[str, str] = {}    # 小写名字/别名 -> 规范名
+        self._matcher: Optional[AhoCorasick] = None
+        self._watermark = None              # 已加载到的最近 updated_at
+        self._refreshed_at = None           # 上次刷新的 monotonic 时间
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name: str):
+        return name.casefold() in self._names
+
+    def add_alias(self, alias: str, name: str, replace: bool = True):
+        """登记别名 (alias 命中时返回 name)，replace=False 时不覆盖已有的登记"""
+        alias = alias.strip()
+        if len(alias) < 2 or alias.casefold() in _NOT_NAMES:
+            return
+        key = alias.casefold()
+        if key in self._names and not replace:
+            return
+        if self._names.get(key) != name:
+            self._names[key] = name
+            self._matcher = None
+
+    def add(self, who: Optional[str]):
+        """收录一个 who 取值 (多人时逐个拆分)"""
+        if not who:
+            return
+        for name in _WHO_SEPARATOR_RE.split(who):
+            name = name.strip()
+            if len(name) < 2:
+                continue
+            self.add_alias(name, name)
+            parts = name.split()
+            if len(parts) > 1 and parts[0].isascii() and parts[0].isalpha():
+                # "Paul Chen" 也可以只写名 (已有单独的 "Paul" 时以其为准)
+                self.add_alias(parts[0], name, replace=False)
+
+    def load_aliases(self, path: Optional[str] = PEOPLE_ALIASES_PATH):
+        """读取别名文件 {"规范名": ["别名", ...]}"""
+        if not path:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                aliases = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("人名别名文件读取失败 %s: %s", path, e)
+            return
+        for name, names in aliases.items():
+            self.add(name)
+            for alias in names:
+                self.add_alias(alias, name)
+
+    async def refresh(self, conn) -> int:
+        """从数据库增量加载 who 取值，返回本次读到的行数"""
+        rows = await get_people(conn, self._watermark)
+        for row in rows:
+            self.add(row['who'])
+            if row['last_seen'] and (self._watermark is None or row['last_seen'] > self._watermark):
+                self._watermark = row['last_seen']
+        self._refreshed_at = time.monotonic()
+        return len(rows)
+
+    async def ensure_fresh(self, connection):
+        """
+        首次使用或超过刷新间隔时刷新 (数据库不可用时沿用现有词典)
+
+        Args:
+            connection: 返回连接的 async 函数 (例如 UnitOfWork.connection)，只在需要刷新时调用
+        """
+        if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        if self._refreshed_at is None and self._watermark is None:
+            self.load_aliases()
+        try:
+            conn = await connection()
+            # 调用方可能已开启事务，刷新失败只回滚到这里的保存点
+            async with conn.transaction():
+                await self.refresh(conn)
+        except Exception as e:
+            logger.warning("人名词典刷新失败: %s", e)
+            self._refreshed_at = time.monotonic()
+
+    def match(self, text: str) -> List[str]:
+        """
+        文本中提到的人 (规范名，按出现顺序去重)
+
+        重叠的命中取最左最长的一个；英文名要求前后不是字母数字，避免 "Al" 命中 "Also"
+        """
+        if not text or not self._names:
+            return []
+        if self._matcher is None:
+            self._matcher = AhoCorasick(self._names)
+
+        folded = text.casefold()
+        if len(folded) != len(text):
+            # 少数字符 casefold 后长度变化，退回逐字符小写以保持位置对应
+            folded = ''.join(ch.lower()[:1] or ch for ch in text)
+
+        hits = []
+        for start, end, index in self._matcher.iter(folded):
+            pattern = self._matcher.patterns[index]
+            if _is_word_char(pattern[0]) and start > 0 and _is_word_char(folded[start - 1]):
+                continue
+            if _is_word_char(pattern[-1]) and end < len(folded) and _is_word_char(folded[end]):
+                continue
+            hits.append((start, -end, pattern))
+        hits.sort()
+
+        people = []
+        covered = 0
+        for start, neg_end, pattern in hits:
+            if start < covered:
+                continue
+            covered = -neg_end
+            name = self._names[pattern]
+            if name not in people:
+                people.append(name)
+        return people
+
+
+def guess_people(text: str) -> List[str]:
+    """
+    词典未命中时的保守推断
+
+    - 非句首、大写开头的英文单词 ("给Paul发邮件" -> Paul，"Review Q3 plan" 不算)
+    - "给/和/跟..." 之后的 "老王"、"小李"、"王总"、"李经理"、"张老师" 等称呼
+    """
+    if not text:
+        return []
+
+    people = []
+    for m in _EN_NAME_RE.finditer(text):
+        if m.start() == 0 or m.group(0).lower() in _NOT_NAMES:
+            continue
+        if m.group(0) not in people:
+            people.append(m.group(0))
+
+    for m in _CN_TITLE_RE.finditer(text):
+        name = m.group(1)
+        if name not in people:
+            people.append(name)
+
+    return people
+
+
+people_lexicon = PeopleLexicon()
@@ -1,46 +1,88 @@
 """
-搜索备忘录工具 - 支持模糊语义搜索
+搜索备忘录工具 - 模糊、全文与语义搜索并发执行，融合排序
 """
 
-from ..database import search_memos, fuzzy_search_memos
+from ..database import SEMANTIC_AVAILABLE, cursor_kind, InvalidCursor
+from ..database.cursor import encode_cursor, decode_cursor
+from ..tracing import phase
+from .hybrid_search import hybrid_search, remaining_after, fusion_depth, format_timings, FUSION_DEPTH
 
 
-async def handle(pool, args):
+async def handle(uow, args):
     """
     处理搜索备忘录请求
 
+    mode=hybrid (默认) 并发执行全部搜索方式并按 RRF 融合 (见 hybrid_search.py)，
+    mode=semantic 只用本地语义索引；翻页时沿用游标对应的搜索方式。
+    每种方式取回的行数随页深加深 (见 fusion_depth)，最多各取 FUSION_DEPTH 条，
+    达到上限后更深的匹配不再返回，最后一页注明
+
     Args:
-        pool: 数据库连接池
-        args: {query, status, limit}
+        uow: 本次调用的执行上下文 (见 database/unit_of_work.py)
+        args: {query, status, limit, mode, cursor}
 
     Returns:
-        str: 搜索结果
+        str: 搜索结果 (还有更多时末尾附 next_cursor)
     """
     query = args.get("query", "")
     status = args.get("status", "pending")
     limit = args.get("limit", 10)
+    mode = args.get("mode", "hybrid")
+    cursor = args.get("cursor")
 
     if not query:
         return "❌ 请提供搜索关键词"
-
-    async with pool.acquire() as conn:
-        # 先尝试模糊搜索（更宽松）
-        keywords = query.split()
-        fuzzy_results = await fuzzy_search_memos(conn, keywords, status)
-
-        if not fuzzy_results:
-            # 如果模糊搜索无结果，尝试全文搜索
-            results = await search_memos(conn, query, status, limit)
-        else:
-            results = fuzzy_results
+    if mode not in ("hybrid", "semantic"):
+        return f"❌ 未知的搜索模式: {mode} (可选: hybrid, semantic)"
+    if mode == "semantic" and not SEMANTIC_AVAILABLE:
+        return "❌ 语义搜索需要安装 numpy"
+
+    try:
+        strategy = cursor_kind(cursor) if cursor else mode
+        if strategy not in ('hybrid', 'semantic'):
+            raise InvalidCursor(f"Unexpected cursor kind '{strategy}'")
+        shown, checkpoints = decode_fusion_cursor(cursor, strategy) if cursor else (0, [])
+    except InvalidCursor:
+        return "❌ 无效的分页游标，请去掉 cursor 重新搜索"
+
+    # 融合得分不是列，无法在数据库中按键翻页: 每种方式取回足够本页使用的前 depth 条 (多取一条判断是否还有下一页)，
+    # 融合后按游标中的检查点跳过已返回的行
+    # 各搜索方式各自从连接池取连接并发执行，本次调用不租用连接
+    depth = max(fusion_depth(shown + limit + 1), checkpoints[-1][0] if checkpoints else 0)
+    _, strategy_results = await hybrid_search(
+        uow.pool, query, status, depth,
+        strategies=['semantic'] if strategy == 'semantic' else None
+    )
+    remaining = remaining_after([r.rows for r in strategy_results if r.error is None], checkpoints)
+    timings = format_timings(strategy_results)
+    # 达到深度上限且有方式取满: 更深的匹配无法返回
+    truncated = depth == FUSION_DEPTH and any(len(r.rows) >= depth for r in strategy_results)
+
+    phase("render")
+    results = [row for _, row in remaining[:limit]]
+    next_cursor = None
+    if len(remaining) > limit:
+        score, last = remaining[limit - 1]
+        # 同一深度上只保留最后一个检查点
+        if checkpoints and checkpoints[-1][0] == depth:
+            checkpoints = checkpoints[:-1]
+        next_cursor = encode_cursor(strategy, [shown + limit] + checkpoints + [[depth, score, str(last['id'])]])
+
+    if not results and cursor:
+        if truncated:
+            return f"🔍 搜索 '{query}' 已返回每种搜索方式的前 {FUSION_DEPTH} 条匹配，请换用更具体的关键词"
+        return f"🔍 搜索 '{query}' 没有更多结果了"
 
     if not results:
-        return f"""🔍 搜索 '{query}' 未找到匹配的备忘录
+        response = f"""🔍 搜索 '{query}' 未找到匹配的备忘录
 
 💡 建议:
    - 尝试使用不同的关键词
    - 检查拼写是否正确
    - 使用 'status=all' 搜索所有状态的任务"""
+        if timings:
+            response += f"\n\n⏱️ {timings}"
+        return response
 
     # 格式化结果
     response = f"""🔍 搜索 '{query}' 的结果 (共 {len(results)} 项):
@@ -63,9 +105,42 @@ async def handle(pool, args):
 
         response += "\n"
 
+    if next_cursor:
+        response += f"\n➡️ 还有更多结果，next_cursor: {next_cursor}"
+    elif truncated:
+        response += f"\n⚠️ 只融合了每种搜索方式的前 {FUSION_DEPTH} 条匹配，更多结果请换用更具体的关键词"
+
+    if timings:
+        response += f"\n⏱️ {timings}"
+
     return response
 
 
+def decode_fusion_cursor(cursor: str, strategy: str):
+    """
+    解析混合/语义搜索的游标
+
+    Returns:
+        tuple: (已返回的行数, [[深度, 得分, id], ...])
+
+    Raises:
+        InvalidCursor: 游标损坏或结构不符
+    """
+    key = decode_cursor(cursor, strategy)
+    if not key or not isinstance(key[0], int) or key[0] < 0:
+        raise InvalidCursor("Invalid cursor")
+    checkpoints = key[1:]
+    depths = []
+    for point in checkpoints:
+        if not (isinstance(point, list) and len(point) == 3 and isinstance(point[0], int)
+                and isinstance(point[1], float) and isinstance(point[2], str)):
+            raise InvalidCursor("Invalid cursor")
+        depths.append(point[0])
+    if not checkpoints or depths != sorted(set(depths)) or depths[-1] > FUSION_DEPTH:
+        raise InvalidCursor("Invalid cursor")
+    return key[0], checkpoints
+
+
 def get_priority_icon(priority):
     """获取优先级图标"""
     icons = {
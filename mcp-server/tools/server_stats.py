@@ -0,0 +1,34 @@
+"""
+服务指标工具
+"""
+
+import json
+
+from ..metrics import metrics
+
+
+async def handle(uow, args):
+    """
+    处理服务指标请求 (只读取进程内统计，不租用数据库连接)
+
+    Args:
+        uow: 本次调用的执行上下文 (见 database/unit_of_work.py)
+        args: {format, reset}
+
+    Returns:
+        str: 各工具的调用次数、错误、延迟分位数、数据库耗时与返回行数，以及语句和连接池统计
+    """
+    output_format = args.get("format", "text")
+
+    if output_format == "prometheus":
+        result = metrics.format_prometheus()
+    elif output_format == "json":
+        result = json.dumps(metrics.snapshot(), ensure_ascii=False, indent=2)
+    else:
+        result = metrics.format_text()
+
+    if args.get("reset", False):
+        metrics.reset()
+        if output_format == "text":
+            result += "\n\n(统计已清零)"
+    return result
@@ -0,0 +1,404 @@
+"""
+时间表达式解析
+把 "下周五"、"明天上午10点"、"3小时后"、"next Monday 3pm"、"10/25" 等中英文表达解析为 datetime
+
+所有规则在导入时编译为一个正则，解析时只做一次 finditer;
+解析结果按 (表达式, 参考日期) 缓存，同一天内重复出现的表达式不再重新解析
+"""
+
+import re
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# 只有日期没有时刻时的默认时间
+DEFAULT_TIME = time(9, 30)
+
+PARSE_CACHE_SIZE = 2048
+
+# 只有时段没有时刻时的默认时间 ("明天下午" -> 15:00)
+PERIOD_DEFAULT_TIME = {
+    'am': time(9, 0),
+    'noon': time(12, 0),
+    'pm': time(15, 0),
+    'evening': time(18, 0),
+    'night': time(20, 0),
+    'dawn': time(6, 0),
+}
+
+_PERIODS = {
+    '上午': 'am', '早上': 'am', '早晨': 'am', '今早': 'am', '明早': 'am', 'morning': 'am',
+    '中午': 'noon', 'noon': 'noon',
+    '下午': 'pm', 'afternoon': 'pm',
+    '傍晚': 'evening', 'evening': 'evening',
+    '晚上': 'night', '夜里': 'night', '今晚': 'night', '明晚': 'night',
+    'tonight': 'night', 'night': 'night',
+    '凌晨': 'dawn',
+}
+
+_RELATIVE_DAYS = {
+    '今天': 0, '今日': 0, '今早': 0, '今晚': 0, 'today': 0, 'tonight': 0,
+    '明天': 1, '明日': 1, '明早': 1, '明晚': 1, 'tomorrow': 1,
+    '后天': 2, 'day after tomorrow': 2,
+    '大后天': 3,
+}
+
+_WEEKDAYS = {
+    '一': 0, '二': 1, '三': 2, '四': 3, '五': 4, '六': 5, '日': 6, '天': 6,
+    '1': 0, '2': 1, '3': 2, '4': 3, '5': 4, '6': 5, '7': 6,
+    'monday': 0, 'mon': 0, 'tuesday': 1, 'tue': 1, 'tues': 1,
+    'wednesday': 2, 'wed': 2, 'thursday': 3, 'thu': 3, 'thur': 3, 'thurs': 3,
+    'friday': 4, 'fri': 4, 'saturday': 5, 'sat': 5, 'sunday': 6, 'sun': 6,
+}
+
+_MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+_UNITS = {
+    '分钟': 'minutes', '分': 'minutes', 'minute': 'minutes', 'min': 'minutes',
+    '小时': 'hours', '钟头': 'hours', 'hour': 'hours', 'hr': 'hours',
+    '天': 'days', '日': 'days', 'day': 'days',
+    '周': 'weeks', '星期': 'weeks', '礼拜': 'weeks', 'week': 'weeks',
+}
+
+_CN_DIGITS = {'零': 0, '〇': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4,
+              '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+
+# 全角数字与冒号转为半角 (逐字符替换，不改变长度，匹配位置可直接映射回原文)
+_HALFWIDTH = str.maketrans('０１２３４５６７８９：', '0123456789:')
+
+_CN_NUM = r'[零〇一二两三四五六七八九十]{1,3}'
+_NUM = rf'(?:\d{{1,2}}|{_CN_NUM})'
+_PERIOD = '|'.join(sorted((p for p in _PERIODS if not p.isascii()), key=len, reverse=True))
+_EN_WEEKDAY = '|'.join(sorted((w for w in _WEEKDAYS if w.isalpha() and w.isascii()), key=len, reverse=True))
+_EN_MONTH = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?'
+             r'|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)')
+
+# 英文单词边界 (不用 \b: 中文字符也算 \w，"明天3pm" 中的 3 前面没有 \b)
+_WB = r'(?<![a-z])'
+_WE = r'(?![a-z])'
+
+# (记号类型, 规则)，按顺序尝试，较长的写法放在前面
+_GRAMMAR = [
+    ('ymd', r'(?P<ymd_y>\d{4})\s*[-/.年]\s*(?P<ymd_m>\d{1,2})\s*[-/.月]\s*(?P<ymd_d>\d{1,2})\s*[日号]?'),
+    ('md', rf'(?P<md_m>{_NUM})\s*月\s*(?P<md_d>{_NUM})\s*[日号]?'),
+    ('md_num', r'(?<![\d/])(?P<mdn_m>\d{1,2})/(?P<mdn_d>\d{1,2})(?:/(?P<mdn_y>\d{4}))?(?![\d/])'),
+    ('month_en', rf'{_WB}(?P<men_m>{_EN_MONTH})\.?\s+(?P<men_d>\d{{1,2}})(?:st|nd|rd|th)?{_WE}'),
+    ('en_month', rf'(?<!\d)(?P<enm_d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<enm_m>{_EN_MONTH}){_WE}'),
+    ('offset', rf'(?P<off_n>\d+|{_CN_NUM}|半)\s*个?\s*(?P<off_u>分钟|小时|钟头|天|周|星期|礼拜)\s*(?:以后|之后|后)'),
+    ('offset_en', rf'{_WB}in\s+(?P<offen_n>\d+|an?|half\s+an?)\s+(?P<offen_u>minute|min|hour|hr|day|week)s?{_WE}'),
+    ('offset_en_later', rf'(?<!\d)(?P<offl_n>\d+)\s*(?P<offl_u>minute|min|hour|hr|day|week)s?\s+(?:later|from\s+now){_WE}'),
+    ('month_end', rf'月底|月末|{_WB}end\s+of\s+(?:the\s+)?month{_WE}'),
+    ('weekday', rf'(?P<wd_p>下下|下个?|这个?|本|上个?)?\s*(?:周|星期|礼拜)(?P<wd_d>[一二三四五六日天1-7])'),
+    ('week', r'(?P<wk_p>下下|下个?)\s*(?:周|星期|礼拜)'),
+    ('weekday_en', rf'{_WB}(?:(?P<wden_p>next|this)\s+)?(?P<wden_d>{_EN_WEEKDAY}){_WE}'),
+    ('week_en', rf'{_WB}next\s+week{_WE}'),
+    ('day', r'大后天|后天|明天|明日|今天|今日'),
+    ('day_period', r'今早|明早|今晚|明晚'),
+    ('day_en', rf'{_WB}(?:(?:the\s+)?day\s+after\s+tomorrow|tomorrow|today|tonight){_WE}'),
+    ('clock', r'(?<!\d)(?P<clk_h>\d{1,2}):(?P<clk_m>\d{2})(?:\s*(?P<clk_ap>[ap])\.?m(?![a-z])\.?)?'),
+    ('clock_cn', rf'(?P<cn_period>{_PERIOD})?\s*(?P<cn_h>{_NUM})\s*[点點时](?:\s*(?P<cn_m>半|一刻|三刻|\d{{1,2}}|{_CN_NUM})\s*分?)?'),
+    ('clock_en', r'(?<!\d)(?P<en_h>\d{1,2})(?::(?P<en_m>\d{2}))?\s*(?P<en_ap>[ap])\.?m(?![a-z])\.?'),
+    # "at 9" / "at 15" (带 am/pm 或冒号分钟的写法由上面两条规则处理)
+    ('clock_at', rf'{_WB}at\s+(?P<at_h>\d{{1,2}})(?![\d:]|\s*[ap]\.?m(?![a-z]))'),
+    ('noon_en', rf'{_WB}(?:noon|midnight){_WE}'),
+    ('period', rf'{_PERIOD}|{_WB}(?:(?:this\s+)?(?:morning|afternoon|evening)|night){_WE}'),
+]
+
+_TOKEN_RE = re.compile('|'.join(f'(?P<{kind}>{rule})' for kind, rule in _GRAMMAR), re.IGNORECASE)
+
+# 相邻记号之间允许出现的连接内容 (extract_time_hint 据此把相邻记号合并为一个表达式)
+_JOINER_RE = re.compile(r'(?:\s|的|,|，|at|on|by)*\Z', re.IGNORECASE)
+
+
+class _Plan(NamedTuple):
+    """
+    一个表达式的解析结果 (与当前时刻无关，可缓存)
+
+    value: 绝对时间，或 relative 为 True 时相对当前时刻的偏移
+    roll: 算出的时间已过去时顺延的间隔 ("3点" 顺延一天，"周五" 顺延一周)
+    """
+    value: object
+    relative: bool = False
+    roll: Optional[timedelta] = None
+
+
+def cn_number(text: str) -> int:
+    """
+    阿拉伯数字或 0-99 的中文数字转为整数
+
+    Examples:
+        "10" -> 10, "十" -> 10, "十二" -> 12, "二十三" -> 23, "两" -> 2
+    """
+    if text.isdigit():
+        return int(text)
+    if '十' in text:
+        tens, _, ones = text.partition('十')
+        return (_CN_DIGITS[tens] if tens else 1) * 10 + (_CN_DIGITS[ones] if ones else 0)
+    value = 0
+    for ch in text:
+        value = value * 10 + _CN_DIGITS[ch]
+    return value
+
+
+def _month_number(name: str) -> int:
+    return _MONTHS[name[:3].lower()]
+
+
+def _unit(name: str) -> str:
+    name = name.lower()
+    return _UNITS[name.rstrip('s') if name.isascii() else name]
+
+
+def _offset(count: str, unit: str) -> timedelta:
+    count = count.lower()
+    if count == '半' or count.startswith('half'):
+        amount = 0.5
+    elif count in ('a', 'an'):
+        amount = 1
+    else:
+        amount = cn_number(count)
+    return timedelta(**{unit: amount})
+
+
+def _hour_in_period(hour: int, period: Optional[str]) -> int:
+    """把 12 小时制的时刻按时段换算为 24 小时制"""
+    if period in ('pm', 'evening', 'night') and hour < 12:
+        return hour + 12
+    if period == 'noon' and hour < 11:
+        return hour + 12
+    if period in ('am', 'dawn') and hour == 12:
+        return 0
+    return hour
+
+
+class _State:
+    """逐个记号累积的解析状态"""
+
+    __slots__ = ('day', 'weekly', 'offset', 'period', 'hour', 'minute', 'dated', 'bare_hour')
+
+    def __init__(self):
+        self.day = None          # 已确定的日期
+        self.weekly = False      # 日期来自不带前缀的星期几 (已过去时顺延一周)
+        self.offset = None       # 相对当前时刻的偏移 (N 小时/分钟后)
+        self.period = None       # 时段 am / pm / ...
+        self.hour = None
+        self.minute = 0
+        self.dated = False       # 是否给出了日期
+        self.bare_hour = False   # 中文 "N点" 且没有任何时段词
+
+
+def _apply(state: _State, kind: str, m: re.Match, today: date):
+    """把一个记号应用到解析状态上"""
+    g = m.group
+
+    if kind == 'ymd':
+        state.day = date(int(g('ymd_y')), int(g('ymd_m')), int(g('ymd_d')))
+    elif kind == 'md_num' and g('mdn_y'):
+        state.day = date(int(g('mdn_y')), int(g('mdn_m')), int(g('mdn_d')))
+    elif kind in ('md', 'md_num', 'month_en', 'en_month'):
+        if kind == 'md':
+            month, day = cn_number(g('md_m')), cn_number(g('md_d'))
+        elif kind == 'md_num':
+            month, day = int(g('mdn_m')), int(g('mdn_d'))
+        elif kind == 'month_en':
+            month, day = _month_number(g('men_m')), int(g('men_d'))
+        else:
+            month, day = _month_number(g('enm_m')), int(g('enm_d'))
+        # 没有年份: 取今天及以后最近的一次
+        result = date(today.year, month, day)
+        state.day = result if result >= today else date(today.year + 1, month, day)
+    elif kind in ('offset', 'offset_en', 'offset_en_later'):
+        prefix = {'offset': 'off', 'offset_en': 'offen', 'offset_en_later': 'offl'}[kind]
+        delta = _offset(g(f'{prefix}_n'), _unit(g(f'{prefix}_u')))
+        if delta < timedelta(days=1):
+            state.offset = delta
+            return
+        state.day = today + delta
+    elif kind == 'month_end':
+        state.day = today.replace(day=monthrange(today.year, today.month)[1])
+    elif kind in ('weekday', 'weekday_en'):
+        prefix = g('wd_p') if kind == 'weekday' else g('wden_p')
+        weekday = _WEEKDAYS[(g('wd_d') if kind == 'weekday' else g('wden_d')).lower()]
+        monday = today - timedelta(days=today.weekday())
+        prefix = prefix.lower().rstrip('个') if prefix else None
+        weeks = {'下下': 2, '下': 1, 'next': 1, '上': -1}.get(prefix, 0)
+        if weeks == 0:
+            # 不带前缀或 "这周五"/"本周五"/"this friday": 今天及以后最近的一次，已过去时顺延一周
+            state.day = today + timedelta(days=(weekday - today.weekday()) % 7)
+            state.weekly = True
+        else:
+            state.day = monday + timedelta(weeks=weeks, days=weekday)
+    elif kind in ('week', 'week_en'):
+        weeks = 2 if kind == 'week' and g('wk_p').startswith('下下') else 1
+        state.day = today - timedelta(days=today.weekday()) + timedelta(weeks=weeks)
+    elif kind in ('day', 'day_period', 'day_en'):
+        text = ' '.join(m.group(kind).lower().split())
+        text = text[4:] if text.startswith('the ') else text
+        state.day = today + timedelta(days=_RELATIVE_DAYS[text])
+        state.period = _PERIODS.get(text, state.period)
+    elif kind == 'clock':
+        state.hour, state.minute = int(g('clk_h')), int(g('clk_m'))
+        if g('clk_ap'):
+            state.period = 'am' if g('clk_ap').lower() == 'a' else 'pm'
+    elif kind == 'clock_cn':
+        if g('cn_period'):
+            state.period = _PERIODS[g('cn_period')]
+        state.hour = cn_number(g('cn_h'))
+        state.bare_hour = True
+        minute = g('cn_m')
+        state.minute = {None: 0, '半': 30, '一刻': 15, '三刻': 45}.get(minute)
+        if state.minute is None:
+            state.minute = cn_number(minute)
+    elif kind == 'clock_at':
+        state.hour, state.minute = int(g('at_h')), 0
+        state.bare_hour = True
+    elif kind == 'clock_en':
+        state.hour, state.minute = int(g('en_h')), int(g('en_m') or 0)
+        state.period = 'am' if g('en_ap').lower() == 'a' else 'pm'
+    elif kind == 'noon_en':
+        state.hour, state.minute = (12, 0) if m.group(kind).lower() == 'noon' else (0, 0)
+        state.period = None
+    elif kind == 'period':
+        text = ' '.join(m.group(kind).lower().split())
+        state.period = _PERIODS[text[5:] if text.startswith('this ') else text]
+
+    if kind not in ('clock', 'clock_cn', 'clock_en', 'clock_at', 'noon_en', 'period'):
+        state.dated = True
+
+
+def _resolve(state: _State, today: date) -> Optional[_Plan]:
+    """把解析状态换算为 _Plan"""
+    if state.offset is not None:
+        return _Plan(state.offset, relative=True)
+
+    if state.hour is not None:
+        hour = state.hour
+        if state.bare_hour and state.period is None and 1 <= hour < 8:
+            # 不带时段的 "3点" 按工作时间理解为下午
+            hour += 12
+        at = time(_hour_in_period(hour, state.period), state.minute)
+    elif state.period is not None:
+        at = PERIOD_DEFAULT_TIME[state.period]
+    elif state.dated:
+        at = DEFAULT_TIME
+    else:
+        return None
+
+    if not state.dated:
+        # 只有时刻: 今天，已过去则顺延到明天
+        return _Plan(datetime.combine(today, at), roll=timedelta(days=1))
+    if state.weekly:
+        return _Plan(datetime.combine(state.day, at), roll=timedelta(weeks=1))
+    return _Plan(datetime.combine(state.day, at))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _compile(expression: str, today: date) -> Optional[_Plan]:
+    """解析表达式 (结果只依赖表达式与参考日期，按二者缓存)"""
+    text = expression.strip().translate(_HALFWIDTH)
+
+    if len(text) > 10:
+        # 带时刻的 ISO 8601 (纯日期走下面的规则，使用默认时间)
+        try:
+            return _Plan(datetime.fromisoformat(text.replace('Z', '+00:00')))
+        except ValueError:
+            pass
+
+    state = _State()
+    matched = False
+    for m in _TOKEN_RE.finditer(text):
+        try:
+            _apply(state, m.lastgroup, m, today)
+        except (ValueError, KeyError):
+            # 不存在的日期 (2月30日) 或超出范围的数字
+            return None
+        matched = True
+
+    if not matched:
+        return None
+    try:
+        return _resolve(state, today)
+    except ValueError:
+        # 超出范围的时刻 (25点)
+        return None
+
+
+def parse_time_expression(expression: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    解析时间表达式
+
+    Args:
+        expression: 时间表达式，例如 "下周五"、"明天上午10点"、"3小时后"、"next Monday 3pm"、ISO 8601
+        now: 参考时刻，默认为当前时间
+
+    Returns:
+        datetime，无法解析时返回 None
+    """
+    if not expression:
+        return None
+    now = now or datetime.now()
+
+    plan = _compile(expression, now.date())
+    if plan is None:
+        return None
+    if plan.relative:
+        return now + plan.value
+
+    result = plan.value
+    if plan.roll and result <= now:
+        result += plan.roll
+    return result
+
+
+def _is_weak(m: re.Match) -> bool:
+    """
+    单独出现时容易误判的记号: 中文数字时刻 ("快一点")、英文星期缩写 ("the sun")、分数 ("完成1/2")、
+    不带 am/pm 的 "at N" ("look at 3 options")
+    """
+    if m.lastgroup == 'clock_at':
+        return True
+    if m.lastgroup == 'md_num':
+        return not m.group('mdn_y')
+    if m.lastgroup == 'clock_cn':
+        return not m.group('cn_period') and not m.group('cn_h').isdigit()
+    if m.lastgroup == 'weekday_en':
+        return not m.group('wden_p') and len(m.group('wden_d')) <= 4
+    return False
+
+
+def find_time_expression(text: str) -> Optional[str]:
+    """
+    在一段文本中找出第一个时间表达式 (原文片段)
+
+    相邻的记号 (例如 "明天" + "下午3点") 合并为一个表达式;
+    只由易误判记号组成的片段不视为时间 (见 _is_weak)
+    """
+    if not text:
+        return None
+    normalized = text.translate(_HALFWIDTH)
+
+    start = end = None
+    weak = True
+    for m in _TOKEN_RE.finditer(normalized):
+        if start is not None and not _JOINER_RE.match(normalized, end, m.start()):
+            if not weak:
+                break
+            start = None
+        if start is None:
+            start, weak = m.start(), True
+        end = m.end()
+        if not _is_weak(m):
+            weak = False
+
+    if start is None or weak:
+        return None
+    return text[start:end]
+
+
+def cache_info():
+    """解析缓存的命中统计"""
+    return _compile.cache_info()
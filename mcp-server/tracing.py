@@ -0,0 +1,261 @@
+"""
+工具调用追踪
+每次工具调用一条 trace: 根 span 为工具调用，其下有租用连接 (acquire)、处理器 (handler)，
+处理器内有每条语句 (query，由语句观察者记录)、解析 (parse) 与格式化输出 (render)
+
+追踪写到本地目录，不需要外部收集器:
+
+    MEMO_TRACE_DIR=/var/tmp/memo-traces     开启追踪
+    MEMO_TRACE_SAMPLE=0.1                   抽样比例 (默认全部)
+    MEMO_TRACE_CHROME_MS=250                耗时超过该值 (ms) 的调用另存一份 Chrome trace-event 文件
+
+- traces-YYYYMMDD.jsonl: 每行一条 trace (各 span 相对调用开始的偏移与耗时)
+- <时间>-<工具>-<trace_id>.trace.json: 可直接在 chrome://tracing 或 Perfetto 中打开；
+  JSONL 中的任意一条也可以用 scripts/trace_to_chrome.py 转换
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_DIR = os.getenv("MEMO_TRACE_DIR")
+TRACE_SAMPLE = float(os.getenv("MEMO_TRACE_SAMPLE", "1"))
+TRACE_CHROME_MS = float(os.getenv("MEMO_TRACE_CHROME_MS", "250"))
+
+
+class Span:
+    """一个 span (时间为 perf_counter 秒)"""
+
+    __slots__ = ('name', 'parent', 'start', 'end', 'task', 'attrs')
+
+    def __init__(self, name: str, parent: Optional[int], start: float, task: int, attrs: dict):
+        self.name = name
+        self.parent = parent
+        self.start = start
+        self.end = None
+        self.task = task
+        self.attrs = attrs
+
+
+# 当前 span 在 trace.spans 中的下标，按任务隔离: asyncio.gather 等创建的子任务复制创建时的上下文，
+# 各自在其中打开的 span 互不影响，语句也记到各自任务的当前 span 下
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('memo_current_span', default=None)
+
+
+def _task_id() -> int:
+    task = asyncio.current_task()
+    return id(task) if task is not None else 0
+
+
+class Trace:
+    """一次工具调用的全部 span，spans[0] 为根"""
+
+    def __init__(self, tool: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.tool = tool
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        # 父 span -> 其下尚未结束的阶段 (phase)
+        self._phases: Dict[int, int] = {}
+
+    def open(self, name: str, **attrs) -> int:
+        """打开一个 span，父 span 为当前任务的当前 span (根 span 没有父)；调用方负责把它设为当前 span"""
+        parent = _current_span.get() if self.spans else None
+        self.spans.append(Span(name, parent, time.perf_counter(), _task_id(), attrs))
+        return len(self.spans) - 1
+
+    def close(self, index: int):
+        phase = self._phases.pop(index, None)
+        now = time.perf_counter()
+        if phase is not None:
+            self.spans[phase].end = now
+        self.spans[index].end = now
+
+    def add(self, name: str, start: float, end: float, **attrs):
+        """记录一个已经结束的 span (例如语句观察者收到的查询)"""
+        span = Span(name, _current_span.get(), start, _task_id(), attrs)
+        span.end = end
+        self.spans.append(span)
+
+    def phase(self, name: str):
+        """在当前 span 下开始一个阶段，持续到下一个阶段开始或当前 span 结束"""
+        parent = _current_span.get()
+        if parent is None:
+            return
+        now = time.perf_counter()
+        previous = self._phases.get(parent)
+        if previous is not None:
+            self.spans[previous].end = now
+        self.spans.append(Span(name, parent, now, _task_id(), {}))
+        self._phases[parent] = len(self.spans) - 1
+
+    @property
+    def duration_ms(self) -> float:
+        root = self.spans[0]
+        return ((root.end or time.perf_counter()) - root.start) * 1000
+
+    def to_dict(self) -> dict:
+        """JSONL 记录: 各 span 相对根 span 开始的偏移 (ms)；tid 区分并发执行的任务"""
+        origin = self.spans[0].start
+        tids: Dict[int, int] = {}
+        spans = []
+        for index, span in enumerate(self.spans):
+            tid = tids.setdefault(span.task, len(tids) + 1)
+            end = span.end if span.end is not None else span.start
+            spans.append({
+                'id': index,
+                'parent': span.parent,
+                'name': span.name,
+                'start_ms': round((span.start - origin) * 1000, 3),
+                'duration_ms': round((end - span.start) * 1000, 3),
+                'tid': tid,
+                **({'attrs': span.attrs} if span.attrs else {})
+            })
+        return {
+            'trace_id': self.trace_id,
+            'tool': self.tool,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='microseconds'),
+            'duration_ms': round(self.duration_ms, 3),
+            'error': self.spans[0].attrs.get('error'),
+            'spans': spans
+        }
+
+
+def chrome_events(record: dict) -> List[dict]:
+    """把一条 JSONL 记录转换为 Chrome trace-event ("X" 完整事件，时间单位 µs)"""
+    base_us = datetime.fromisoformat(record['started_at']).timestamp() * 1e6
+    pid = int(record['trace_id'][:6], 16)
+    events = [{
+        'name': 'process_name', 'ph': 'M', 'pid': pid,
+        'args': {'name': f"{record['tool']} {record['trace_id']}"}
+    }]
+    for span in record['spans']:
+        attrs = span.get('attrs', {})
+        name = span['name'] if 'statement' not in attrs else f"{span['name']} {attrs['statement']}"
+        events.append({
+            'name': name,
+            'cat': span['name'],
+            'ph': 'X',
+            'ts': round(base_us + span['start_ms'] * 1000, 1),
+            'dur': round(span['duration_ms'] * 1000, 1),
+            'pid': pid,
+            'tid': span['tid'],
+            'args': attrs
+        })
+    return events
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('memo_current_trace', default=None)
+
+
+class Tracer:
+    """按 TRACE_DIR / TRACE_SAMPLE 记录并导出工具调用的 trace"""
+
+    def __init__(self, trace_dir: Optional[str] = TRACE_DIR, sample: float = TRACE_SAMPLE,
+                 chrome_ms: float = TRACE_CHROME_MS):
+        self.trace_dir = trace_dir
+        self.sample = sample
+        self.chrome_ms = chrome_ms
+        self._database = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.trace_dir)
+
+    def bind(self, database):
+        """登记语句观察者，把每条语句记为当前 trace 的 query span"""
+        if self._database is None:
+            self._database = database
+            database.observe(self._on_statement)
+
+    @staticmethod
+    def _on_statement(name, sql, args, elapsed_ms, rows, failed):
+        trace = _current_trace.get()
+        if trace is not None:
+            end = time.perf_counter()
+            trace.add("query", end - elapsed_ms / 1000, end, statement=name, rows=rows, failed=failed)
+
+    @contextlib.contextmanager
+    def trace(self, tool: str):
+        """
+        追踪一次工具调用 (未开启或未抽中时返回 None)
+
+            with tracer.trace("complete_memo") as trace:
+                ...
+        """
+        if not self.enabled or random.random() >= self.sample:
+            yield None
+            return
+
+        trace = Trace(tool)
+        root = trace.open("tool", tool=tool)
+        token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.spans[root].attrs['error'] = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(token)
+            trace.close(root)
+            self.export(trace)
+
+    def export(self, trace: Trace):
+        """追加到当天的 JSONL 文件；慢调用另存 Chrome trace-event 文件 (写失败只记录日志)"""
+        record = trace.to_dict()
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            day = datetime.fromtimestamp(trace.started_at).strftime("%Y%m%d")
+            with open(os.path.join(self.trace_dir, f"traces-{day}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+            if record['duration_ms'] >= self.chrome_ms:
+                stamp = datetime.fromtimestamp(trace.started_at).strftime("%Y%m%dT%H%M%S")
+                path = os.path.join(self.trace_dir, f"{stamp}-{trace.tool}-{trace.trace_id}.trace.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump({'traceEvents': chrome_events(record), 'displayTimeUnit': 'ms'},
+                              f, ensure_ascii=False, default=str)
+                logger.info("慢调用 %s %.1fms，trace: %s", trace.tool, record['duration_ms'], path)
+        except OSError as e:
+            logger.warning("trace 写入失败: %s", e)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """在当前 trace 中记录一个 span (没有进行中的 trace 时不做任何事)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    index = trace.open(name, **attrs)
+    token = _current_span.set(index)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+        trace.close(index)
+
+
+def phase(name: str):
+    """
+    在当前 span 下开始一个阶段 (例如处理器末尾的 render)，持续到下一个阶段开始或当前 span 结束
+    没有进行中的 trace 时不做任何事
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.phase(name)
+
+
+tracer = Tracer()
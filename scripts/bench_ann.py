@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+语义近似索引 (IVF) 召回率与延迟基准 (不访问数据库)
+
+    python scripts/bench_ann.py              # 默认 300000 条合成备忘录
+    python scripts/bench_ann.py 1000000
+
+对每个 nprobe 输出 recall@10 与单次查询延迟，并与精确搜索对比。
+recall 按得分计: 近似结果中得分不低于精确第 10 名的比例 (同分的不同行都算命中)
+"""
+
+import os
+import random
+import sys
+import time
+import uuid
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'mcp-server'))
+
+from database.semantic import SemanticIndex
+
+K = 10
+NPROBES = (1, 2, 4, 8, 16, 32, 64)
+QUERY_COUNT = 200
+
+# 合成词表: 随机汉字双字词与英文音节词
+_HAN = [chr(code) for code in range(0x4e00, 0x4e00 + 3000)]
+_SYLLABLES = ["ka", "lo", "mi", "ter", "pro", "ven", "dra", "sel", "qua", "rix", "ton", "bel", "cor", "nu"]
+
+
+def vocabulary(rng: random.Random, size: int = 8000):
+    words = set()
+    while len(words) < size:
+        if rng.random() < 0.6:
+            words.add(rng.choice(_HAN) + rng.choice(_HAN))
+        else:
+            words.add(''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))))
+    return sorted(words)
+
+
+def sentence(rng: random.Random, words) -> str:
+    # 按 Zipf 分布取词，常用词更常出现
+    return ' '.join(words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)] for _ in range(rng.randint(3, 7)))
+
+
+def synthetic_memos(count: int, words, seed: int = 42):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            'id': uuid.UUID(int=rng.getrandbits(128)),
+            'what': sentence(rng, words),
+            'who': None,
+            'context': sentence(rng, words) if rng.random() < 0.3 else None,
+            'status': 'pending',
+        }
+
+
+def timed(fn, queries):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(fn(query))
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return results, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+
+def main(count: int):
+    rng = random.Random(7)
+    words = vocabulary(rng)
+    index = SemanticIndex(ann_min_rows=count + 1)   # 先不训练，单独计时
+
+    started = time.perf_counter()
+    index.load(list(synthetic_memos(count, words)))
+    print(f"加载 {count} 条: {time.perf_counter() - started:.1f}s, 矩阵 {index.size_bytes / 1e6:.1f} MB")
+
+    index.ann_min_rows = 1
+    started = time.perf_counter()
+    index._train_ann()
+    print(f"训练 IVF: {time.perf_counter() - started:.1f}s, {index._ann.nlist} 簇")
+
+    queries = [sentence(rng, words) for _ in range(QUERY_COUNT)]
+    exact, p50, p95 = timed(lambda q: index.search(q, 'pending', K, exact=True), queries)
+    print(f"\n{'方式':>10} {'recall@10':>10} {'P50 ms':>8} {'P95 ms':>8}")
+    print(f"{'exact':>10} {1.0:>10.3f} {p50:>8.2f} {p95:>8.2f}")
+
+    for nprobe in NPROBES:
+        index.nprobe = nprobe
+        approx, p50, p95 = timed(lambda q: index.search(q, 'pending', K), queries)
+        hits = total = 0
+        for truth, got in zip(exact, approx):
+            if not truth:
+                continue
+            threshold = truth[-1][1] - 1e-6
+            hits += sum(1 for _, score in got if score >= threshold)
+            total += len(truth)
+        recall = hits / total if total else 1.0
+        print(f"{f'nprobe={nprobe}':>10} {recall:>10.3f} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300000)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+本地语义索引基准测试 (不访问数据库)
+
+    python scripts/bench_semantic.py              # 默认 200000 条合成备忘录
+    python scripts/bench_semantic.py 500000
+
+输出: 整体加载耗时、矩阵内存、单次查询延迟 (P50 / P95) 与增量写入耗时
+"""
+
+import os
+import random
+import sys
+import time
+import uuid
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'mcp-server'))
+
+from database.semantic import SemanticIndex
+
+VERBS = ["准备", "提交", "审核", "讨论", "跟进", "整理", "发送", "确认", "Review", "Update", "Send", "Draft"]
+OBJECTS = ["季度报告", "招标文件", "预算表", "合同", "演示文稿", "会议纪要", "产品路线图", "客户反馈",
+           "Q3 plan", "pricing deck", "launch checklist", "hiring pipeline"]
+PEOPLE = ["Paul", "Amy", "张伟", "李娜", "王总", "Zed", "老陈", None]
+QUERIES = ["招标", "季度报告 Paul", "预算审核", "pricing", "会议纪要 李娜", "launch", "合同确认", "客户反馈跟进"]
+
+
+def synthetic_memos(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            'id': uuid.UUID(int=rng.getrandbits(128)),
+            'what': f"{rng.choice(VERBS)}{rng.choice(OBJECTS)} #{i}",
+            'who': rng.choice(PEOPLE),
+            'context': rng.choice(OBJECTS) if rng.random() < 0.3 else None,
+            'status': 'pending' if rng.random() < 0.4 else 'completed',
+            'version': 1,
+        }
+
+
+def main(count: int):
+    index = SemanticIndex()
+
+    started = time.perf_counter()
+    index.load(list(synthetic_memos(count)))
+    load_s = time.perf_counter() - started
+    print(f"加载 {count} 条: {load_s:.1f}s ({load_s / count * 1e6:.1f} µs/条), "
+          f"矩阵 {index.size_bytes / 1e6:.1f} MB")
+
+    latencies = []
+    for _ in range(10):
+        for query in QUERIES:
+            started = time.perf_counter()
+            index.search(query, 'pending', 10)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"查询 ({len(latencies)} 次): P50 {p50:.2f} ms, P95 {p95:.2f} ms")
+
+    extra = list(synthetic_memos(1000, seed=7))
+    started = time.perf_counter()
+    for memo in extra:
+        index.upsert(memo)
+    print(f"增量写入: {(time.perf_counter() - started) / len(extra) * 1e6:.1f} µs/条")
+
+    print("\n示例: 招标")
+    for memo_id, score in index.search("招标", 'pending', 3):
+        print(f"  {memo_id[:8]}  {score:.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+MCP Server 冷启动基准 (需要可用的数据库配置，与正式运行相同的环境变量)
+
+    python scripts/bench_startup.py              # 默认启动 5 次
+    python scripts/bench_startup.py 10
+
+每次启动一个新的 `python -m mcp_server.server` 子进程，经 stdio 完成 MCP 握手后调用一次 list_pending，
+输出握手完成与第一次工具调用返回的耗时 (P50 / 最大)，以及服务端日志中的启动耗时明细
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _send(proc, message: dict):
+    proc.stdin.write((json.dumps(message) + "\n").encode())
+    proc.stdin.flush()
+
+
+def _receive(proc, request_id: int) -> dict:
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError("server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def run_once(env: dict) -> tuple:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "mcp_server.server"],
+        cwd=project_root, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        _send(proc, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "bench_startup", "version": "1"}
+        }})
+        _receive(proc, 1)
+        handshake_ms = (time.perf_counter() - started) * 1000
+
+        _send(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _send(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                     "params": {"name": "list_pending", "arguments": {"limit": 1}}})
+        _receive(proc, 2)
+        first_call_ms = (time.perf_counter() - started) * 1000
+    finally:
+        # 关闭标准输入触发平滑退出
+        proc.stdin.close()
+        proc.wait(timeout=30)
+
+    timings = [line for line in proc.stderr.read().decode(errors="replace").splitlines() if "启动耗时" in line]
+    return handshake_ms, first_call_ms, timings[-1] if timings else ""
+
+
+def main(runs: int):
+    env = dict(os.environ)
+    # 与其他脚本一致，从项目根目录导入 mcp_server (可通过 PYTHONPATH 指向其他位置)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [env.get("PYTHONPATH"), project_root]))
+    # 服务端在 INFO 级别输出启动耗时明细
+    env.setdefault("MEMO_LOG_LEVEL", "INFO")
+
+    handshakes, first_calls = [], []
+    last_timings = ""
+    for _ in range(runs):
+        handshake_ms, first_call_ms, last_timings = run_once(env)
+        handshakes.append(handshake_ms)
+        first_calls.append(first_call_ms)
+
+    for name, values in (("握手完成", handshakes), ("首次调用返回", first_calls)):
+        values.sort()
+        print(f"{name:>8}: P50 {values[len(values) // 2]:.0f}ms  最大 {values[-1]:.0f}ms")
+    if last_timings:
+        print(f"\n服务端启动明细: {last_timings}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+时间表达式解析的黄金用例与基准测试
+
+    python scripts/bench_time_parser.py            # 黄金用例 + 基准
+    python scripts/bench_time_parser.py --check    # 只跑黄金用例 (失败时退出码为 1)
+
+参考时刻固定为 2026-10-14 (周三) 11:00 (GOLDEN_SUNDAY 为 2026-10-18 周日)，结果与运行日期无关
+"""
+
+import os
+import sys
+import timeit
+from datetime import datetime
+
+# timeexpr 不依赖其他模块，直接从 tools 目录导入
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'mcp-server', 'tools'))
+
+from timeexpr import parse_time_expression, find_time_expression, cache_info, _compile
+
+NOW = datetime(2026, 10, 14, 11, 0)
+
+# (表达式, 期望结果 "YYYY-MM-DD HH:MM"，None 表示无法解析)
+GOLDEN = [
+    # 中文相对日期 / 时刻
+    ("今天", "2026-10-14 09:30"),
+    ("明天", "2026-10-15 09:30"),
+    ("后天", "2026-10-16 09:30"),
+    ("大后天", "2026-10-17 09:30"),
+    ("明天上午10点", "2026-10-15 10:00"),
+    ("明天下午3点半", "2026-10-15 15:30"),
+    ("明天下午三点一刻", "2026-10-15 15:15"),
+    ("今晚8点", "2026-10-14 20:00"),
+    ("明晚", "2026-10-15 20:00"),
+    ("中午1点", "2026-10-14 13:00"),
+    ("凌晨两点", "2026-10-15 02:00"),
+    ("10点", "2026-10-15 10:00"),
+    ("3点", "2026-10-14 15:00"),
+    ("下午", "2026-10-14 15:00"),
+    ("14:30", "2026-10-14 14:30"),
+    ("１０点", "2026-10-15 10:00"),
+    # 中文星期
+    ("周五", "2026-10-16 09:30"),
+    ("周三", "2026-10-21 09:30"),
+    ("星期天", "2026-10-18 09:30"),
+    ("这周一", "2026-10-19 09:30"),
+    ("这周三", "2026-10-21 09:30"),
+    ("这周三下午", "2026-10-14 15:00"),
+    ("上周一", "2026-10-05 09:30"),
+    ("下周五", "2026-10-23 09:30"),
+    ("下个星期二下午", "2026-10-20 15:00"),
+    ("下下周二", "2026-10-27 09:30"),
+    ("下周", "2026-10-19 09:30"),
+    ("周五下午三点", "2026-10-16 15:00"),
+    # 中文日期与偏移
+    ("10月20日", "2026-10-20 09:30"),
+    ("1月5号", "2027-01-05 09:30"),
+    ("十二月一日", "2026-12-01 09:30"),
+    ("2026年11月3日 下午2点", "2026-11-03 14:00"),
+    ("月底", "2026-10-31 09:30"),
+    ("3小时后", "2026-10-14 14:00"),
+    ("半小时后", "2026-10-14 11:30"),
+    ("两天后", "2026-10-16 09:30"),
+    ("一周后", "2026-10-21 09:30"),
+    # 英文
+    ("today", "2026-10-14 09:30"),
+    ("tomorrow 3pm", "2026-10-15 15:00"),
+    ("tomorrow at 9:30am", "2026-10-15 09:30"),
+    ("tomorrow at 9", "2026-10-15 09:00"),
+    ("tomorrow at 3", "2026-10-15 15:00"),
+    ("friday at 15", "2026-10-16 15:00"),
+    ("at 3pm", "2026-10-14 15:00"),
+    ("next monday at 10:15", "2026-10-19 10:15"),
+    ("the day after tomorrow", "2026-10-16 09:30"),
+    ("tonight", "2026-10-14 20:00"),
+    ("noon", "2026-10-14 12:00"),
+    ("friday", "2026-10-16 09:30"),
+    ("next Monday", "2026-10-19 09:30"),
+    ("next monday 3pm", "2026-10-19 15:00"),
+    ("this Friday afternoon", "2026-10-16 15:00"),
+    ("next week", "2026-10-19 09:30"),
+    ("in 2 hours", "2026-10-14 13:00"),
+    ("in an hour", "2026-10-14 12:00"),
+    ("3 days later", "2026-10-17 09:30"),
+    ("Jan 25", "2027-01-25 09:30"),
+    ("25th of December 5pm", "2026-12-25 17:00"),
+    ("end of month", "2026-10-31 09:30"),
+    # 数字日期
+    ("10/25", "2026-10-25 09:30"),
+    ("1/5", "2027-01-05 09:30"),
+    ("10/25 3pm", "2026-10-25 15:00"),
+    ("10/25 下午2点", "2026-10-25 14:00"),
+    ("12/31/2026", "2026-12-31 09:30"),
+    ("2026/10/25", "2026-10-25 09:30"),
+    ("2026.10.25", "2026-10-25 09:30"),
+    ("2027年1月8日", "2027-01-08 09:30"),
+    # ISO 8601
+    ("2026-12-01", "2026-12-01 09:30"),
+    ("2026/12/01 14:00", "2026-12-01 14:00"),
+    ("2026-12-01T10:00:00", "2026-12-01 10:00"),
+    # 无法解析
+    ("2月30日", None),
+    ("25点", None),
+    ("hello", None),
+    ("13/25", None),
+    ("asap", None),
+    ("", None),
+]
+
+# 参考时刻为周日 (本周的其他日子都已过去)
+NOW_SUNDAY = datetime(2026, 10, 18, 11, 0)
+
+GOLDEN_SUNDAY = [
+    ("这周五", "2026-10-23 09:30"),
+    ("本周五", "2026-10-23 09:30"),
+    ("this friday", "2026-10-23 09:30"),
+    ("周五", "2026-10-23 09:30"),
+    ("这周日下午", "2026-10-18 15:00"),
+    ("下周一", "2026-10-19 09:30"),
+]
+
+# (文本, 期望提取出的时间片段)
+GOLDEN_HINTS = [
+    ("明天下午3点给Paul发邮件", "明天下午3点"),
+    ("下周五之前提交季度报告", "下周五"),
+    ("10月20日 上午9点 开会", "10月20日 上午9点"),
+    ("Review Q3 deck by Friday 5pm", "Friday 5pm"),
+    ("Call Bob tomorrow at 10am", "tomorrow at 10am"),
+    ("快一点完成报告", None),
+    ("讨论3个方案", None),
+    ("the sun is up", None),
+    ("10/25 3pm 交报告", "10/25 3pm"),
+    ("完成1/2的工作", None),
+    ("Call Bob tomorrow at 9", "tomorrow at 9"),
+    ("look at 3 options", None),
+]
+
+BENCH_EXPRESSIONS = [expr for expr, _ in GOLDEN if expr]
+
+
+def check() -> int:
+    """运行黄金用例，返回失败数"""
+    failures = 0
+
+    for cases, now in ((GOLDEN, NOW), (GOLDEN_SUNDAY, NOW_SUNDAY)):
+        for expr, expected in cases:
+            result = parse_time_expression(expr, now)
+            got = result.strftime("%Y-%m-%d %H:%M") if result else None
+            if got != expected:
+                failures += 1
+                print(f"[FAIL] {expr!r} ({now:%a}): 期望 {expected}，实际 {got}")
+
+    for text, expected in GOLDEN_HINTS:
+        got = find_time_expression(text)
+        if got != expected:
+            failures += 1
+            print(f"[FAIL] hint {text!r}: 期望 {expected!r}，实际 {got!r}")
+
+    total = len(GOLDEN) + len(GOLDEN_SUNDAY) + len(GOLDEN_HINTS)
+    print(f"黄金用例: {total - failures}/{total} 通过")
+    return failures
+
+
+def bench(number: int = 2000):
+    """冷解析 (每次清空缓存) 与缓存命中的单次耗时"""
+    def cold():
+        for expr in BENCH_EXPRESSIONS:
+            _compile.cache_clear()
+            parse_time_expression(expr, NOW)
+
+    def warm():
+        for expr in BENCH_EXPRESSIONS:
+            parse_time_expression(expr, NOW)
+
+    def hint():
+        for text, _ in GOLDEN_HINTS:
+            find_time_expression(text)
+
+    calls = number * len(BENCH_EXPRESSIONS)
+    for name, fn, count in (
+        ("冷解析", cold, calls),
+        ("缓存命中", warm, calls),
+        ("提取时间片段", hint, number * len(GOLDEN_HINTS)),
+    ):
+        fn()
+        elapsed = min(timeit.repeat(fn, number=number, repeat=3))
+        print(f"{name:8} {elapsed / count * 1e6:8.2f} µs/次  ({count} 次)")
+
+    print(f"缓存: {cache_info()}")
+
+
+if __name__ == "__main__":
+    failed = check()
+    if "--check" not in sys.argv:
+        print()
+        bench()
+    sys.exit(1 if failed else 0)
@@ -7,13 +7,13 @@
 import asyncio
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from zoneinfo import ZoneInfo
 
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from mcp_server.database import get_pool
+from mcp_server.database import get_pool, get_daily_memos
 
 
 async def generate_daily_report():
@@ -21,47 +21,24 @@ async def generate_daily_report():
     print("📊 正在生成每日报告...")
 
     try:
-        pool = await get_pool()
+        # 报告走 batch 连接池，不占用交互式工具调用的连接
+        pool = await get_pool("batch")
 
         # 获取当前时间（上海时区）
         tz = ZoneInfo("Asia/Shanghai")
         now = datetime.now(tz)
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
 
-        # 获取今日数据
+        # 获取今日数据 (单次查询返回全部分组)
         async with pool.acquire() as conn:
-            # 今日待办
-            pending_rows = await conn.fetch("""
-                SELECT what, when_due, priority, who
-                FROM memos
-                WHERE status = 'pending'
-                  AND when_due >= $1
-                  AND when_due < $2
-                ORDER BY priority DESC, when_due ASC
-            """, today_start, today_end)
-
-            # 逾期任务
-            overdue_rows = await conn.fetch("""
-                SELECT what, when_due, who
-                FROM memos
-                WHERE status = 'pending'
-                  AND when_due < $1
-                ORDER BY when_due ASC
-            """, now)
-
-            # 今日已完成
-            completed_rows = await conn.fetch("""
-                SELECT what, completed_at
-                FROM memos
-                WHERE status = 'completed'
-                  AND completed_at >= $1
-                  AND completed_at < $2
-                ORDER BY completed_at DESC
-            """, today_start, today_end)
+            report_data = await get_daily_memos(conn, now, now=now)
 
         # 格式化报告
-        report = format_report(now, pending_rows, overdue_rows, completed_rows)
+        report = format_report(
+            now,
+            report_data['pending'],
+            report_data['overdue'],
+            report_data['completed']
+        )
 
         # 保存到文件
         report_file = os.path.join(
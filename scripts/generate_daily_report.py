@@ -49,20 +49,16 @@ def generate_daily_report():
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     today_end = today_start + timedelta(days=1)
 
-    # 查询所有待办任务
-    pending_response = supabase.table('memos').select('*').eq('status', 'pending').order('when_due').execute()
-    pending = pending_response.data
-
-    # 逾期任务
-    overdue_response = supabase.table('memos').select('*').eq('status', 'pending').lt('when_due', now.isoformat()).order('when_due').execute()
-    overdue = overdue_response.data
-
-    # 今日已完成
-    completed_response = supabase.table('memos').select('*').eq('status', 'completed').gte('completed_at', today_start.isoformat()).lt('completed_at', today_end.isoformat()).order('completed_at', desc=True).execute()
-    completed = completed_response.data
+    # 单次 RPC 返回全部分组 (见 supabase_config/migrations/003_memo_daily_report.sql)
+    report_response = supabase.rpc('memo_daily_report', {
+        'p_day_start': today_start.isoformat(),
+        'p_day_end': today_end.isoformat(),
+        'p_now': now.isoformat()
+    }).execute()
+    sections = report_response.data
 
     # 格式化报告
-    report = format_report(now, pending, overdue, completed, tz)
+    report = format_report(now, sections, tz)
 
     # 保存到文件
     report_file = "daily_report.md"
@@ -70,13 +66,17 @@ def generate_daily_report():
         f.write(report)
 
     print(f"[OK] Daily report generated: {report_file}")
-    print(f"[INFO] Pending: {len(pending)}, Overdue: {len(overdue)}, Completed: {len(completed)}")
+    print(f"[INFO] Overdue: {len(sections['overdue'])}, Today: {len(sections['pending'])}, "
+          f"Upcoming: {len(sections['upcoming'])}, Completed: {len(sections['completed'])}")
 
     return report
 
 
-def format_report(now, pending, overdue, completed, tz):
+def format_report(now, sections, tz):
     """格式化 Markdown 报告"""
+    overdue = sections['overdue']
+    completed = sections['completed']
+
     date_str = now.strftime('%Y年%m月%d日')
     weekday = now.strftime('%A')
 
@@ -105,23 +105,13 @@ def format_report(now, pending, overdue, completed, tz):
 
 """
 
-    # 分类待办任务：无时间 vs 有时间
-    urgent_tasks = []  # 无时间的（立即启动）
-    today_tasks = []    # 今天的任务
-    future_tasks = []   # 未来的任务
-
-    for task in pending:
-        due_str = task.get('when_due')
-        if not due_str:
-            urgent_tasks.append(task)
-        else:
-            due = date_parser.isoparse(due_str).astimezone(tz)
-            due_date = due.date()
-
-            if due_date == now.date():
-                today_tasks.append((task, due))
-            else:
-                future_tasks.append((task, due))
+    # 待办任务分组已由 memo_daily_report 完成：无时间 / 今天 / 未来
+    urgent_tasks = sections['unscheduled']  # 无时间的（立即启动）
+    today_tasks = [(task, date_parser.isoparse(task['when_due']).astimezone(tz))
+                   for task in sections['pending']]
+    future_tasks = [(task, date_parser.isoparse(task['when_due']).astimezone(tz))
+                    for task in sections['upcoming']]
+    pending_count = len(urgent_tasks) + len(today_tasks) + len(future_tasks)
 
     # 立即启动任务
     if urgent_tasks:
@@ -140,9 +130,6 @@ def format_report(now, pending, overdue, completed, tz):
         report += f"""## Today's Tasks ({len(today_tasks)} items)
 
 """
-        # 按时间排序
-        today_tasks.sort(key=lambda x: x[1])
-
         for task, due in today_tasks:
             priority_icon = "[HIGH]" if task.get('priority') == 'high' else "[NORMAL]"
             report += f"{priority_icon} **{due.strftime('%H:%M')}** - {task['what']}\n"
@@ -155,9 +142,6 @@ def format_report(now, pending, overdue, completed, tz):
         report += f"""## Upcoming Tasks ({len(future_tasks)} items)
 
 """
-        # 按时间排序
-        future_tasks.sort(key=lambda x: x[1])
-
         for task, due in future_tasks:
             priority_icon = "[HIGH]" if task.get('priority') == 'high' else "[NORMAL]"
             date_str = due.strftime('%m-%d')
@@ -186,12 +170,12 @@ def format_report(now, pending, overdue, completed, tz):
         report += "No completed tasks yet\n"
 
     # 统计
-    total_pending = len(pending) + len(overdue)
+    total_pending = pending_count + len(overdue)
     report += f"""
 ---
 
 ## Summary
-- Pending: {len(pending)}
+- Pending: {pending_count}
 - Overdue: {len(overdue)}
 - Completed: {len(completed)}
 - Total: {total_pending + len(completed)}
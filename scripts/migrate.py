@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本
+按版本号顺序执行 supabase_config/migrations/ 下尚未应用的 SQL 文件
+
+用法:
+    python scripts/migrate.py           # 应用所有未执行的迁移
+    python scripts/migrate.py --status  # 仅查看迁移状态
+"""
+
+import asyncio
+import os
+import sys
+
+import asyncpg
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+MIGRATIONS_DIR = os.path.join(project_root, "supabase_config", "migrations")
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    try:
+        from supabase_config.config import DATABASE_URL
+    except ImportError:
+        pass
+
+
+def list_migrations():
+    """列出迁移文件 [(version, filename)]，按版本号排序"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not filename.endswith(".sql"):
+            continue
+        version = filename.split("_", 1)[0]
+        migrations.append((version, filename))
+    return migrations
+
+
+async def migrate(status_only=False):
+    """执行迁移"""
+    if not DATABASE_URL:
+        raise ValueError("DATABASE_URL is not configured")
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(20) PRIMARY KEY,
+                filename TEXT NOT NULL,
+                applied_at TIMESTAMPTZ DEFAULT NOW()
+            )
+        """)
+
+        rows = await conn.fetch("SELECT version FROM schema_migrations")
+        applied = {row['version'] for row in rows}
+
+        pending = [(v, f) for v, f in list_migrations() if v not in applied]
+
+        print(f"📋 已应用迁移: {len(applied)} 个, 待执行: {len(pending)} 个")
+        if status_only:
+            for version, filename in pending:
+                print(f"   ⏳ {filename}")
+            return
+
+        for version, filename in pending:
+            with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+                sql = f.read()
+
+            print(f"🔧 正在执行 {filename} ...")
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute("""
+                    INSERT INTO schema_migrations (version, filename)
+                    VALUES ($1, $2)
+                """, version, filename)
+            print(f"✅ {filename} 完成")
+
+        print("\n✅ 数据库已是最新版本")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate(status_only="--status" in sys.argv))
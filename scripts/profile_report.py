@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+汇总 MCP Server 的处理器剖析结果 (MEMO_PROFILE_DIR 下的 .pstats 与 .collapsed 文件)，输出热点函数
+
+    python scripts/profile_report.py /var/tmp/memo-profiles
+    python scripts/profile_report.py /var/tmp/memo-profiles --tool list_pending --top 30
+    python scripts/profile_report.py /var/tmp/memo-profiles --sort tottime --merged all.collapsed
+
+- .pstats (cProfile): 合并后按累计耗时 (或 --sort 指定的列) 输出前 N 个函数
+- .collapsed (采样): 合并各文件的折叠栈，按自身采样数 (函数位于栈顶) 与总采样数 (函数出现在栈中) 输出前 N 个函数；
+  --merged 另存合并后的折叠栈，可交给 flamegraph.pl 或 speedscope 生成火焰图
+"""
+
+import argparse
+import glob
+import os
+import pstats
+import sys
+from collections import Counter
+
+
+def profile_files(directory: str, tool: str, suffix: str):
+    pattern = f"*-{tool}-*.{suffix}" if tool else f"*.{suffix}"
+    return sorted(glob.glob(os.path.join(directory, pattern)))
+
+
+def report_pstats(files, sort: str, top: int):
+    stats = pstats.Stats(files[0], stream=sys.stdout)
+    for path in files[1:]:
+        stats.add(path)
+    print(f"== cProfile: {len(files)} 次调用 ==")
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+
+def report_collapsed(files, top: int, merged_path: str = None):
+    stacks = Counter()
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    stacks[stack] += int(count)
+
+    self_samples = Counter()
+    total_samples = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        # 递归调用在同一个栈中只计一次
+        for frame in set(frames):
+            total_samples[frame] += count
+    samples = sum(stacks.values())
+
+    print(f"== 采样: {len(files)} 次调用，{samples} 个样本 ==")
+    print(f"{'自身':>8} {'总计':>8}  函数")
+    for frame, count in self_samples.most_common(top):
+        print(f"{count / samples:>8.1%} {total_samples[frame] / samples:>8.1%}  {frame}")
+
+    if merged_path:
+        with open(merged_path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"\n合并的折叠栈已写入 {merged_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", help="剖析结果目录 (MEMO_PROFILE_DIR)")
+    parser.add_argument("--tool", help="只汇总该工具的调用")
+    parser.add_argument("--top", type=int, default=20, help="输出前 N 个函数 (默认 20)")
+    parser.add_argument("--sort", default="cumulative", help="pstats 排序列 (默认 cumulative，可选 tottime、ncalls 等)")
+    parser.add_argument("--merged", help="把合并后的折叠栈写到该文件")
+    args = parser.parse_args()
+
+    pstats_files = profile_files(args.directory, args.tool, "pstats")
+    collapsed_files = profile_files(args.directory, args.tool, "collapsed")
+    if not pstats_files and not collapsed_files:
+        sys.exit("没有找到剖析结果")
+
+    if pstats_files:
+        report_pstats(pstats_files, args.sort, args.top)
+    if collapsed_files:
+        report_collapsed(collapsed_files, args.top, args.merged)
+
+
+if __name__ == "__main__":
+    main()
@@ -67,7 +67,7 @@ async def test_list_pending():
     rows = await conn.fetch("""
         SELECT * FROM memos
         WHERE status = 'pending'
-        ORDER BY priority DESC, when_due ASC
+        ORDER BY priority_rank DESC, when_due ASC NULLS LAST
         LIMIT 10
     """)
 
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+SQLite 后端的时区测试
+在非 UTC 时区 (默认 Asia/Shanghai，可用 TZ 覆盖) 下检查不带时区的 when_due 按本地时间存储:
+一小时前到期的待办应出现在逾期列表与早报的逾期分组中，一小时后到期的不应出现
+
+    python scripts/test_sqlite_timezone.py
+    TZ=America/New_York python scripts/test_sqlite_timezone.py
+
+失败时退出码为 1
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# 时区与存储后端必须在导入 database 之前设置
+os.environ.setdefault("TZ", "Asia/Shanghai")
+time.tzset()
+os.environ["MEMO_STORAGE_BACKEND"] = "sqlite"
+os.environ["MEMO_SQLITE_PATH"] = ":memory:"
+os.environ["MEMO_CACHE_ENABLED"] = "false"
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'mcp-server'))
+
+from database import get_pool, close_pool, create_memo, get_overdue_memos, get_daily_memos
+
+
+async def main() -> int:
+    failures = 0
+
+    def check(label: str, ok: bool):
+        nonlocal failures
+        print(f"[{'OK' if ok else 'FAIL'}] {label}")
+        if not ok:
+            failures += 1
+
+    now = datetime.now().replace(microsecond=0)
+    pool = await get_pool()
+    try:
+        async with pool.acquire() as conn:
+            past = await create_memo(conn, what="时区测试 一小时前到期", when_due=now - timedelta(hours=1), who="Paul")
+            future = await create_memo(conn, what="时区测试 一小时后到期", when_due=now + timedelta(hours=1), who="Paul")
+
+            check("when_due 读回后与写入的本地时间相同",
+                  past['when_due'].astimezone().replace(tzinfo=None) == now - timedelta(hours=1))
+
+            overdue = {str(memo['id']) for memo in await get_overdue_memos(conn)}
+            check("一小时前到期的待办出现在逾期列表", str(past['id']) in overdue)
+            check("一小时后到期的待办不在逾期列表", str(future['id']) not in overdue)
+
+            report = await get_daily_memos(conn, now, now)
+            check("早报逾期分组只包含一小时前到期的待办",
+                  [item['what'] for item in report['overdue']] == ["时区测试 一小时前到期"])
+    finally:
+        await close_pool()
+
+    print(f"TZ={os.environ['TZ']}: {'通过' if not failures else f'{failures} 项失败'}")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(main()) else 0)
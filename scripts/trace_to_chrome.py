@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+把 MCP Server 写出的 trace (MEMO_TRACE_DIR 下的 traces-*.jsonl) 转换为 Chrome trace-event 文件
+
+    python scripts/trace_to_chrome.py /var/tmp/memo-traces                  # 最慢的 20 次调用
+    python scripts/trace_to_chrome.py /var/tmp/memo-traces --tool complete_memo --top 5
+    python scripts/trace_to_chrome.py traces-20261018.jsonl --id 3f9a0c1d2e4b5a6c -o slow.json
+
+输出文件可在 chrome://tracing 或 https://ui.perfetto.dev 中打开，每次调用显示为一个进程，
+并发执行的查询 (例如混合搜索) 显示在不同的线程上；同时在终端列出所选调用各阶段的耗时
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'mcp-server'))
+
+from tracing import chrome_events
+
+
+def load(path: str):
+    files = sorted(glob.glob(os.path.join(path, "traces-*.jsonl"))) if os.path.isdir(path) else [path]
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def summarize(record: dict) -> str:
+    """例如 "complete_memo 2010.3ms: acquire 1.2ms · query 1950.0ms · render 0.4ms" """
+    totals = {}
+    for span in record['spans']:
+        if span['parent'] is not None:
+            totals[span['name']] = totals.get(span['name'], 0.0) + span['duration_ms']
+    parts = " · ".join(f"{name} {ms:.1f}ms" for name, ms in totals.items())
+    error = f" ({record['error']})" if record.get('error') else ""
+    return f"{record['started_at']} {record['tool']} {record['duration_ms']:.1f}ms{error}: {parts}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="trace 目录或 JSONL 文件")
+    parser.add_argument("--tool", help="只选该工具的调用")
+    parser.add_argument("--id", help="只选该 trace_id")
+    parser.add_argument("--top", type=int, default=20, help="按耗时取最慢的前 N 次 (默认 20)")
+    parser.add_argument("-o", "--output", default="trace.json", help="输出文件 (默认 trace.json)")
+    args = parser.parse_args()
+
+    records = [
+        r for r in load(args.path)
+        if (not args.tool or r['tool'] == args.tool) and (not args.id or r['trace_id'] == args.id)
+    ]
+    if not records:
+        sys.exit("没有匹配的 trace")
+    records.sort(key=lambda r: r['duration_ms'], reverse=True)
+    records = records[:args.top]
+
+    events = []
+    for record in records:
+        events.extend(chrome_events(record))
+        print(summarize(record))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    print(f"\n已写入 {args.output} ({len(records)} 次调用)")
+
+
+if __name__ == "__main__":
+    main()
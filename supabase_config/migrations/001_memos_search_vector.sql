@@ -0,0 +1,69 @@
+-- 迁移 001: 存储式全文搜索向量
+-- 将 search_memos 从逐行 to_tsvector('english', ...) 改为读取预计算的 search_vector 列
+-- 中文按相邻双字 (bigram) 切分, 英文沿用 english 词干, 无需 zhparser 等扩展
+
+-- 中文双字切分: "给老板做演示" -> "给老 老板 板做 做演 演示"
+-- 非汉字字符原样保留, 单个汉字保留为单字
+CREATE OR REPLACE FUNCTION memo_cjk_tokens(input TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    result TEXT := '';
+    prev TEXT := '';
+    run_len INTEGER := 0;
+    ch TEXT;
+BEGIN
+    IF input IS NULL THEN
+        RETURN '';
+    END IF;
+
+    FOR i IN 1..char_length(input) LOOP
+        ch := substr(input, i, 1);
+        IF ch ~ '[㐀-䶿一-鿿豈-﫿]' THEN
+            IF run_len > 0 THEN
+                result := result || ' ' || prev || ch;
+            END IF;
+            prev := ch;
+            run_len := run_len + 1;
+        ELSE
+            IF run_len = 1 THEN
+                result := result || ' ' || prev;
+            END IF;
+            IF run_len > 0 THEN
+                result := result || ' ';
+            END IF;
+            run_len := 0;
+            result := result || ch;
+        END IF;
+    END LOOP;
+
+    IF run_len = 1 THEN
+        result := result || ' ' || prev;
+    END IF;
+
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT PARALLEL SAFE;
+
+-- 中英混合检索配置 (拉丁字母走 english 词干, 汉字双字原样入库)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'memo_cjk') THEN
+        CREATE TEXT SEARCH CONFIGURATION memo_cjk (COPY = english);
+    END IF;
+END
+$$;
+
+-- 生成列: 写入时计算一次, 查询时直接走 GIN 索引
+ALTER TABLE memos
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('memo_cjk', memo_cjk_tokens(what)), 'A') ||
+        setweight(to_tsvector('memo_cjk', memo_cjk_tokens(COALESCE(who, ''))), 'B') ||
+        setweight(to_tsvector('memo_cjk', memo_cjk_tokens(COALESCE(context, ''))), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_memos_search_vector
+ON memos USING GIN(search_vector);
+
+-- 旧的表达式索引不再被任何查询使用
+DROP INDEX IF EXISTS idx_memos_fulltext;
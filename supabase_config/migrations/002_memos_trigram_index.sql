@@ -0,0 +1,9 @@
+-- 迁移 002: 模糊搜索三元组索引
+-- fuzzy_search_memos 的 ILIKE '%关键词%' 与相似度排序均可走 GIN 索引
+-- 注意: 少于 3 个字符的关键词无法提取三元组, 仍会退化为索引全扫描
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 索引表达式必须与 queries.fuzzy_search_memos 中的 MEMO_TRGM_TEXT 完全一致
+CREATE INDEX IF NOT EXISTS idx_memos_what_who_trgm
+ON memos USING GIN((what || ' ' || COALESCE(who, '')) gin_trgm_ops);
@@ -0,0 +1,57 @@
+-- 迁移 003: 每日早报单次查询
+-- memo_daily_report 一次返回早报所需的全部分组 (JSONB)，只投影展示用到的列
+-- asyncpg: SELECT memo_daily_report($1, $2, $3)
+-- REST:    supabase.rpc('memo_daily_report', {...})
+--
+-- 返回结构 (各分组互不重叠):
+--   overdue     - 待办且 when_due < p_now
+--   pending     - 待办且 p_now <= when_due < p_day_end (今日剩余)
+--   upcoming    - 待办且 when_due >= p_day_end
+--   unscheduled - 待办且无截止时间
+--   completed   - 当日 [p_day_start, p_day_end) 内完成
+
+CREATE INDEX IF NOT EXISTS idx_memos_completed_at
+ON memos(completed_at) WHERE status = 'completed';
+
+CREATE OR REPLACE FUNCTION memo_daily_report(
+    p_day_start TIMESTAMPTZ,
+    p_day_end TIMESTAMPTZ,
+    p_now TIMESTAMPTZ DEFAULT NOW()
+)
+RETURNS JSONB AS $$
+    WITH report_rows AS (
+        SELECT what, who, priority, when_due, NULL::TIMESTAMPTZ AS completed_at, status
+        FROM memos
+        WHERE status = 'pending'
+        UNION ALL
+        SELECT what, who, priority, when_due, completed_at, status
+        FROM memos
+        WHERE status = 'completed'
+          AND completed_at >= p_day_start
+          AND completed_at < p_day_end
+    ),
+    items AS (
+        SELECT status, when_due, completed_at,
+               jsonb_build_object(
+                   'what', what,
+                   'who', who,
+                   'priority', priority,
+                   'when_due', when_due,
+                   'completed_at', completed_at
+               ) AS item
+        FROM report_rows
+    )
+    SELECT jsonb_build_object(
+        'overdue', COALESCE(jsonb_agg(item ORDER BY when_due)
+            FILTER (WHERE status = 'pending' AND when_due < p_now), '[]'::jsonb),
+        'pending', COALESCE(jsonb_agg(item ORDER BY when_due)
+            FILTER (WHERE status = 'pending' AND when_due >= p_now AND when_due < p_day_end), '[]'::jsonb),
+        'upcoming', COALESCE(jsonb_agg(item ORDER BY when_due)
+            FILTER (WHERE status = 'pending' AND when_due >= p_day_end), '[]'::jsonb),
+        'unscheduled', COALESCE(jsonb_agg(item)
+            FILTER (WHERE status = 'pending' AND when_due IS NULL), '[]'::jsonb),
+        'completed', COALESCE(jsonb_agg(item ORDER BY completed_at DESC)
+            FILTER (WHERE status = 'completed'), '[]'::jsonb)
+    )
+    FROM items;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,50 @@
+-- 迁移 004: 备忘录变更通知 (LISTEN/NOTIFY)
+-- 多个 MCP Server 实例共用同一数据库时，各实例通过 memo_changes 频道
+-- 收到变更事件，据此让进程内缓存失效，无需轮询 memos 表
+--
+-- 载荷 (JSON): {"op": "INSERT|UPDATE|DELETE", "id": "...", "status": "...", "version": n}
+
+ALTER TABLE memos ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- 每次更新版本号 +1
+CREATE OR REPLACE FUNCTION memo_bump_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version = OLD.version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_memos_version ON memos;
+CREATE TRIGGER bump_memos_version
+    BEFORE UPDATE ON memos
+    FOR EACH ROW
+    EXECUTE FUNCTION memo_bump_version();
+
+CREATE OR REPLACE FUNCTION memo_notify_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    memo RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        memo := OLD;
+    ELSE
+        memo := NEW;
+    END IF;
+
+    PERFORM pg_notify('memo_changes', json_build_object(
+        'op', TG_OP,
+        'id', memo.id,
+        'status', memo.status,
+        'version', memo.version
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_memos_change ON memos;
+CREATE TRIGGER notify_memos_change
+    AFTER INSERT OR UPDATE OR DELETE ON memos
+    FOR EACH ROW
+    EXECUTE FUNCTION memo_notify_change();
@@ -0,0 +1,13 @@
+-- 迁移 005: 分页游标 (keyset 分页) 的复合索引
+-- list_pending / search_memos 返回 next_cursor，下一页从上一页最后一行的排序键之后继续，
+-- 以下索引与查询的 ORDER BY 一致，每一页都是一次有界的索引范围扫描，与翻页深度无关
+
+-- get_pending_memos: ORDER BY priority DESC, COALESCE(when_due, 'infinity'), id
+-- (when_due 为空排最后，用 'infinity' 参与行比较)
+CREATE INDEX IF NOT EXISTS idx_memos_pending_order
+ON memos (priority DESC, (COALESCE(when_due, 'infinity'::timestamptz)), id)
+WHERE status = 'pending';
+
+-- fuzzy_search_memos: ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_memos_status_created
+ON memos (status, created_at DESC, id DESC);
@@ -0,0 +1,67 @@
+-- 迁移 006: 数值优先级 priority_rank
+-- priority 是文本列，ORDER BY priority DESC 实际得到 normal > low > high (按字母序)
+-- priority_rank 为生成列 (high=3, normal=2, low=1, 其他=0)，ADD COLUMN 时即完成回填，
+-- 之后随 priority 自动维护; 所有按优先级排序的查询改用该列
+
+ALTER TABLE memos ADD COLUMN IF NOT EXISTS priority_rank SMALLINT
+GENERATED ALWAYS AS (
+    CASE priority
+        WHEN 'high' THEN 3
+        WHEN 'normal' THEN 2
+        WHEN 'low' THEN 1
+        ELSE 0
+    END
+) STORED;
+
+-- get_pending_memos: ORDER BY priority_rank DESC, COALESCE(when_due, 'infinity'), id
+-- list_pending 的每一页都是这个部分索引上的有界范围扫描，无需额外排序
+CREATE INDEX IF NOT EXISTS idx_memos_pending_rank
+ON memos (priority_rank DESC, (COALESCE(when_due, 'infinity'::timestamptz)), id)
+WHERE status = 'pending';
+
+-- 被 idx_memos_pending_rank 取代 (见 005)
+DROP INDEX IF EXISTS idx_memos_pending_order;
+
+-- 早报: 同一截止时间的任务按优先级排列，无截止时间的任务按优先级排列
+CREATE OR REPLACE FUNCTION memo_daily_report(
+    p_day_start TIMESTAMPTZ,
+    p_day_end TIMESTAMPTZ,
+    p_now TIMESTAMPTZ DEFAULT NOW()
+)
+RETURNS JSONB AS $$
+    WITH report_rows AS (
+        SELECT what, who, priority, priority_rank, when_due, NULL::TIMESTAMPTZ AS completed_at, status
+        FROM memos
+        WHERE status = 'pending'
+        UNION ALL
+        SELECT what, who, priority, priority_rank, when_due, completed_at, status
+        FROM memos
+        WHERE status = 'completed'
+          AND completed_at >= p_day_start
+          AND completed_at < p_day_end
+    ),
+    items AS (
+        SELECT status, priority_rank, when_due, completed_at,
+               jsonb_build_object(
+                   'what', what,
+                   'who', who,
+                   'priority', priority,
+                   'when_due', when_due,
+                   'completed_at', completed_at
+               ) AS item
+        FROM report_rows
+    )
+    SELECT jsonb_build_object(
+        'overdue', COALESCE(jsonb_agg(item ORDER BY when_due, priority_rank DESC)
+            FILTER (WHERE status = 'pending' AND when_due < p_now), '[]'::jsonb),
+        'pending', COALESCE(jsonb_agg(item ORDER BY when_due, priority_rank DESC)
+            FILTER (WHERE status = 'pending' AND when_due >= p_now AND when_due < p_day_end), '[]'::jsonb),
+        'upcoming', COALESCE(jsonb_agg(item ORDER BY when_due, priority_rank DESC)
+            FILTER (WHERE status = 'pending' AND when_due >= p_day_end), '[]'::jsonb),
+        'unscheduled', COALESCE(jsonb_agg(item ORDER BY priority_rank DESC)
+            FILTER (WHERE status = 'pending' AND when_due IS NULL), '[]'::jsonb),
+        'completed', COALESCE(jsonb_agg(item ORDER BY completed_at DESC)
+            FILTER (WHERE status = 'completed'), '[]'::jsonb)
+    )
+    FROM items;
+$$ LANGUAGE sql STABLE;
@@ -1,5 +1,6 @@
 -- 智能备忘录系统 - 数据库 Schema
 -- 适用于 Supabase PostgreSQL
+-- 建表后执行 python scripts/migrate.py 应用 migrations/ 下的增量迁移
 
 -- 备忘录主表
 CREATE TABLE IF NOT EXISTS memos (